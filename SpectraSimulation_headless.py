@@ -10,6 +10,8 @@ from pathlib import Path
 
 from data.variables import per_table
 
+import data.variables as generalVars
+
 from data.wrappers import InitializeUserDefinitions, CheckCS, CheckExcitation, InitializeMCDFData, \
                         InitializeMCDFDataExc, InitializeDBData
 
@@ -17,6 +19,8 @@ from interface.updaters import dict_updater
 
 from simulation.simulation import simulate
 
+from utils.misc.progress import ConsoleProgress, install_worker_progress, listen_worker_progress
+
 
 from typing import Dict, Any
 
@@ -104,25 +108,54 @@ def startHeadless(headless_config: Dict[str, Any] = {}, userLine = None):
     
     exc = "Excitation" in headless_config['satelite_var']
     
-    if 'make_grid' in headless_config:
-        if headless_config['make_grid']:
-            from multiprocessing.pool import Pool
-            from copy import deepcopy
-            
-            with Pool(headless_config['threads']) as pool:
-                arg_list = []
-                for i in range(headless_config['threads']):
-                    new_config = deepcopy(headless_config)
-                    arg_list.append((dir_path, None, None, None, exc, False, new_config))
-                    arg_list[i][-1]['offset'] = i
+    # Optionally print the simulation progress in the console
+    show_progress: bool = False
+    if 'show_progress' in headless_config:
+        show_progress = headless_config['show_progress']
+    
+    if show_progress:
+        generalVars.progressReporter = ConsoleProgress()
+    
+    try:
+        if 'make_grid' in headless_config:
+            if headless_config['make_grid']:
+                from multiprocessing.pool import Pool
+                from multiprocessing import Manager
+                from copy import deepcopy
+                
+                initializer = None
+                initargs = ()
+                if show_progress:
+                    # The workers send their progress to a queue which is printed by a thread in this process
+                    manager = Manager()
+                    queue = manager.Queue()
+                    listener = listen_worker_progress(queue, headless_config['threads'])
+                    initializer = install_worker_progress
+                    initargs = (queue,)
+                
+                with Pool(headless_config['threads'], initializer, initargs) as pool:
+                    arg_list = []
+                    for i in range(headless_config['threads']):
+                        new_config = deepcopy(headless_config)
+                        arg_list.append((dir_path, None, None, None, exc, False, new_config))
+                        arg_list[i][-1]['offset'] = i
+                    
+                    pool.starmap(simulate, arg_list)
                 
-                pool.starmap(simulate, arg_list)
+                if show_progress:
+                    # Stop the progress listener
+                    queue.put(None)
+                    listener.join()
+                    manager.shutdown()
+            else:
+                simulate(dir_path, None, None, None,
+                        excitation = exc, quantify = False, headless_config = headless_config)
         else:
             simulate(dir_path, None, None, None,
-                    excitation = exc, quantify = False, headless_config = headless_config)
-    else:
-        simulate(dir_path, None, None, None,
-                    excitation = exc, quantify = False, headless_config = headless_config)
+                        excitation = exc, quantify = False, headless_config = headless_config)
+    finally:
+        # Do not leave the console reporter active for later simulations in this process
+        generalVars.progressReporter = None
 
 
 if __name__ == "__main__":
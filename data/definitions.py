@@ -14,13 +14,31 @@ from __future__ import annotations
 import data.variables as generalVars
 
 
-from typing import List, Dict
+from typing import Any, Iterator, List, Dict, Tuple
+
+from array import array
+
+import numpy as np
+import numpy.typing as npt
 
 
 class Line():
     """
-    Class to hold the lines read from file
+    Class to hold the lines read from file.
+    The fields are stored in slots, as there is one object for each row of every file.
+    The per-simulation values (overlap, overlapKey, diagramOverlap, mix) are kept in side arrays of the LineTable
+    the line belongs to, or in private slots for lines that are not part of a table.
+    """
+    __slots__ = ('Num', 'Shelli', 'jji', 'eigvi', 'Shellf', 'jjf', 'eigvf', 'energy', 'br', 'levelRadYield',
+                 'intensity', 'weight', 'radWidth', 'augWidth', 'totalWidth', 'gEnergy', 'rate',
+                 'convOverlap', 'percent', 'acc', 'diff', 'table', 'tableIndex',
+                 '_overlap', '_overlapKey', '_diagramOverlap', '_mix')
+    
+    sideFields: Tuple[str, ...] = ('overlap', 'overlapKey', 'diagramOverlap', 'mix')
+    """
+    Per-simulation values that are not stored in the line object when it belongs to a table
     """
+    
     def __init__(self, Num: int = 0, Shelli: str = '', jji: int = 0, eigvi: int = 0,
                  Shellf: str = '', jjf: int = 0, eigvf: int = 0,
                  energy: float = 0.0, br: float = 0.0, levelRadYield: float = 0.0,
@@ -111,8 +129,74 @@ class Line():
                 raise RuntimeError("Error reading line from file. Unexpected format with " + str(len(vals) - (len(vals) >= 11)) + " values to process")
 
     
-    def setOverlap(self, overlap: float):
+    def getSide(self, field: str):
+        """
+        Function to get a per-simulation value of the line
+        
+            Args:
+                field: name of the value (overlap, overlapKey, diagramOverlap, mix)
+            
+            Returns:
+                the value, raising AttributeError if it was not set
+        """
+        table: LineTable | None = getattr(self, 'table', None)
+        if table is not None:
+            return table.getSide(field, self.tableIndex)
+        
+        try:
+            return getattr(self, '_' + field)
+        except AttributeError:
+            raise AttributeError("'" + type(self).__name__ + "' object has no attribute '" + field + "'")
+    
+    def setSide(self, field: str, value):
+        """
+        Function to set a per-simulation value of the line
+        
+            Args:
+                field: name of the value (overlap, overlapKey, diagramOverlap, mix)
+                value: the value to set
+        """
+        table: LineTable | None = getattr(self, 'table', None)
+        if table is not None:
+            table.setSide(field, self.tableIndex, value)
+        else:
+            setattr(self, '_' + field, value)
+    
+    @property
+    def overlap(self) -> float:
+        return self.getSide('overlap')
+    
+    @overlap.setter
+    def overlap(self, value: float):
+        self.setSide('overlap', value)
+    
+    @property
+    def overlapKey(self) -> Tuple | None:
+        return self.getSide('overlapKey')
+    
+    @overlapKey.setter
+    def overlapKey(self, value: Tuple | None):
+        self.setSide('overlapKey', value)
+    
+    @property
+    def diagramOverlap(self) -> float:
+        return self.getSide('diagramOverlap')
+    
+    @diagramOverlap.setter
+    def diagramOverlap(self, value: float):
+        self.setSide('diagramOverlap', value)
+    
+    @property
+    def mix(self) -> float:
+        return self.getSide('mix')
+    
+    @mix.setter
+    def mix(self, value: float):
+        self.setSide('mix', value)
+    
+    def setOverlap(self, overlap: float, key: Tuple | None = None):
         self.overlap = overlap
+        self.overlapKey = key
         
         return self
     
@@ -137,37 +221,7 @@ class Line():
         if self.energy == 0:
             return False
         
-        if strict == 'h':
-            if auger_level == '':
-                return (self.Shelli in low_level or low_level in self.Shelli) and self.Shellf == high_level
-            else:
-                return (self.Shelli in low_level or low_level in self.Shelli) and self.Shellf[:2] == high_level and (self.Shellf[2:4] in auger_level or auger_level in self.Shellf[2:4])
-        elif strict == 'hia':
-            if auger_level == '':
-                return (self.Shelli in low_level or low_level in self.Shelli) and (self.Shellf[:2] == high_level)
-            else:
-                return (self.Shelli in low_level or low_level in self.Shelli) and (self.Shellf[:2] == high_level) and (self.Shellf[2:4] in auger_level or auger_level in self.Shellf[2:4])
-        elif strict == 'l':
-            if auger_level == '':
-                return self.Shelli == low_level and (self.Shellf in high_level or high_level in self.Shellf)
-            else:
-                return self.Shelli == low_level and (self.Shellf[:2] in high_level or high_level in self.Shellf[:2]) and (self.Shellf[2:4] in auger_level or auger_level in self.Shellf[2:4])
-        elif strict == 'hl':
-            if auger_level == '':
-                return self.Shelli == low_level and self.Shellf == high_level
-            else:
-                return self.Shelli == low_level and self.Shellf[:2] == high_level and (self.Shellf[2:4] in auger_level or auger_level in self.Shellf[2:4])
-        elif strict == 'na':
-            if auger_level == '':
-                return (self.Shelli in low_level or low_level in self.Shelli) and (self.Shellf in high_level or high_level in self.Shellf)
-            else:
-                return (self.Shelli in low_level or low_level in self.Shelli) and (self.Shellf[:2] in high_level or high_level in self.Shellf[:2]) and (self.Shellf[2:4] in auger_level or auger_level in self.Shellf[2:4])
-        elif strict == 'ha':
-            return (self.Shelli in low_level or low_level in self.Shelli) and self.Shellf[:2] == high_level and self.Shellf[2:4] == auger_level
-        elif strict == 'la':
-            return self.Shelli == low_level and (self.Shellf[:2] in high_level or high_level in self.Shellf[:2]) and self.Shellf[2:4] == auger_level
-        elif strict == 'hla':
-            return self.Shelli == low_level and self.Shellf[:2] == high_level and self.Shellf[2:4] == auger_level
+        return matchInitialLevel(self.Shelli, low_level, strict) and matchFinalLevel(self.Shellf, high_level, auger_level, strict)
     
     def filterJJI(self) -> bool:
         return self.jji in generalVars.jj_vals
@@ -328,6 +382,562 @@ class Line():
             alpha
 
 
+# Match the initial level of a line for the filterLevel modes
+def matchInitialLevel(Shelli: str, low_level: str, strict: str) -> bool:
+    """
+    Function to match the initial level of a line for the filterLevel modes
+        
+        Args:
+            Shelli: initial shell label of the line
+            low_level: low level of the transition
+            strict: filter mode (h, hia, l, hl, na, ha, la, hla)
+        
+        Returns:
+            True if the initial level matches
+    """
+    if strict in ('h', 'hia', 'na', 'ha'):
+        return Shelli in low_level or low_level in Shelli
+    else:
+        return Shelli == low_level
+
+# Match the final level of a line for the filterLevel modes
+def matchFinalLevel(Shellf: str, high_level: str, auger_level: str, strict: str) -> bool:
+    """
+    Function to match the final level of a line for the filterLevel modes
+        
+        Args:
+            Shellf: final shell label of the line
+            high_level: high level of the transition
+            auger_level: auger level of the transition (empty for radiative transitions)
+            strict: filter mode (h, hia, l, hl, na, ha, la, hla)
+        
+        Returns:
+            True if the final level matches
+    """
+    if auger_level == '':
+        if strict == 'h' or strict == 'hl':
+            return Shellf == high_level
+        elif strict == 'hia':
+            return Shellf[:2] == high_level
+        else:
+            return Shellf in high_level or high_level in Shellf
+    
+    if strict in ('ha', 'la', 'hla'):
+        auger_match = Shellf[2:4] == auger_level
+    else:
+        auger_match = Shellf[2:4] in auger_level or auger_level in Shellf[2:4]
+    
+    if strict in ('h', 'hia', 'hl', 'ha', 'hla'):
+        return Shellf[:2] == high_level and auger_match
+    else:
+        return (Shellf[:2] in high_level or high_level in Shellf[:2]) and auger_match
+
+
+class LineTable():
+    """
+    Class to hold the lines read from a rates file as columns.
+    The numeric fields are stored as arrays and the shell labels as codes into a list of unique labels.
+    The rows are materialized as new Line (or userLine) objects each time they are accessed, so the table
+    can be used wherever a list of lines is expected, while the filters work on whole columns.
+    """
+    fields: Tuple[str, ...] = ('Num', 'Shelli', 'jji', 'eigvi', 'Shellf', 'jjf', 'eigvf', 'energy', 'br',
+                               'levelRadYield', 'intensity', 'weight', 'radWidth', 'augWidth', 'totalWidth')
+    """
+    Fields of the Line constructor stored in the table, in the constructor order
+    """
+    intFields: Tuple[str, ...] = ('Num', 'jji', 'eigvi', 'jjf', 'eigvf')
+    """
+    Integer fields of the table
+    """
+    floatFields: Tuple[str, ...] = ('energy', 'br', 'levelRadYield', 'intensity', 'weight', 'radWidth', 'augWidth', 'totalWidth')
+    """
+    Floating point fields of the table
+    """
+    iterBlock: int = 4096
+    """
+    Number of rows built at once when iterating the table
+    """
+    
+    def __init__(self, lines: List[Line] | None = None, columns: Dict[str, List] | None = None):
+        """
+        Args:
+            lines: list of lines with the rates file fields
+            columns: lists with the values of each field, used instead of the lines when reading a file directly
+        """
+        self.lineClass: type[Line] = generalVars.userLine if generalVars.userLine else Line
+        """
+        Class used to materialize the rows
+        """
+        self.shells: List[str] = []
+        """
+        Unique shell labels of the initial and final levels
+        """
+        codes: Dict[str, int] = {}
+        
+        def encode(label: str) -> int:
+            if label not in codes:
+                codes[label] = len(self.shells)
+                self.shells.append(label)
+            return codes[label]
+        
+        if columns is None:
+            lines = lines if lines is not None else []
+            columns = {field: [getattr(line, field, 0) for line in lines] for field in self.fields}
+        
+        self.columns: Dict[str, npt.NDArray] = {}
+        """
+        Arrays with the numeric fields and the shell label codes (Shelli, Shellf) of the lines
+        """
+        for field in self.intFields:
+            self.columns[field] = np.array(columns[field], dtype=np.int64)
+        for field in self.floatFields:
+            self.columns[field] = np.array(columns[field], dtype=np.float64)
+        self.columns['Shelli'] = np.array([encode(label) for label in columns['Shelli']], dtype=np.int32)
+        self.columns['Shellf'] = np.array([encode(label) for label in columns['Shellf']], dtype=np.int32)
+        
+        self.side: Dict[str, npt.NDArray] = {}
+        """
+        Side arrays with the per-simulation values of the rows (see Line.sideFields), allocated when they are first set
+        """
+        
+        self.levelOrder: npt.NDArray[np.int64] = np.array([], dtype=np.int64)
+        """
+        Row indexes sorted by (initial shell, final shell) label, keeping the file order inside each pair
+        """
+        self.levelIndex: Dict[int, List[Tuple[int, int, int]]] = {}
+        """
+        Level index mapping each initial shell label code to the (final shell label code, start, stop) ranges of its rows in levelOrder
+        """
+        self.levelQueries: Dict[Tuple[str, str, str, str], npt.NDArray[np.int64]] = {}
+        """
+        Rows selected by each (low level, high level, auger level, filter mode) query already made
+        """
+        self.buildLevelIndex()
+    
+    @classmethod
+    def from_lines(cls, lines: List[Line]) -> LineTable | List[Line]:
+        """
+        Function to build a table from a list of lines read from a rates file
+        
+            Args:
+                lines: list of lines
+            
+            Returns:
+                the line table, or the same list if the lines do not have the rates file fields (e.g. convergence or decay rate files)
+        """
+        if any(not hasattr(line, 'Shellf') or hasattr(line, 'convOverlap') or hasattr(line, 'rate') for line in lines):
+            return lines
+        
+        return cls(lines)
+    
+    @classmethod
+    def from_text(cls, text_lines: List[str]) -> LineTable | List[Line]:
+        """
+        Function to build a table from the text lines of a rates file.
+        Files where every line has the 16 or 11 rates fields are read directly into the columns, without creating a line object
+        for each row (the fields missing from the 11 value format are stored as 0). Other files (or a custom userLine class) go through processLine.
+        
+            Args:
+                text_lines: text lines of the file, without the header
+            
+            Returns:
+                the line table, or a list of lines if the file does not have the rates fields
+        """
+        if generalVars.userLine:
+            return cls.from_lines([processLine(line=x) for x in text_lines])
+        
+        # Column positions of the Line fields in the 16 and 11 value formats (the 5th value is not used)
+        positions: Dict[int, Dict[str, int]] = {16: dict(zip(cls.fields, (0, 1, 2, 3, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15))),
+                                                11: {'Num': 0, 'Shelli': 1, 'jji': 2, 'eigvi': 3, 'Shellf': 5, 'jjf': 6, 'eigvf': 7,
+                                                     'energy': 8, 'intensity': 9, 'totalWidth': 10}}
+        # The values are appended to compact arrays one row at a time, so the split text of the whole file is never kept
+        columns: Dict[str, Any] = {}
+        for field in cls.fields:
+            if field in cls.intFields:
+                columns[field] = array('q')
+            elif field in cls.floatFields:
+                columns[field] = array('d')
+            else:
+                columns[field] = []
+        labels: Dict[str, str] = {}
+        
+        for x in text_lines:
+            vals = x.split()
+            # The 11 value convergence files have an overlap label instead of the final level eigenvalue
+            if len(vals) not in positions or (len(vals) == 11 and not vals[7].lstrip('-').isdigit()):
+                return cls.from_lines([processLine(line=x) for x in text_lines])
+            
+            pos = positions[len(vals)]
+            for field in cls.fields:
+                if field in cls.intFields:
+                    columns[field].append(int(vals[pos[field]]))
+                elif field in cls.floatFields:
+                    columns[field].append(float(vals[pos[field]]) if field in pos else 0.0)
+                else:
+                    # Keep a single string object for each shell label
+                    columns[field].append(labels.setdefault(vals[pos[field]], vals[pos[field]]))
+        
+        if len(columns['Num']) == 0:
+            return cls.from_lines([])
+        
+        return cls(columns=columns)
+    
+    def __len__(self) -> int:
+        return len(self.columns['Num'])
+    
+    def row(self, index: int) -> Line:
+        """
+        Function to get a new line object with the values of a row.
+        The objects are not kept by the table, so each access returns a new object that shares the side values of the row.
+        
+            Args:
+                index: row index
+            
+            Returns:
+                the line object of the row
+        """
+        line = self.lineClass(*[self.shells[self.columns[field][index]] if field in ('Shelli', 'Shellf')
+                                else self.columns[field][index].item() for field in self.fields])
+        line.table = self
+        line.tableIndex = index
+        
+        return line
+    
+    def getSide(self, field: str, index: int):
+        """
+        Function to get a per-simulation value of a row
+        
+            Args:
+                field: name of the value (see Line.sideFields)
+                index: row index
+            
+            Returns:
+                the value, raising AttributeError if it was not set
+        """
+        values = self.side.get(field)
+        value = None if values is None else values[index]
+        
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            if field == 'overlapKey' and values is not None:
+                return None
+            raise AttributeError("'" + self.lineClass.__name__ + "' object has no attribute '" + field + "'")
+        
+        return value.item() if isinstance(value, np.generic) else value
+    
+    def setSide(self, field: str, index: int, value):
+        """
+        Function to set a per-simulation value of a row
+        
+            Args:
+                field: name of the value (see Line.sideFields)
+                index: row index
+                value: the value to set
+        """
+        if field not in self.side:
+            if field == 'overlapKey':
+                self.side[field] = np.full(len(self), None, dtype=object)
+            else:
+                self.side[field] = np.full(len(self), np.nan, dtype=np.float64)
+        
+        self.side[field][index] = value
+    
+    def take(self, indexes: npt.NDArray[np.int64] | List[int]) -> List[Line]:
+        """
+        Function to get the line objects of a set of rows
+        
+            Args:
+                indexes: row indexes
+            
+            Returns:
+                list with the line objects of the rows
+        """
+        indexes = np.asarray(indexes, dtype=np.int64)
+        shells = np.array(self.shells, dtype=object)
+        # Convert each column of the selected rows to python values at once instead of one value at a time
+        values = [shells[self.columns[field][indexes]].tolist() if field in ('Shelli', 'Shellf')
+                  else self.columns[field][indexes].tolist() for field in self.fields]
+        
+        lines: List[Line] = []
+        for index, args in zip(indexes.tolist(), zip(*values)):
+            line = self.lineClass(*args)
+            line.table = self
+            line.tableIndex = index
+            lines.append(line)
+        
+        return lines
+    
+    def fieldValues(self, *fields: str) -> Tuple[List, ...]:
+        """
+        Function to get the values of some fields for all rows as python lists, without creating the line objects
+        
+            Args:
+                fields: names of the Line fields
+            
+            Returns:
+                one list of values for each field
+        """
+        return tuple(self.column(field).tolist() for field in fields)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("LineTable index out of range")
+        
+        return self.row(index)
+    
+    def __iter__(self) -> Iterator[Line]:
+        # Build the rows in blocks, so a full pass does not convert the values one at a time nor keep all the rows
+        for start in range(0, len(self), self.iterBlock):
+            yield from self.take(np.arange(start, min(start + self.iterBlock, len(self))))
+    
+    def __eq__(self, other):
+        if isinstance(other, LineTable):
+            return self is other or (len(self) == len(other) and self.shells == other.shells and
+                                     all(np.array_equal(self.columns[field], other.columns[field]) for field in self.fields))
+        if isinstance(other, list):
+            # The rows of a table are equal to a list only if the list holds the rows of this table in order
+            return len(self) == len(other) and all(getattr(line, 'table', None) is self and line.tableIndex == index
+                                                   for index, line in enumerate(other))
+        
+        return NotImplemented
+    
+    def __add__(self, other) -> List[Line]:
+        return list(self) + list(other)
+    
+    def column(self, field: str) -> npt.NDArray:
+        """
+        Function to get the values of a field for all rows
+        
+            Args:
+                field: name of the Line field
+            
+            Returns:
+                array with the field values (the shell labels are decoded into an object array)
+        """
+        if field in ('Shelli', 'Shellf'):
+            return np.array(self.shells, dtype=object)[self.columns[field]]
+        
+        return self.columns[field]
+    
+    def buildLevelIndex(self):
+        """
+        Function to build the level index, grouping the rows with non-zero energy by their (initial shell, final shell) labels
+        """
+        valid = np.flatnonzero(self.columns['energy'] != 0)
+        pairs = self.columns['Shelli'][valid].astype(np.int64) * max(len(self.shells), 1) + self.columns['Shellf'][valid]
+        
+        order = np.argsort(pairs, kind='stable')
+        self.levelOrder = valid[order]
+        
+        keys, starts = np.unique(pairs[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+        
+        self.levelIndex = {}
+        for key, start, stop in zip(keys, starts, stops):
+            initial, final = divmod(int(key), max(len(self.shells), 1))
+            self.levelIndex.setdefault(initial, []).append((final, int(start), int(stop)))
+        
+        self.levelQueries = {}
+    
+    def levelIndexes(self, low_level: str, high_level: str, auger_level: str = '', *, strict: str) -> npt.NDArray[np.int64]:
+        """
+        Function to get the rows that pass Line.filterLevel from the level index.
+        The level match is evaluated once for each unique shell label and the rows of the matching
+        (initial shell, final shell) pairs are taken from their ranges, so no row is scanned.
+        The result of each query is kept for the next calls.
+        
+            Args:
+                low_level: low level of the transition
+                high_level: high level of the transition
+                auger_level: auger level of the transition (empty for radiative transitions)
+                strict: filter mode (h, hia, l, hl, na, ha, la, hla)
+            
+            Returns:
+                sorted indexes of the selected rows
+        """
+        query = (low_level, high_level, auger_level, strict)
+        if query in self.levelQueries:
+            return self.levelQueries[query]
+        
+        ranges: List[npt.NDArray[np.int64]] = []
+        final_match: Dict[int, bool] = {}
+        for initial, finals in self.levelIndex.items():
+            if not matchInitialLevel(self.shells[initial], low_level, strict):
+                continue
+            
+            for final, start, stop in finals:
+                if final not in final_match:
+                    final_match[final] = matchFinalLevel(self.shells[final], high_level, auger_level, strict)
+                if final_match[final]:
+                    ranges.append(self.levelOrder[start:stop])
+        
+        indexes = np.sort(np.concatenate(ranges)) if len(ranges) > 0 else np.array([], dtype=np.int64)
+        self.levelQueries[query] = indexes
+        
+        return indexes
+
+
+# Filter a list or table of lines by level
+def filterLines(lines: List[Line] | LineTable, low_level: str, high_level: str, auger_level: str = '', *,
+                strict: str, jj: bool = False) -> List[Line]:
+    """
+    Function to filter a list or table of lines with Line.filterLevel and optionally Line.filterJJI.
+    Tables are filtered with their level index, unless the line class overrides the filter methods.
+        
+        Args:
+            lines: list or table of lines
+            low_level: low level of the transition
+            high_level: high level of the transition
+            auger_level: auger level of the transition (empty for radiative transitions)
+            strict: filter mode (h, hia, l, hl, na, ha, la, hla)
+            jj: also filter the lines by the selected 2J values
+        
+        Returns:
+            list with the lines that pass the filter, in the original order
+    """
+    if isinstance(lines, LineTable) and lines.lineClass.filterLevel is Line.filterLevel and \
+        (not jj or lines.lineClass.filterJJI is Line.filterJJI):
+        # Validate the mode the same way as Line.filterLevel
+        if len(lines) > 0:
+            Line.filterLevel(lines.row(0), low_level, high_level, auger_level, strict=strict)
+        
+        indexes = lines.levelIndexes(low_level, high_level, auger_level, strict=strict)
+        if jj:
+            indexes = indexes[np.isin(lines.columns['jji'][indexes], list(generalVars.jj_vals))]
+        
+        return lines.take(indexes)
+    
+    if jj:
+        return [line for line in lines if line.filterLevel(low_level, high_level, auger_level, strict=strict) and line.filterJJI()]
+    
+    return [line for line in lines if line.filterLevel(low_level, high_level, auger_level, strict=strict)]
+
+
+# Get the values of some fields of a list or table of lines
+def lineFieldValues(lines: List[Line] | LineTable, *fields: str) -> Tuple[List, ...]:
+    """
+    Function to get the values of some fields of a list or table of lines.
+    Tables return their columns, so no line object is created.
+        
+        Args:
+            lines: list or table of lines
+            fields: names of the Line fields
+        
+        Returns:
+            one list of values for each field, in the order of the lines
+    """
+    if isinstance(lines, LineTable):
+        return lines.fieldValues(*fields)
+    
+    return tuple([getattr(line, field) for line in lines] for field in fields)
+
+
+# Index the branching ratios of a list or table of levels by their state
+def buildBRIndex(levels: List[Line] | LineTable | None) -> Dict[Tuple[str, int, int], float]:
+    """
+    Function to build the hashed (Shelli, jji, eigvi) -> branching ratio index of the levels read from an ionization energies file.
+    When a state is repeated the first level is kept, as in the linear search with Line.filterInitialState.
+        
+        Args:
+            levels: list or table of levels
+        
+        Returns:
+            dictionary with the branching ratio of each initial state
+    """
+    index: Dict[Tuple[str, int, int], float] = {}
+    if levels is not None:
+        for level in levels:
+            index.setdefault((level.Shelli, level.jji, level.eigvi), level.br)
+    
+    return index
+
+
+class ComponentStore():
+    """
+    Class to hold the simulated y values of the satellite components (transition, shake label) that have lines.
+    The components are stored as rows of a single 2D array, sorted by transition and shake label,
+    so the empty components are never allocated.
+    """
+    def __init__(self, num_transitions: int, num_slots: int, keys: npt.NDArray[np.int64], num_points: int,
+                 dtype: type = np.float64):
+        """
+        Args:
+            num_transitions: number of diagram transitions
+            num_slots: number of shake label slots for each transition (shake-off labels followed by shake-up labels)
+            keys: sorted flat index (transition * num_slots + slot) of the stored components
+            num_points: number of simulated x values
+            dtype: floating point type of the stored values
+        """
+        self.num_transitions = num_transitions
+        self.num_slots = num_slots
+        self.keys: npt.NDArray[np.int64] = np.asarray(keys, dtype=np.int64)
+        self.data: npt.NDArray[np.float64] = np.zeros((len(keys), num_points), dtype=dtype)
+        """
+        Simulated y values of the stored components, one row for each key
+        """
+        self.rows: Dict[int, int] = {int(key): row for row, key in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return self.num_transitions
+
+    def component(self, transition: int, slot: int) -> npt.NDArray[np.float64]:
+        """
+        Function to get the y values of one component
+
+            Args:
+                transition: index of the diagram transition
+                slot: index of the shake label slot
+
+            Returns:
+                the y values of the component, or zeros if the component has no lines
+        """
+        row = self.rows.get(transition * self.num_slots + slot)
+        if row is None:
+            return np.zeros(self.data.shape[1], dtype=self.data.dtype)
+        
+        return self.data[row]
+
+    def components(self, transition: int) -> List[Tuple[int, npt.NDArray[np.float64]]]:
+        """
+        Function to get the stored components of one transition
+
+            Args:
+                transition: index of the diagram transition
+
+            Returns:
+                list of (slot, y values) for the stored components of the transition, sorted by slot
+        """
+        start, stop = np.searchsorted(self.keys, [transition * self.num_slots, (transition + 1) * self.num_slots])
+        
+        return [(int(self.keys[row]) - transition * self.num_slots, self.data[row]) for row in range(start, stop)]
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], npt.NDArray[np.float64]]]:
+        """
+        Function to iterate all stored components
+
+            Returns:
+                iterator of ((transition, slot), y values), sorted by transition and slot
+        """
+        for row, key in enumerate(self.keys):
+            yield (int(key) // self.num_slots, int(key) % self.num_slots), self.data[row]
+
+    def dense(self) -> npt.NDArray[np.float64]:
+        """
+        Function to build the dense (transitions x slots x points) array of all components
+
+            Returns:
+                dense array with zeros in the empty components
+        """
+        dense = np.zeros((self.num_transitions * self.num_slots, self.data.shape[1]), dtype=self.data.dtype)
+        dense[self.keys] = self.data
+        
+        return dense.reshape((self.num_transitions, self.num_slots, self.data.shape[1]))
+
+
 def processLine(Num: int = 0, Shelli: str = '', jji: int = 0, eigvi: int = 0,
                 Shellf: str = '', jjf: int = 0, eigvf: int = 0,
                 energy: float = 0.0, br: float = 0.0, levelRadYield: float = 0.0,
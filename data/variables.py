@@ -8,7 +8,7 @@ No functions should be defined in this module.
 from __future__ import annotations
 from typing import List, Dict, Tuple
 
-from data.definitions import Line
+from data.definitions import Line, LineTable, ComponentStore
 
 import numpy as np
 import numpy.typing as npt
@@ -31,22 +31,22 @@ import numpy.typing as npt
 # region
 
 #Raw data read from the radiative transitions file to be simulated
-lineradrates: List[Line] = []
+lineradrates: List[Line] | LineTable = []
 """
 Data from the radiative spectrum read from file
 """
 #Raw data read from the satellite transitions file to be simulated
-linesatellites: List[Line] = []
+linesatellites: List[Line] | LineTable = []
 """
 Data from the satellite spectrum read from file
 """
 #Raw data read from the auger transitions file to be simulated
-lineauger: List[Line] = []
+lineauger: List[Line] | LineTable = []
 """
 Data from the auger spectrum read from file
 """
 #Raw data read from the shake-up transitions file to be simulated, for each orbital the shake-up electron is promoted to
-lineshakeup: List[Line] = []
+lineshakeup: List[Line] | LineTable = []
 """
 Data from the shake-up spectrum read from file for each orbital the shake-up electron is promoted to
 """
@@ -60,6 +60,12 @@ shakeoff: List[List[str]] = []
 """
 Shake-off probabilities read from file
 """
+#Satellite line groupings of the transitions already simulated
+satelliteGroups: Dict[Tuple, Dict[str, Tuple[List[int], List[int], List[int]]]] = {}
+"""
+Cache of the satellite groupings, keyed by the low level, shake labels and initial shells of the satellite lines grouped.
+Each grouping has the (all, shake-off, shake-up) line positions of each shake level. The cache is cleared when an element is loaded
+"""
 
 # endregion
 
@@ -67,29 +73,29 @@ Shake-off probabilities read from file
 # region
 
 #Raw data read from the radiative transitions files to be simulated, for each charge state split by positive and negative CS
-lineradrates_PCS: List[List[Line]] = []
+lineradrates_PCS: List[List[Line] | LineTable] = []
 """
 Data from the radiative spectrum read from file for each of the positive charge states
 """
-lineradrates_NCS: List[List[Line]] = []
+lineradrates_NCS: List[List[Line] | LineTable] = []
 """
 Data from the radiative spectrum read from file for each of the negative charge states
 """
 #Raw data read from the auger transitions files to be simulated, for each charge state split by positive and negative CS
-lineaugrates_PCS: List[List[Line]] = []
+lineaugrates_PCS: List[List[Line] | LineTable] = []
 """
 Data from the auger spectrum read from file for each of the positive charge states
 """
-lineaugrates_NCS: List[List[Line]] = []
+lineaugrates_NCS: List[List[Line] | LineTable] = []
 """
 Data from the auger spectrum read from file for each of the negative charge states
 """
 #Raw data read from the satellite transitions files to be simulated, for each charge state split by positive and negative CS
-linesatellites_PCS: List[List[Line]] = []
+linesatellites_PCS: List[List[Line] | LineTable] = []
 """
 Data from the satellite spectrum read from file for each of the positive charge states
 """
-linesatellites_NCS: List[List[Line]] = []
+linesatellites_NCS: List[List[Line] | LineTable] = []
 """
 Data from the satellite spectrum read from file for each of the negative charge states
 """
@@ -100,17 +106,17 @@ Data from the satellite spectrum read from file for each of the negative charge
 # region
 
 #Raw data read from the radiative transitions files to be simulated, for each excitation
-lineradrates_EXC: List[List[Line]] = []
+lineradrates_EXC: List[List[Line] | LineTable] = []
 """
 Data from the radiative spectrum read from file for each excitation
 """
 #Raw data read from the satellite transitions files to be simulated, for each excitation
-linesatellites_EXC: List[List[Line]] = []
+linesatellites_EXC: List[List[Line] | LineTable] = []
 """
 Data from the satellite spectrum read from file for each excitation
 """
 #Raw data read from the shake-up transitions file to be simulated, for each orbital the shake-up electron is promoted to
-lineshakeup_EXC: List[List[Line]] = []
+lineshakeup_EXC: List[List[Line] | LineTable] = []
 """
 Data from the shake-up spectrum read from file for each orbital the shake-up electron is promoted to
 """
@@ -137,17 +143,17 @@ Data from the neutral decay spectrum read from file for each excitation
 # region
 
 #Raw data read from the radiative transitions files to be simulated, for each selected element for quantification
-lineradrates_quant: Dict[str, List[Line] | None] = {}
+lineradrates_quant: Dict[str, List[Line] | LineTable | None] = {}
 """
 Data from the radiative spectrum read from file for each selected element for quantification
 """
 #Raw data read from the satellite transitions files to be simulated, for each selected element for quantification
-linesatellites_quant: Dict[str, List[Line] | None] = {}
+linesatellites_quant: Dict[str, List[Line] | LineTable | None] = {}
 """
 Data from the satellite spectrum read from file for each selected element for quantification
 """
 #Raw data read from the shake-up transitions file to be simulated, for each orbital the shake-up electron is promoted to
-lineshakeup_quant: Dict[str, List[Line] | None] = {}
+lineshakeup_quant: Dict[str, List[Line] | LineTable | None] = {}
 """
 Data from the shake-up spectrum read from file for each orbital the shake-up electron is promoted to
 """
@@ -195,6 +201,26 @@ ionizationsshakeup: List[Line] = []
 """
 Data from the shake-up ionization energies read from file for each orbital the shake-up electron is promoted to
 """
+#Branching ratio of each initial state in the 1 hole ionization energies file
+ionizationsrad_BR: Dict[Tuple[str, int, int], float] = {}
+"""
+Hashed (Shelli, jji, eigvi) -> branching ratio index of the 1 hole ionization energies, built on the first lookup after the levels are read
+"""
+#Levels the 1 hole branching ratio index was built from
+ionizationsrad_BRLevels: List[Line] | None = None
+"""
+Level list the 1 hole branching ratio index was built from, so it is rebuilt when ionizationsrad is replaced
+"""
+#Branching ratio of each initial state in the 2 hole ionization energies file
+ionizationssat_BR: Dict[Tuple[str, int, int], float] = {}
+"""
+Hashed (Shelli, jji, eigvi) -> branching ratio index of the 2 hole ionization energies, built on the first lookup after the levels are read
+"""
+#Levels the 2 hole branching ratio index was built from
+ionizationssat_BRLevels: List[Line] | None = None
+"""
+Level list the 2 hole branching ratio index was built from, so it is rebuilt when ionizationssat is replaced
+"""
 
 # endregion
 
@@ -229,6 +255,18 @@ level_decayrates_exc: List[Dict[str, float]] = []
 Total decay rates summed for all levels of each excitation
 """
 
+#Ratio of the total decay rates of each excitation to the sum for all excitations
+ratio_decayrates_exc: List[float] = []
+"""
+Ratio of the total decay rates of each excitation to the sum for all excitations
+"""
+
+#Sum and number of the level decay rates of each excitation that contain each shell prefix
+prefix_decayrates_exc: List[Dict[str, Tuple[float, int]]] = []
+"""
+Sum and number of the level decay rates of each excitation whose level key contains each 2 character shell prefix
+"""
+
 # endregion
 
 
@@ -705,7 +743,7 @@ yshkuptot: List[float] | npt.NDArray[np.float64] = []
 Final total y values for all simulated shake-up transitions
 """
 #Final y of the simulated satellite lines for each Rad transition
-yfinals: List[List[List[float]]] | npt.NDArray[np.float64] = []
+yfinals: List[List[List[float]]] | ComponentStore = []
 """
 Final y values calculated for each of the possible satellite transitions in each of the simulated diagram transitions
 """
@@ -761,7 +799,7 @@ yshkuptot_exc: List[float] | npt.NDArray[np.float64] = []
 Final total y values for all simulated shake-up transitions
 """
 #Final y of the simulated satellite lines for each Rad transition
-yfinals_exc: List[List[List[float]]] | npt.NDArray[np.float64] = []
+yfinals_exc: List[List[List[float]]] | ComponentStore = []
 """
 Final y values calculated for each of the possible satellite transitions in each of the simulated diagram transitions
 """
@@ -970,6 +1008,54 @@ Flag for if the shake-up file was found. Disables shake-up and uses full shake p
 # Verbose level of console logging for the program
 verbose = 2
 
+#Progress reporter used by the simulation core when there is no interface window
+progressReporter = None
+"""
+Progress reporter (utils.misc.progress) used by the simulation core when there is no interface window.
+None does not report any progress
+"""
+
+# endregion
+
+# --------------------------------------------- #
+#                                               #
+#          PROFILE EVALUATION CONTROL VARS      #
+#                                               #
+# --------------------------------------------- #
+# region
+
+#Floating point type used in the profile kernels and intensity buffers
+computeDtype: type = np.float64
+"""
+Floating point type used in the profile kernels and intensity buffers (np.float64 or np.float32).
+The fit residuals, fitted parameters, the chi^2 and the exported values are always calculated in np.float64
+"""
+#Implementation used for the voigt profile
+voigtMode: str = 'Faddeeva'
+"""
+Implementation used for the voigt profile (Faddeeva, Humlicek, Pseudo), selected from the profile type.
+Faddeeva is exact, Humlicek has a relative error below 1E-4 and Pseudo (Thompson-Cox-Hastings) an error of about 1% of the peak
+"""
+#Backend used to apply the experimental resolution to the line profiles
+profileBackend: str = 'Direct'
+"""
+Backend used to apply the experimental resolution to the line profiles (Direct, FFT).
+The FFT backend convolves the natural width spectrum with the resolution gaussian, and is only used for the voigt profile
+"""
+#Number of profile widths around each line center where the profile is evaluated
+profileWindow: float = 0.0
+"""
+Number of profile widths (natural + instrumental) around each line center where the profile is evaluated exactly.
+A value of 0 evaluates every profile over the full simulated energy grid
+"""
+#Relative error tolerance for the truncated profile evaluation
+profileTolerance: float = 1e-6
+"""
+Relative error tolerance, with respect to the peak of each line, for the truncated profile evaluation.
+The gaussian and lorentzian cores are extended until they fall below this value, and the voigt cores until the error of their analytic tails
+is below this value. The voigt tails are then evaluated analytically until they fall below this value
+"""
+
 # endregion
 
 # --------------------------------------------- #
@@ -14,6 +14,9 @@ from pathlib import Path
 import data.variables as generalVars
 from data.definitions import Line
 
+from simulation.mults import clear_overlap_cache
+from simulation.shake import clear_shake_tables
+
 #File IO Imports
 from utils.misc.fileIO import readRates, readIonizationEnergies, readWidths, readMeanR, readELAMelement
 from utils.misc.fileIO import searchChargeStates, readChargeStates, readIonPop, readShake
@@ -44,6 +47,12 @@ def InitializeMCDFData(dir_path: Path, element: tuple[int, str], filter: Dict[st
     # Initialize the element name for the functions module
     generalVars.element_name = element_name
     generalVars.Z = z
+    # Drop the satellite groupings of the previous element
+    generalVars.satelliteGroups = {}
+    # Drop the beam overlap integrals of the previous element
+    clear_overlap_cache()
+    # Drop the shake tables of the previous element
+    clear_shake_tables()
     
     if generalVars.verbose >= 3:
         print(element_name)
@@ -279,6 +288,12 @@ def InitializeMCDFDataExc(dir_path: Path, element: tuple[int, str], filter: Dict
     # Initialize the element name for the functions module
     generalVars.element_name = element_name
     generalVars.Z = z
+    # Drop the satellite groupings of the previous element
+    generalVars.satelliteGroups = {}
+    # Drop the beam overlap integrals of the previous element
+    clear_overlap_cache()
+    # Drop the shake tables of the previous element
+    clear_shake_tables()
     
     if generalVars.verbose >= 3:
         print(element_name)
@@ -29,6 +29,7 @@ from utils.misc.fileIO import saveMatrixHtml
 
 #Import the main functions to bind them to the interface
 from utils.misc.analysers import prepareBoostMatrices, prepareRateMatrices, computeCascadeGraph, analyseConvergence
+from utils.misc.analysers import denseLog10, minLog10
 
 import simulation.shake as shakes
 from simulation.fitting import setMaxTotalShake
@@ -446,10 +447,14 @@ def startBoostWindow(split: bool = True):
     augInitials, augFinals, augData, augDataExtra, \
     satInitials, satFinals, satData, satDataExtra = prepareBoostMatrices()
     
-    zmax = np.max([np.max(radData), np.max(augData), np.max(satData)])
+    zmax = max([radData.max(), augData.max(), satData.max()])
+    
+    radDataExtra = radDataExtra.toarray()
+    augDataExtra = augDataExtra.toarray()
+    satDataExtra = satDataExtra.toarray()
 
     
-    fig_rad = go.Heatmap(z=radData,
+    fig_rad = go.Heatmap(z=radData.toarray(),
                         x=radFinals,
                         y=radInitials,
                         hovertemplate="Initial State: %{y}" + 
@@ -460,7 +465,7 @@ def startBoostWindow(split: bool = True):
                         zmin=0,
                         zmax=zmax)
     
-    fig_aug = go.Heatmap(z=augData,
+    fig_aug = go.Heatmap(z=augData.toarray(),
                         x=augFinals,
                         y=augInitials,
                         hovertemplate="Initial State: %{y}" + 
@@ -471,7 +476,7 @@ def startBoostWindow(split: bool = True):
                         zmin=0,
                         zmax=zmax)
     
-    fig_sat = go.Heatmap(z=satData,
+    fig_sat = go.Heatmap(z=satData.toarray(),
                         x=satFinals,
                         y=satInitials,
                         hovertemplate="Initial State: %{y}" + 
@@ -543,11 +548,11 @@ def startBoostWindow(split: bool = True):
         matricesURL = saveMatrixHtml(fig, "boostMatrices.html")
     
     
-    radDataLog = np.log10(radData)
-    augDataLog = np.log10(augData)
-    satDataLog = np.log10(satData)
+    radDataLog = denseLog10(radData)
+    augDataLog = denseLog10(augData)
+    satDataLog = denseLog10(satData)
     
-    zmin = min([np.min(radDataLog[radDataLog != -np.inf]), np.min(augDataLog[augDataLog  != -np.inf]), np.min(satDataLog[satDataLog != -np.inf])])
+    zmin = min([minLog10(radData), minLog10(augData), minLog10(satData)])
 
     
     fig_rad = go.Heatmap(z=radDataLog,
@@ -653,11 +658,11 @@ def startMatrixWindow(split: bool = True):
     satInitials, satFinals, satData = prepareRateMatrices()
     
     if split:
-        zmax = np.max(radData)
+        zmax = radData.max()
     else:
-        zmax = np.max([np.max(radData), np.max(augData), np.max(satData)])
+        zmax = max([radData.max(), augData.max(), satData.max()])
     
-    fig_rad = go.Heatmap(z=radData,
+    fig_rad = go.Heatmap(z=radData.toarray(),
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
                     x=radFinals,
                     y=radInitials,
@@ -669,9 +674,9 @@ def startMatrixWindow(split: bool = True):
                     )
     
     if split:
-        zmax = np.max(augData)
+        zmax = augData.max()
     
-    fig_aug = go.Heatmap(z=augData,
+    fig_aug = go.Heatmap(z=augData.toarray(),
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
                     x=augFinals,
                     y=augInitials,
@@ -683,9 +688,9 @@ def startMatrixWindow(split: bool = True):
                     )
     
     if split:
-        zmax = np.max(satData)
+        zmax = satData.max()
     
-    fig_sat = go.Heatmap(z=satData,
+    fig_sat = go.Heatmap(z=satData.toarray(),
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
                     x=satFinals,
                     y=satInitials,
@@ -761,14 +766,14 @@ def startMatrixWindow(split: bool = True):
         
         matricesURL = saveMatrixHtml(fig, "rateMatrices.html")
     
-    radDataLog = np.log10(radData)
-    augDataLog = np.log10(augData)
-    satDataLog = np.log10(satData)
+    radDataLog = denseLog10(radData)
+    augDataLog = denseLog10(augData)
+    satDataLog = denseLog10(satData)
     
     if split:
-        zmin = np.min(radDataLog[radDataLog != -np.inf])
+        zmin = minLog10(radData)
     else:
-        zmin = min([np.min(radDataLog[radDataLog != -np.inf]), np.min(augDataLog[augDataLog  != -np.inf]), np.min(satDataLog[satDataLog != -np.inf])])
+        zmin = min([minLog10(radData), minLog10(augData), minLog10(satData)])
     
     fig_rad = go.Heatmap(z=radDataLog,
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
@@ -777,13 +782,13 @@ def startMatrixWindow(split: bool = True):
                     hovertemplate="Initial State: %{y}" + 
                               "<br>Final State: %{x}" + 
                               "<br>Rate: %{text}",
-                    text=radData,
+                    text=radData.toarray(),
                     zmin=zmin,
                     zmax=np.log10(zmax)
                     )
     
     if split:
-        zmin = np.min(augDataLog[augDataLog != -np.inf])
+        zmin = minLog10(augData)
     
     fig_aug = go.Heatmap(z=augDataLog,
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
@@ -792,13 +797,13 @@ def startMatrixWindow(split: bool = True):
                     hovertemplate="Initial State: %{y}" + 
                               "<br>Final State: %{x}" + 
                               "<br>Rate: %{text}",
-                    text=augData,
+                    text=augData.toarray(),
                     zmin=zmin,
                     zmax=np.log10(zmax)
                     )
     
     if split:
-        zmin = np.min(satDataLog[satDataLog != -np.inf])
+        zmin = minLog10(satData)
     
     fig_sat = go.Heatmap(z=satDataLog,
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
@@ -807,7 +812,7 @@ def startMatrixWindow(split: bool = True):
                     hovertemplate="Initial State: %{y}" + 
                               "<br>Final State: %{x}" + 
                               "<br>Rate: %{text}",
-                    text=satData,
+                    text=satData.toarray(),
                     zmin=zmin,
                     zmax=np.log10(zmax)
                     )
@@ -1931,64 +1936,52 @@ def startCascadeAuger():
 
 # Initialize and configure the companion window with the simulations containing only transitions with non converged states and without them
 def startConvergenceWindow(split: bool = True):
-    radInitials, radFinals, radData,\
-    satInitials, satFinals, satData = analyseConvergence()
+    radInitials, radFinals, radUCV, radData,\
+    satInitials, satFinals, satUCV, satData = analyseConvergence()
     
-    radUCV = np.zeros((len(radInitials), len(radFinals)))
     radLevelInfo = [["" for _ in radFinals] for _ in radInitials]
     
-    for i, initial in enumerate(radInitials):
-        for j, final in enumerate(radFinals):
-            key = initial + "->" + final
-            
-            if key in radData:
-                radUCV[i, j] = radData[key]["ucv"]
-                radLevelInfo[i][j] = \
-                "Rate: " + str(radData[key]["rate"]) + \
-                "<br><br>Initial:" + \
-                "<br>Overlap: " + radData[key]["initial"]["overlap"][0] + " " + str(radData[key]["initial"]["overlap"][1]) + \
-                "<br>Percent: " + str(radData[key]["initial"]["percent"]) + \
-                "<br>Accuracy: " + str(radData[key]["initial"]["accuracy"]) + \
-                "<br>Energy Diff: " + str(radData[key]["initial"]["diff"]) + \
-                "<br>UCV: " + str(radData[key]["initial"]["ucv"]) + \
-                "<br><br>Final:" + \
-                "<br>Overlap: " + radData[key]["final"]["overlap"][0] + " " + str(radData[key]["final"]["overlap"][1]) + \
-                "<br>Percent: " + str(radData[key]["final"]["percent"]) + \
-                "<br>Accuracy: " + str(radData[key]["final"]["accuracy"]) + \
-                "<br>Energy Diff: " + str(radData[key]["final"]["diff"]) + \
-                "<br>UCV: " + str(radData[key]["final"]["ucv"])
-    
-    
-    satUCV = np.zeros((len(satInitials), len(satFinals)))
+    for (i, j), data in radData.items():
+        radLevelInfo[i][j] = \
+        "Rate: " + str(data["rate"]) + \
+        "<br><br>Initial:" + \
+        "<br>Overlap: " + data["initial"]["overlap"][0] + " " + str(data["initial"]["overlap"][1]) + \
+        "<br>Percent: " + str(data["initial"]["percent"]) + \
+        "<br>Accuracy: " + str(data["initial"]["accuracy"]) + \
+        "<br>Energy Diff: " + str(data["initial"]["diff"]) + \
+        "<br>UCV: " + str(data["initial"]["ucv"]) + \
+        "<br><br>Final:" + \
+        "<br>Overlap: " + data["final"]["overlap"][0] + " " + str(data["final"]["overlap"][1]) + \
+        "<br>Percent: " + str(data["final"]["percent"]) + \
+        "<br>Accuracy: " + str(data["final"]["accuracy"]) + \
+        "<br>Energy Diff: " + str(data["final"]["diff"]) + \
+        "<br>UCV: " + str(data["final"]["ucv"])
+    
+    
     satLevelInfo = [["" for _ in satFinals] for _ in satInitials]
     
-    for i, initial in enumerate(satInitials):
-        for j, final in enumerate(satFinals):
-            key = initial + "->" + final
-            
-            if key in satData:
-                satUCV[i, j] = satData[key]["ucv"]
-                satLevelInfo[i][j] = \
-                "Rate: " + str(satData[key]["rate"]) + \
-                "<br><br>Initial:" + \
-                "<br>Overlap: " + satData[key]["initial"]["overlap"][0] + " " + str(satData[key]["initial"]["overlap"][1]) + \
-                "<br>Percent: " + str(satData[key]["initial"]["percent"]) + \
-                "<br>Accuracy: " + str(satData[key]["initial"]["accuracy"]) + \
-                "<br>Energy Diff: " + str(satData[key]["initial"]["diff"]) + \
-                "<br>UCV: " + str(satData[key]["initial"]["ucv"]) + \
-                "<br><br>Final:" + \
-                "<br>Overlap: " + satData[key]["final"]["overlap"][0] + " " + str(satData[key]["final"]["overlap"][1]) + \
-                "<br>Percent: " + str(satData[key]["final"]["percent"]) + \
-                "<br>Accuracy: " + str(satData[key]["final"]["accuracy"]) + \
-                "<br>Energy Diff: " + str(satData[key]["final"]["diff"]) + \
-                "<br>UCV: " + str(satData[key]["final"]["ucv"])
+    for (i, j), data in satData.items():
+        satLevelInfo[i][j] = \
+        "Rate: " + str(data["rate"]) + \
+        "<br><br>Initial:" + \
+        "<br>Overlap: " + data["initial"]["overlap"][0] + " " + str(data["initial"]["overlap"][1]) + \
+        "<br>Percent: " + str(data["initial"]["percent"]) + \
+        "<br>Accuracy: " + str(data["initial"]["accuracy"]) + \
+        "<br>Energy Diff: " + str(data["initial"]["diff"]) + \
+        "<br>UCV: " + str(data["initial"]["ucv"]) + \
+        "<br><br>Final:" + \
+        "<br>Overlap: " + data["final"]["overlap"][0] + " " + str(data["final"]["overlap"][1]) + \
+        "<br>Percent: " + str(data["final"]["percent"]) + \
+        "<br>Accuracy: " + str(data["final"]["accuracy"]) + \
+        "<br>Energy Diff: " + str(data["final"]["diff"]) + \
+        "<br>UCV: " + str(data["final"]["ucv"])
 
     if split:
-        zmax = np.max(radUCV)
+        zmax = radUCV.max()
     else:
-        zmax = np.max([np.max(radUCV), np.max(satUCV)])
+        zmax = max([radUCV.max(), satUCV.max()])
     
-    fig_rad = go.Heatmap(z=radUCV,
+    fig_rad = go.Heatmap(z=radUCV.toarray(),
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
                     x=radFinals,
                     y=radInitials,
@@ -2002,9 +1995,9 @@ def startConvergenceWindow(split: bool = True):
                     )
     
     if split:
-        zmax = np.max(satUCV)
+        zmax = satUCV.max()
     
-    fig_sat = go.Heatmap(z=satUCV,
+    fig_sat = go.Heatmap(z=satUCV.toarray(),
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
                     x=satFinals,
                     y=satInitials,
@@ -2065,13 +2058,13 @@ def startConvergenceWindow(split: bool = True):
         
         matricesURL = saveMatrixHtml(fig, "ucvMatrices.html")
     
-    radDataLog = np.log10(radUCV)
-    satDataLog = np.log10(satUCV)
+    radDataLog = denseLog10(radUCV)
+    satDataLog = denseLog10(satUCV)
     
     if split:
-        zmin = np.min(radDataLog[radDataLog != -np.inf])
+        zmin = minLog10(radUCV)
     else:
-        zmin = min([np.min(radDataLog[radDataLog != -np.inf]), np.min(satDataLog[satDataLog != -np.inf])])
+        zmin = min([minLog10(radUCV), minLog10(satUCV)])
     
     fig_rad = go.Heatmap(z=radDataLog,
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
@@ -2082,13 +2075,13 @@ def startConvergenceWindow(split: bool = True):
                               "<br>UCV: %{text}" + 
                               "<br>%{customdata}",
                     customdata = radLevelInfo,
-                    text=radUCV,
+                    text=radUCV.toarray(),
                     zmin=zmin,
                     zmax=np.log10(zmax)
                     )
     
     if split:
-        zmin = np.min(satDataLog[satDataLog != -np.inf])
+        zmin = minLog10(satUCV)
     
     fig_sat = go.Heatmap(z=satDataLog,
                     #labels=dict(x="Final State", y="Initial State", color="Rate(s-1)"),
@@ -2099,7 +2092,7 @@ def startConvergenceWindow(split: bool = True):
                               "<br>UCV: %{text}" + 
                               "<br>%{customdata}",
                     customdata = satLevelInfo,
-                    text=satUCV,
+                    text=satUCV.toarray(),
                     zmin=zmin,
                     zmax=np.log10(zmax)
                     )
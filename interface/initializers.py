@@ -283,6 +283,8 @@ def setupVars(p: Tk):
     guiVars.fit_shake_prob = BooleanVar(value=False)
     # Initialize the 2J colors flag as false
     guiVars.JJ_colors = BooleanVar(value=False)
+    # Initialize the single precision flag as false
+    guiVars.single_precision = BooleanVar(value=False)
  
 # Setup the buttons in the button area
 def setupButtonArea(dir_path: Path, buttons_frame: Frame, buttons_frame2: Frame, buttons_frame3: Frame, buttons_frame4: Frame, excitation: bool = False, quantify: bool = False):
@@ -475,6 +477,8 @@ def setupMenus(root: Tk, CS_exists: bool, Exc_exists: bool, quantify: bool = Fal
         # Add the Line type dropdown menu and the buttons bound to the corresponding variables and functions
         my_menu.add_cascade(label="Line Type", menu=line_type_menu)
         line_type_menu.add_checkbutton(label='Voigt', variable=guiVars.type_var, onvalue='Voigt', offvalue='') # type: ignore
+        line_type_menu.add_checkbutton(label='Voigt (Humlicek)', variable=guiVars.type_var, onvalue='Voigt (Humlicek)', offvalue='') # type: ignore
+        line_type_menu.add_checkbutton(label='Pseudo-Voigt', variable=guiVars.type_var, onvalue='Pseudo-Voigt', offvalue='') # type: ignore
         line_type_menu.add_checkbutton(label='Lorentzian', variable=guiVars.type_var, onvalue='Lorentzian', offvalue='') # type: ignore
         line_type_menu.add_checkbutton(label='Gaussian', variable=guiVars.type_var, onvalue='Gaussian', offvalue='') # type: ignore
     
@@ -485,6 +489,7 @@ def setupMenus(root: Tk, CS_exists: bool, Exc_exists: bool, quantify: bool = Fal
     fitting_method.add_checkbutton(label='LMFit', variable=guiVars.autofitvar, onvalue='LMFit', offvalue='No') # type: ignore
     fitting_method.add_checkbutton(label='iminuit', variable=guiVars.autofitvar, onvalue='iminuit', offvalue='No') # type: ignore
     fitting_menu.add_command(label='Aditional Fitting Options', command=lambda: fitOptionsWindow())
+    fitting_menu.add_checkbutton(label='Single Precision (float32)', variable=guiVars.single_precision, onvalue=True, offvalue=False) # type: ignore
     
     if not quantify:
         # ---------------------------------------------------------------------------------------------------------------
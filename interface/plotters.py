@@ -233,7 +233,7 @@ def simu_plot(sat: str, graph_area: Axes | None, normalization_var: float, y0: f
         totalShakeupInt_2p = []
         for index, key in enumerate(generalVars.the_dictionary):
             if generalVars.the_dictionary[key]["selected_state"]:
-                for l, m in enumerate(generalVars.yfinals[index]):
+                for l, m in generalVars.yfinals.components(index):
                     # Dont plot the satellites that have a max y value of 0
                     if max(m) != 0:
                         label = str(generalVars.the_dictionary[key]["latex_name"])
@@ -249,9 +249,9 @@ def simu_plot(sat: str, graph_area: Axes | None, normalization_var: float, y0: f
                             # Plot the selected transition
                             if graph_area:
                                 if l < len(generalVars.label1):
-                                    graph_area.plot(generalVars.xfinal, (np.array(generalVars.yfinals[index][l]) * normalization_var) + y0, label=label + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
+                                    graph_area.plot(generalVars.xfinal, (np.array(m) * normalization_var) + y0, label=label + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
                                 else:
-                                    graph_area.plot(generalVars.xfinal, (np.array(generalVars.yfinals[index][l]) * normalization_var) + y0, label=label + ' - ' + generalVars.labeldict[generalVars.label1[l - len(generalVars.label1)]] + ' - shake-up', gid=key + ' - ' + generalVars.labeldict[generalVars.label1[l - len(generalVars.label1)]] + ' - shake-up', color=select_color())  # Plot the simulation of all lines
+                                    graph_area.plot(generalVars.xfinal, (np.array(m) * normalization_var) + y0, label=label + ' - ' + generalVars.labeldict[generalVars.label1[l - len(generalVars.label1)]] + ' - shake-up', gid=key + ' - ' + generalVars.labeldict[generalVars.label1[l - len(generalVars.label1)]] + ' - shake-up', color=select_color())  # Plot the simulation of all lines
         shkoff = '; '.join([key + ": " + str(totalShakeoffInt[key]) for key in totalShakeoffInt])
         shkup = '; '.join([key + ": " + str(totalShakeupInt[key]) for key in totalShakeupInt])
         print(str(exc_energ) + "; " + str(sum(totalDiagInt)) + "; " + shkoff + "; " + shkup) # type: ignore
@@ -350,17 +350,17 @@ def Esimu_plot(exc: List[str], sat: str, graph_area: Axes | None,
         for exc_index, exc_orb in enumerate(exc):
             for index, key in enumerate(generalVars.the_dictionary):
                 if generalVars.the_dictionary[key]["selected_state"]:
-                    for l, m in enumerate(generalVars.yfinals_exc[exc_index * len(generalVars.the_dictionary) + index]):
+                    for l, m in generalVars.yfinals_exc.components(exc_index * len(generalVars.the_dictionary) + index):
                         # Dont plot the satellites that have a max y value of 0
                         if max(m) != 0:
                             label = str(generalVars.the_dictionary[key]["latex_name"])
-                            totalSatInt[exc_orb + " " + label + " - " + generalVars.labeldict[generalVars.label1[l]]] = sum(generalVars.yfinals_exc[exc_index * len(generalVars.the_dictionary) + index][l])
+                            totalSatInt[exc_orb + " " + label + " - " + generalVars.labeldict[generalVars.label1[l]]] = sum(m)
                             if plotSimu:
                                 # Plot the selected transition
                                 label = str(generalVars.the_dictionary[key]["latex_name"])
-                                # graph_area.plot(generalVars.xfinal, (np.array(generalVars.yfinals_exc[exc_index * len(generalVars.the_dictionary) + index][l]) * normalization_var) + y0, label=exc_orb + ' ' + label + ' - ' + generalVars.labeldict[generalVars.label1_exc[exc_index][l]], gid=exc_orb + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1_exc[exc_index][l]], color=select_color())  # Plot the simulation of all lines
+                                # graph_area.plot(generalVars.xfinal, (np.array(m) * normalization_var) + y0, label=exc_orb + ' ' + label + ' - ' + generalVars.labeldict[generalVars.label1_exc[exc_index][l]], gid=exc_orb + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1_exc[exc_index][l]], color=select_color())  # Plot the simulation of all lines
                                 if graph_area:
-                                    graph_area.plot(generalVars.xfinal, (np.array(generalVars.yfinals_exc[exc_index * len(generalVars.the_dictionary) + index][l]) * normalization_var) + y0, label=exc_orb + ' ' + label + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=exc_orb + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
+                                    graph_area.plot(generalVars.xfinal, (np.array(m) * normalization_var) + y0, label=exc_orb + ' ' + label + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=exc_orb + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
     diags = '; '.join([key + ": " + str(totalDiagInt[key]) for key in totalDiagInt])
     sats = '; '.join([key + ": " + str(totalSatInt[key]) for key in totalSatInt])
     print(str(exc_energ) + "; " + diags + "; " + sats) # type: ignore
@@ -448,11 +448,11 @@ def Msimu_plot(ploted_cs: List[str], sat: str, graph_area: Axes,
         for cs_index, cs in enumerate(ploted_cs):
             for index, key in enumerate(generalVars.the_dictionary):
                 if generalVars.the_dictionary[key]["selected_state"]:
-                    for l, m in enumerate(generalVars.yfinals[cs_index * len(generalVars.the_dictionary) + index]):
+                    for l, m in generalVars.yfinals.components(cs_index * len(generalVars.the_dictionary) + index):
                         # Dont plot the satellites that have a max y value of 0
                         if max(m) != 0:
                             # Plot the selected transition
-                            graph_area.plot(generalVars.xfinal, (np.array(generalVars.yfinals[cs_index * len(generalVars.the_dictionary) + index][l]) * normalization_var) + y0, label=cs + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=cs + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
+                            graph_area.plot(generalVars.xfinal, (np.array(m) * normalization_var) + y0, label=cs + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=cs + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
                             graph_area.legend()
     if sat == 'Auger':
         for cs_index, cs in enumerate(ploted_cs):
@@ -534,14 +534,14 @@ def Qsimu_plot(elementList: List[str], sat: str, graph_area: Axes | None,
         for index, key in enumerate(generalVars.the_dictionary):
             for el_index, el in enumerate(elementList):
                 if generalVars.the_dictionary[key]["selected_state"]:
-                    for l, m in enumerate(generalVars.yfinals[el_index * len(generalVars.the_dictionary) + index]):
+                    for l, m in generalVars.yfinals.components(el_index * len(generalVars.the_dictionary) + index):
                         # Dont plot the satellites that have a max y value of 0
                         if max(m) != 0:
                             # Plot the selected transition
                             if plotSimu:
                                 label = str(generalVars.the_dictionary[key]["latex_name"])
                                 if graph_area:
-                                    graph_area.plot(generalVars.xfinal, (np.array(generalVars.yfinals[el_index * len(generalVars.the_dictionary) + index][l]) * normalization_var + to_add) + y0, label=el[1] + ' ' + label + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=el[1] + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
+                                    graph_area.plot(generalVars.xfinal, (np.array(m) * normalization_var + to_add) + y0, label=el[1] + ' ' + label + ' - ' + generalVars.labeldict[generalVars.label1[l]], gid=el[1] + ' ' + key + ' - ' + generalVars.labeldict[generalVars.label1[l]], color=select_color())  # Plot the simulation of all lines
     if sat == 'Auger':
         for index, key in enumerate(generalVars.the_aug_dictionary):
             for el_index, el in enumerate(elementList):
@@ -172,6 +172,11 @@ JJ_colors = None
 """
 Variable to hold the flag to plot each 2J stick with a seperate color or not in the simulation
 """
+# Variable to hold the flag to run the simulation and fitting in single precision
+single_precision = None
+"""
+Variable to hold the flag to run the profile kernels and intensity buffers in single precision (float32)
+"""
 # Variable to hold the number of points introduced by the user in the interface, to calculate the energy grid where we simulate the spectrum
 number_points = None
 """
@@ -0,0 +1,268 @@
+"""
+Module with functions to evaluate the line profiles of many transitions at once
+"""
+
+from __future__ import annotations
+
+import data.variables as generalVars
+
+from simulation.profiles import profile_support
+
+from typing import Callable, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+maxBlockSize: int = 2 ** 22
+"""
+Maximum number of profile values (lines x grid points) evaluated in a single broadcast block
+"""
+
+# --------------------------------------------------------- #
+#                                                           #
+#           FUNCTIONS TO FLATTEN THE LINE DATA              #
+#                                                           #
+# --------------------------------------------------------- #
+
+# Flatten the diagram line data into contiguous arrays with the transition index of each line
+def flatten_diagram_lines(x: List[List[float]], y: List[List[float]], w: List[List[float]],
+                          enoffset: float) -> \
+                            Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64],
+                                  npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """
+    Function to flatten the diagram line data into contiguous arrays, keeping track of the transition each line belongs to.
+    The intensities are already weighted by the element and transition weight fractions.
+
+        Args:
+            x: energy values for each diagram transition to simulate
+            y: intensity values for each diagram transition to simulate
+            w: natural width values for each diagram transition to simulate
+            enoffset: energy offset to simulate
+
+        Returns:
+            energies: shifted energy of each line
+            intensities: weighted intensity of each line
+            widths: natural width of each line
+            segments: index of the transition (row of yfinal) for each line
+    """
+    energies: List[float] = []
+    intensities: List[float] = []
+    widths: List[float] = []
+    segments: List[int] = []
+
+    for j, k in enumerate(y):
+        el_idx: int = j // len(generalVars.the_dictionary)
+        tr_idx: int = j % len(generalVars.the_dictionary)
+        weight: float = generalVars.weightFractions[el_idx][tr_idx]
+
+        for i in range(len(k)):
+            energies.append(x[j][i] + enoffset)
+            intensities.append(y[j][i] * weight)
+            widths.append(w[j][i])
+            segments.append(j)
+
+    return np.array(energies, dtype=generalVars.computeDtype), np.array(intensities, dtype=generalVars.computeDtype), \
+            np.array(widths, dtype=generalVars.computeDtype), np.array(segments, dtype=np.int64)
+
+# Flatten the satellite line data into contiguous arrays with the (transition, shake label) index of each line
+def flatten_satellite_lines(xs: List[List[List[float]]], ys: List[List[List[float]]], ws: List[List[List[float]]],
+                            enoffset: float, sat_enoffset: float, shkoff_enoffset: float, shkup_enoffset: float,
+                            sep: bool) -> \
+                                Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64],
+                                      npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """
+    Function to flatten the satellite line data into contiguous arrays, keeping track of the transition and shake label each line belongs to.
+    The segment index of each line is the flat index (transition * 2 * len(label1) + shake label) of its satellite component.
+
+        Args:
+            xs: energy values for each satellite transition in each radiative transition to simulate
+            ys: intensity values for each satellite transition in each radiative transition to simulate
+            ws: natural width values for each satellite transition in each radiative transition to simulate
+            enoffset: energy offset to simulate
+            sat_enoffset: satellite energy offset to simulate
+            shkoff_enoffset: shake-off energy offset to simulate
+            shkup_enoffset: shake-up energy offset to simulate
+            sep: if the shake-off and shake-up offsets are applied separately
+
+        Returns:
+            energies: shifted energy of each line
+            intensities: weighted intensity of each line
+            widths: natural width of each line
+            segments: index of the (transition, shake label) pair for each line
+    """
+    energies: List[float] = []
+    intensities: List[float] = []
+    widths: List[float] = []
+    segments: List[int] = []
+
+    slots: int = 2 * len(generalVars.label1)
+
+    for j, k in enumerate(ys):
+        el_idx: int = j // len(generalVars.the_dictionary)
+        tr_idx: int = j % len(generalVars.the_dictionary)
+        weight: float = generalVars.weightFractions[el_idx][tr_idx]
+
+        for l, m in enumerate(k):
+            for i in range(len(m)):
+                if sep:
+                    if l < len(generalVars.label1):
+                        energies.append(xs[j][l][i] + enoffset + shkoff_enoffset)
+                    else:
+                        energies.append(xs[j][l][i] + enoffset + shkup_enoffset)
+                else:
+                    energies.append(xs[j][l][i] + enoffset + sat_enoffset)
+
+                intensities.append(ys[j][l][i] * weight)
+                widths.append(ws[j][l][i])
+                segments.append(j * slots + l)
+
+    return np.array(energies, dtype=generalVars.computeDtype), np.array(intensities, dtype=generalVars.computeDtype), \
+            np.array(widths, dtype=generalVars.computeDtype), np.array(segments, dtype=np.int64)
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#              BATCHED PROFILE ACCUMULATION                 #
+#                                                           #
+# --------------------------------------------------------- #
+
+# Evaluate the profile of all lines in broadcast blocks and accumulate them into their segment rows
+def batch_profile_sum(profile: Callable, xfinal: npt.NDArray[np.float64],
+                      energies: npt.NDArray[np.float64], intensities: npt.NDArray[np.float64],
+                      res: float, widths: npt.NDArray[np.float64], segments: npt.NDArray[np.int64],
+                      out: npt.NDArray[np.float64], progress: Callable[[float], None] | None = None) -> \
+                        npt.NDArray[np.float64]:
+    """
+    Function to evaluate the profile of all lines in broadcast blocks and accumulate each line into the row of its segment.
+    The lines are added to their rows in the same order as they are flattened, so the sums match a line by line accumulation.
+
+        Args:
+            profile: profile function (G, L or V) to evaluate
+            xfinal: simulated x values
+            energies: shifted energy of each line
+            intensities: weighted intensity of each line
+            res: experimental resolution to simulate
+            widths: natural width of each line
+            segments: index of the output row for each line
+            out: 2D array where the profiles are accumulated, one row per segment
+            progress: optional function called with the fraction of lines already evaluated
+
+        Returns:
+            out: the same output array with the accumulated profiles
+    """
+    num_lines: int = len(energies)
+    if num_lines == 0:
+        return out
+
+    # Only evaluate the profiles near their centers when a window was configured and the grid can be searched
+    if generalVars.profileWindow > 0 and np.all(np.diff(xfinal) >= 0):
+        return windowed_profile_sum(profile, xfinal, energies, intensities, res, widths, segments, out, progress)
+
+    block: int = max(1, maxBlockSize // max(1, len(xfinal)))
+    grid: npt.NDArray[np.float64] = np.asarray(xfinal, dtype=generalVars.computeDtype)[np.newaxis, :]
+    # A float64 resolution (e.g. from the fit parameters) would promote the single precision profiles
+    res = generalVars.computeDtype(res)
+
+    for start in range(0, num_lines, block):
+        stop: int = min(start + block, num_lines)
+
+        values = profile(grid,
+                         energies[start:stop, np.newaxis],
+                         intensities[start:stop, np.newaxis],
+                         res,
+                         widths[start:stop, np.newaxis])
+
+        np.add.at(out, segments[start:stop], values)
+
+        if progress:
+            progress(stop / num_lines)
+
+    return out
+
+# Build the flat (owner, index) pairs for a set of index ranges
+def ragged_indices(starts: npt.NDArray[np.int64], stops: npt.NDArray[np.int64]) -> \
+                    Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Function to expand a set of index ranges [start, stop) into flat arrays of owner and index values.
+
+        Args:
+            starts: first index of each range
+            stops: index after the last index of each range
+
+        Returns:
+            owners: index of the range each flat value belongs to
+            indexes: the flat index values of all ranges
+    """
+    counts: npt.NDArray[np.int64] = np.maximum(stops - starts, 0)
+    owners: npt.NDArray[np.int64] = np.repeat(np.arange(len(starts)), counts)
+    offsets: npt.NDArray[np.int64] = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    return owners, np.repeat(starts, counts) + offsets
+
+# Evaluate the profile of all lines only near their centers and accumulate them into their segment rows
+def windowed_profile_sum(profile: Callable, xfinal: npt.NDArray[np.float64],
+                         energies: npt.NDArray[np.float64], intensities: npt.NDArray[np.float64],
+                         res: float, widths: npt.NDArray[np.float64], segments: npt.NDArray[np.int64],
+                         out: npt.NDArray[np.float64], progress: Callable[[float], None] | None = None) -> \
+                            npt.NDArray[np.float64]:
+    """
+    Function to evaluate the profile of all lines only on the grid points near their centers.
+    The core of each profile spans at least generalVars.profileWindow widths and is evaluated exactly, while the voigt
+    tails are evaluated analytically until they fall below generalVars.profileTolerance times the peak of the line.
+    The grid points of each region are found by a binary search on the sorted xfinal.
+
+        Args:
+            profile: profile function (G, L or V) to evaluate
+            xfinal: simulated x values (sorted)
+            energies: shifted energy of each line
+            intensities: weighted intensity of each line
+            res: experimental resolution to simulate
+            widths: natural width of each line
+            segments: index of the output row for each line
+            out: 2D array where the profiles are accumulated, one row per segment
+            progress: optional function called with the fraction of lines already evaluated
+
+        Returns:
+            out: the same output array with the accumulated profiles
+    """
+    grid: npt.NDArray[np.float64] = np.asarray(xfinal, dtype=generalVars.computeDtype)
+    num_lines: int = len(energies)
+    # A float64 resolution (e.g. from the fit parameters) would promote the single precision profiles
+    res = generalVars.computeDtype(res)
+
+    core, tail_coeff, tail = profile_support(profile, intensities, res, widths,
+                                             generalVars.profileWindow, generalVars.profileTolerance)
+
+    core_lo: npt.NDArray[np.int64] = np.searchsorted(grid, energies - core, side='left')
+    core_hi: npt.NDArray[np.int64] = np.searchsorted(grid, energies + core, side='right')
+    tail_lo: npt.NDArray[np.int64] = np.searchsorted(grid, energies - tail, side='left')
+    tail_hi: npt.NDArray[np.int64] = np.searchsorted(grid, energies + tail, side='right')
+
+    # Split the lines in blocks with a bounded number of evaluated points
+    points: npt.NDArray[np.int64] = np.cumsum(tail_hi - tail_lo)
+    start: int = 0
+    while start < num_lines:
+        done: int = points[start - 1] if start > 0 else 0
+        stop: int = max(start + 1, int(np.searchsorted(points, done + maxBlockSize, side='right')))
+        stop = min(stop, num_lines)
+
+        # Exact profile inside the core
+        owners, indexes = ragged_indices(core_lo[start:stop], core_hi[start:stop])
+        owners += start
+        values = profile(grid[indexes], energies[owners], intensities[owners], res, widths[owners])
+        np.add.at(out, (segments[owners], indexes), values)
+
+        # Analytic tails on both sides of the core
+        for lo, hi in ((tail_lo, core_lo), (core_hi, tail_hi)):
+            owners, indexes = ragged_indices(lo[start:stop], hi[start:stop])
+            owners += start
+            values = tail_coeff[owners] / (grid[indexes] - energies[owners]) ** 2
+            np.add.at(out, (segments[owners], indexes), values)
+
+        start = stop
+
+        if progress:
+            progress(stop / num_lines)
+
+    return out
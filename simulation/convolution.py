@@ -0,0 +1,222 @@
+"""
+Module with functions to apply the experimental resolution as a convolution of the natural width spectrum
+"""
+
+from __future__ import annotations
+
+import data.variables as generalVars
+
+from simulation.batch import batch_profile_sum
+from simulation.profiles import L
+
+from typing import Callable, Dict, Tuple
+
+import hashlib
+
+import numpy as np
+import numpy.typing as npt
+
+from scipy.signal import fftconvolve
+
+
+naturalCacheSize: int = 8
+"""
+Maximum number of natural width spectra kept in the cache
+"""
+naturalCache: Dict[Tuple, npt.NDArray[np.float64]] = {}
+"""
+Cache of the natural width spectra, keyed by the uniform grid and a digest of the line data used to build them
+"""
+resolvedWidth: float = 4.0
+"""
+Minimum natural width, in grid spacings, of the lines added to the natural width spectrum.
+Narrower lorentzians can not be sampled on the grid without changing their area, so they are evaluated directly
+"""
+kernelCacheSize: int = 8
+"""
+Maximum number of resolution kernels kept in the cache
+"""
+kernelCache: Dict[Tuple, npt.NDArray[np.float64]] = {}
+"""
+Cache of the resolution gaussian kernels, keyed by the resolution and the grid spacing and length
+"""
+
+# --------------------------------------------------------- #
+#                                                           #
+#             NATURAL WIDTH SPECTRUM FUNCTIONS              #
+#                                                           #
+# --------------------------------------------------------- #
+
+# Build a uniform grid that covers the simulated x values
+def uniform_grid(xfinal: npt.NDArray[np.float64]) -> Tuple[npt.NDArray[np.float64], int, bool]:
+    """
+    Function to build the uniform grid where the natural width spectrum is convolved.
+    The grid has the same spacing as the simulated x values and is padded by a quarter of the points on each side,
+    so that the lines just outside the simulated range still spread into it.
+
+        Args:
+            xfinal: simulated x values
+
+        Returns:
+            grid: uniform grid of x values
+            pad: number of padding points on each side of the grid
+            uniform: if the simulated x values are already uniform, in which case they are a slice of the grid
+    """
+    num_points: int = len(xfinal)
+    x_min: float = float(np.min(xfinal))
+    x_max: float = float(np.max(xfinal))
+    dx: float = (x_max - x_min) / (num_points - 1)
+
+    uniform: bool = bool(np.allclose(np.diff(xfinal), dx, rtol=1e-9, atol=0.0))
+    pad: int = num_points // 4
+
+    grid: npt.NDArray[np.float64] = x_min + dx * np.arange(-pad, num_points + pad)
+
+    return grid, pad, uniform
+
+# Sum the natural width profiles of all lines on the uniform grid
+def natural_spectrum(grid: npt.NDArray[np.float64], energies: npt.NDArray[np.float64],
+                     intensities: npt.NDArray[np.float64], widths: npt.NDArray[np.float64],
+                     segments: npt.NDArray[np.int64], rows: int) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the natural width spectrum of each segment on the uniform grid.
+    Lines with a natural width are added as lorentzians, while lines without width are binned as sticks preserving their area.
+    The result is cached so it can be reused when only the experimental resolution changes.
+
+        Args:
+            grid: uniform grid of x values
+            energies: shifted energy of each line
+            intensities: weighted intensity of each line
+            widths: natural width of each line
+            segments: index of the output row for each line
+            rows: number of output rows
+
+        Returns:
+            natural: 2D array with the natural width spectrum of each segment
+    """
+    # Strong digest of the line data, so different lines can not share a cache entry
+    digest = hashlib.blake2b(digest_size=32)
+    for values in (energies, intensities, widths, segments):
+        digest.update(np.ascontiguousarray(values).tobytes())
+    
+    key = (grid[0], grid[-1], len(grid), rows, generalVars.computeDtype, digest.digest())
+
+    if key in naturalCache:
+        return naturalCache[key]
+
+    natural: npt.NDArray[np.float64] = np.zeros((rows, len(grid)), dtype=generalVars.computeDtype)
+
+    lorentz = widths > 0
+    batch_profile_sum(L, grid, energies[lorentz], intensities[lorentz], 0.0, widths[lorentz], segments[lorentz], natural)
+
+    # Bin the sticks into the two closest grid points
+    dx: float = grid[1] - grid[0]
+    pos: npt.NDArray[np.float64] = (energies[~lorentz] - grid[0]) / dx
+    low: npt.NDArray[np.int64] = np.floor(pos).astype(np.int64)
+    frac: npt.NDArray[np.float64] = pos - low
+    for idx, weight in ((low, 1 - frac), (low + 1, frac)):
+        inside = (idx >= 0) & (idx < len(grid))
+        np.add.at(natural, (segments[~lorentz][inside], idx[inside]), intensities[~lorentz][inside] * weight[inside] / dx)
+
+    if len(naturalCache) >= naturalCacheSize:
+        del naturalCache[next(iter(naturalCache))]
+    naturalCache[key] = natural
+
+    return natural
+
+
+# Build the resolution gaussian kernel for the uniform grid
+def resolution_kernel(res: float, dx: float, num_points: int) -> npt.NDArray[np.float64]:
+    """
+    Function to build the gaussian kernel of the experimental resolution, normalized to unit area on the grid.
+    The kernel only depends on the resolution and the grid, so it is cached and reused for any line data.
+
+        Args:
+            res: experimental resolution to simulate
+            dx: spacing of the uniform grid
+            num_points: number of points in the uniform grid
+
+        Returns:
+            kernel: gaussian kernel values on the grid spacing, centered in the middle point
+    """
+    key = (res, dx, num_points, generalVars.computeDtype)
+
+    if key in kernelCache:
+        return kernelCache[key]
+
+    sigma: float = res / np.sqrt(2 * np.log(2))
+    half: int = min(int(np.ceil(6 * sigma / dx)), num_points)
+    kernel: npt.NDArray[np.float64] = np.exp(-0.5 * (np.arange(-half, half + 1) * dx / sigma) ** 2)
+    kernel = (kernel / kernel.sum()).astype(generalVars.computeDtype)
+
+    if len(kernelCache) >= kernelCacheSize:
+        del kernelCache[next(iter(kernelCache))]
+    kernelCache[key] = kernel
+
+    return kernel
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#               RESOLUTION CONVOLUTION BACKEND              #
+#                                                           #
+# --------------------------------------------------------- #
+
+# Evaluate the voigt profiles of all lines as a convolution of their natural width spectrum with the resolution gaussian
+def fft_profile_sum(profile: Callable, xfinal: npt.NDArray[np.float64],
+                    energies: npt.NDArray[np.float64], intensities: npt.NDArray[np.float64],
+                    res: float, widths: npt.NDArray[np.float64], segments: npt.NDArray[np.int64],
+                    out: npt.NDArray[np.float64], progress: Callable[[float], None] | None = None) -> \
+                        npt.NDArray[np.float64]:
+    """
+    Function to calculate the voigt profiles of all lines by convolving the natural width spectrum of each segment with
+    the experimental resolution gaussian, using a single FFT convolution per call.
+    Lines with natural widths below resolvedWidth grid spacings are evaluated with the direct profile, as their lorentzians
+    can not be sampled on the grid.
+    This has the same arguments as batch_profile_sum so both backends can be used interchangeably in the y_calculator.
+
+        Args:
+            profile: profile function selected (only the voigt profile is a convolution of the natural width with the resolution)
+            xfinal: simulated x values
+            energies: shifted energy of each line
+            intensities: weighted intensity of each line
+            res: experimental resolution to simulate
+            widths: natural width of each line
+            segments: index of the output row for each line
+            out: 2D array where the profiles are accumulated, one row per segment
+            progress: optional function called with the fraction of lines already evaluated
+
+        Returns:
+            out: the same output array with the accumulated profiles
+    """
+    if len(energies) == 0 or len(xfinal) < 2:
+        return batch_profile_sum(profile, xfinal, energies, intensities, res, widths, segments, out, progress)
+
+    grid, pad, uniform = uniform_grid(xfinal)
+    dx: float = float(grid[1] - grid[0])
+
+    if res > 0:
+        # The lines with natural widths the grid can not resolve are evaluated with the direct profile instead
+        direct = (widths > 0) & (widths < resolvedWidth * dx)
+        if np.any(direct):
+            batch_profile_sum(profile, xfinal, energies[direct], intensities[direct], res, widths[direct], segments[direct], out)
+            energies, intensities, widths, segments = energies[~direct], intensities[~direct], widths[~direct], segments[~direct]
+
+    natural = natural_spectrum(grid, energies, intensities, widths, segments, out.shape[0])
+
+    if res > 0:
+        kernel = resolution_kernel(res, dx, len(grid))
+        spectrum: npt.NDArray[np.float64] = fftconvolve(natural, kernel[np.newaxis, :], mode='same', axes=1)
+    else:
+        spectrum = natural
+
+    if uniform:
+        out += spectrum[:, pad:pad + len(xfinal)]
+    else:
+        for row in range(out.shape[0]):
+            out[row] += np.interp(xfinal, grid, spectrum[row])
+
+    if progress:
+        progress(1.0)
+
+    return out
@@ -0,0 +1,117 @@
+"""
+Module with the experimental spectrum data prepared once for the function evaluations of the fitting
+"""
+
+from __future__ import annotations
+
+from scipy.interpolate import interp1d
+
+from typing import List, Tuple
+import numpy as np
+import numpy.typing as npt
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#               EXPERIMENTAL SPECTRUM CONTEXT               #
+#                                                           #
+# --------------------------------------------------------- #
+
+class FitContext():
+    """
+    Class to hold the experimental spectrum data used in the residuals of the fitting.
+    The experimental interpolant, limits and maximum are calculated once per fit, and the experimental
+    values on the simulation grid are kept until the grid (or the quantification bounds) change.
+    """
+    def __init__(self, exp_x: List[float] | npt.NDArray[np.float64], exp_y: List[float] | npt.NDArray[np.float64]):
+        """
+        Args:
+            exp_x: energy values of the experimental spectrum
+            exp_y: intensity values of the experimental spectrum
+        """
+        self.exp_x: npt.NDArray[np.float64] = np.asarray(exp_x, dtype=np.float64)
+        """
+        Energy values of the experimental spectrum
+        """
+        self.exp_y: npt.NDArray[np.float64] = np.asarray(exp_y, dtype=np.float64)
+        """
+        Intensity values of the experimental spectrum
+        """
+        self.expMin: float = float(np.min(self.exp_x))
+        """
+        Minimum energy of the experimental spectrum
+        """
+        self.expMax: float = float(np.max(self.exp_x))
+        """
+        Maximum energy of the experimental spectrum
+        """
+        self.expYMax: float = float(np.max(self.exp_y))
+        """
+        Maximum intensity of the experimental spectrum
+        """
+        self.spline = interp1d(self.exp_x, self.exp_y, kind='cubic')
+        """
+        Cubic interpolant of the experimental spectrum
+        """
+        
+        self.grid: npt.NDArray[np.float64] | None = None
+        """
+        Simulation grid of the current experimental values
+        """
+        self.bounds: List[Tuple[float, float]] | None = None
+        """
+        Quantification bounds of the current experimental values
+        """
+        self.gridMask: npt.NDArray[np.bool_] = np.array([], dtype=np.bool_)
+        """
+        Mask of the simulation grid points inside the experimental spectrum (and the quantification bounds)
+        """
+        self.gridExp: npt.NDArray[np.float64] = np.array([])
+        """
+        Experimental values interpolated at the masked simulation grid points
+        """
+    
+    def gridValues(self, xfinal: List[float] | npt.NDArray[np.float64],
+                   bounds: List[Tuple[float, float]] | None = None) -> Tuple[npt.NDArray[np.bool_], npt.NDArray[np.float64]]:
+        """
+        Function to get the experimental values on the simulation grid, interpolating them only when the grid changes
+            
+            Args:
+                xfinal: energy values of the simulation grid
+                bounds: quantification bounds to restrict the grid to, or None to use the full experimental spectrum
+            
+            Returns:
+                gridMask: mask of the grid points inside the experimental spectrum (and the bounds)
+                gridExp: experimental values at the masked grid points, capped at the experimental maximum to prevent interpolation overshoots
+        """
+        xfinal = np.asarray(xfinal, dtype=np.float64)
+        
+        if self.grid is None or bounds != self.bounds or not np.array_equal(xfinal, self.grid):
+            mask = (xfinal > self.expMin) & (xfinal < self.expMax)
+            if bounds is not None:
+                inBounds = np.zeros(len(xfinal), dtype=np.bool_)
+                for bound in bounds:
+                    inBounds |= (xfinal >= bound[0]) & (xfinal <= bound[1])
+                
+                mask &= inBounds
+            
+            self.grid = xfinal.copy()
+            self.bounds = None if bounds is None else list(bounds)
+            self.gridMask = mask
+            self.gridExp = np.minimum(self.spline(xfinal[mask]), self.expYMax)
+        
+        return self.gridMask, self.gridExp
+    
+    def expMask(self, xfinal: List[float] | npt.NDArray[np.float64]) -> npt.NDArray[np.bool_]:
+        """
+        Function to get the mask of the experimental points inside the simulation grid
+            
+            Args:
+                xfinal: energy values of the simulation grid
+            
+            Returns:
+                mask of the experimental points strictly inside the grid limits
+        """
+        xfinal = np.asarray(xfinal, dtype=np.float64)
+        
+        return (self.exp_x > np.min(xfinal)) & (self.exp_x < np.max(xfinal))
@@ -15,6 +15,8 @@ from simulation.preprocessors import process_simulation, process_Msimulation
 import simulation.shake as shakes
 
 from simulation.ycalc import y_calculator, normalizer, add_fitting_components, add_baseline
+from simulation.workspace import Workspace
+from simulation.fitcontext import FitContext
 
 from simulation.bounds import calculate_xfinal, mergeXFinals
 
@@ -52,6 +54,16 @@ totalEvals = 0
 Variable to track the total function evaluations during the fitting
 """
 
+# Intensity buffers reused across the function evaluations during the fitting
+fitWorkspace = Workspace()
+"""
+Intensity buffers reused by the y_calculator across the function evaluations of the fitting
+"""
+fitWorkspace_exc = Workspace()
+"""
+Intensity buffers reused by the y_calculator across the function evaluations of the fitting, for the excitation transitions
+"""
+
 # Maximum total shake that sould be considered during the fitting process
 maxTotalShake = 0.6
 """
@@ -642,7 +654,7 @@ def func2min(params: Parameters, sim: Toplevel | None,
              energy_values: List[float], efficiency_values: List[float], baseline: bool = False,
              xe: List[List[float]] = [], ye: List[List[float]] = [], we: List[List[float]] = [],
              xse: List[List[List[float]]] = [], yse: List[List[List[float]]] = [],
-             wse: List[List[List[float]]] = []):
+             wse: List[List[List[float]]] = [], context: FitContext | None = None):
     """
     Function to be minimized in the fitting
         
@@ -662,6 +674,7 @@ def func2min(params: Parameters, sim: Toplevel | None,
             ws: natural width values for each satellite transition in each radiative transition to simulate
             energy_values: energy values read from the detector efficiency data
             efficiency_values: efficiency values read from the detector efficiency data
+            context: experimental spectrum data prepared for the fit, built from exp_x and exp_y if not given
             
         Returns:
             list with the differences between the simulated y values and the experimental intensities
@@ -673,6 +686,10 @@ def func2min(params: Parameters, sim: Toplevel | None,
     # Normalizer for the function to match the plotted values
     normalize = guiVars.normalizevar.get() # type: ignore
     
+    # Experimental data prepared for the fit
+    if context is None:
+        context = FitContext(exp_x, exp_y)
+    
     # Get the parameters from the list of initialized parameters
     xoff = params['xoff'].value
     if 'Satellites' in sat:
@@ -783,12 +800,14 @@ def func2min(params: Parameters, sim: Toplevel | None,
         generalVars.ytot_exc, generalVars.ydiagtot_exc, generalVars.ysattot_exc, generalVars.yshkofftot_exc, \
         generalVars.yshkuptot_exc, generalVars.yfinal_exc, generalVars.yfinals_exc = \
             y_calculator(sim, sat, peak, generalVars.xfinal, xe, ye, we, xse, yse, wse, res, \
-                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff)
+                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff,
+                workspace=fitWorkspace_exc)
     
     generalVars.ytot, generalVars.ydiagtot, generalVars.ysattot, generalVars.yshkofftot, \
         generalVars.yshkuptot, generalVars.yfinal, generalVars.yfinals = \
             y_calculator(sim, sat, peak, generalVars.xfinal, x, y, w, xs, ys, ws, res, \
-                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff)
+                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff,
+                workspace=fitWorkspace)
     
     if len(generalVars.extra_fitting_functions) > 0:
         for key in generalVars.extra_fitting_functions:
@@ -820,7 +839,7 @@ def func2min(params: Parameters, sim: Toplevel | None,
     
     # Calculate the normalization multiplier
     # normalization_var = normalizer(y0, max(exp_y), max(generalVars.ytot)) # ytot_max)# if not baseline else max(generalVars.ytot))
-    normalization_var = normalizer(y0, max(exp_y), ytot_max)# if not baseline else max(generalVars.ytot))
+    normalization_var = normalizer(y0, context.expYMax, ytot_max)# if not baseline else max(generalVars.ytot))
     
     # Interpolate the data
     if 'Excitation' in sat or 'ESat' in sat:
@@ -828,41 +847,21 @@ def func2min(params: Parameters, sim: Toplevel | None,
     else:
         norm_simu = (np.array(generalVars.ytot) * normalization_var) + y0
     
-    exp_interpolate = interp1d(exp_x, exp_y, kind='cubic')
+    # Get the experimental values on the simulated points inside the experimental spectrum (and the quantification bounds).
+    # These are capped at the experimental maximum to prevent interpolation overshoots
+    grid_mask, exp_y_f = context.gridValues(generalVars.xfinal, bounds if baseline else None)
     
     if generalVars.verbose >= 3:
         print(exp_x)
         print(exp_y)
-        print(f'exp: {max(exp_y)}, exp_interp: {max(exp_interpolate([x_ for x_ in generalVars.xfinal if x_ >= min(exp_x) and x_ <= max(exp_x)]))}, simu: {max(generalVars.ytot)}, mult: {normalization_var} = {max(norm_simu)}')
+        print(f'exp: {context.expYMax}, exp_interp: {np.max(exp_y_f)}, simu: {max(generalVars.ytot)}, mult: {normalization_var} = {max(norm_simu)}')
     
+    # Simulated values at the same points
+    y_interp = norm_simu[grid_mask]
     """
-    Interpolated function of the simulated points
+    Simulated y values at each energy value of the simulation grid inside the experimental spectrum
     """
     
-    # Initialize the interpolated y values
-    y_interp: List[float] = []
-    """
-    List for the interpolated values of the simulated y at each energy value of the experimental spectrum
-    """
-    exp_y_f: List[float] = []
-    
-    if baseline:
-        for g, h in enumerate(generalVars.xfinal):
-            if h > min(exp_x) and h < max(exp_x):
-                if any([h >= bound[0] and h <= bound[1] for bound in bounds]):
-                    y_interp.append(norm_simu[g])
-                    # exp_y_f.append(exp_interpolate(h))
-                    # "if" to prevent interpolation overshoots
-                    exp_y_f.append(exp_interpolate(h) if exp_interpolate(h) <= max(exp_y) else max(exp_y))
-    else:
-        for g, h in enumerate(generalVars.xfinal):
-            if h > min(exp_x) and h < max(exp_x):
-                # Get the values of the interpolation for the experimental x values
-                y_interp.append(norm_simu[g])
-                # exp_y_f.append(exp_interpolate(h))
-                # "if" to prevent interpolation overshoots
-                exp_y_f.append(exp_interpolate(h) if exp_interpolate(h) <= max(exp_y) else max(exp_y))
-    
     
     if generalVars.verbose >= 3:
         print(np.array(y_interp))
@@ -883,11 +882,14 @@ def func2min(params: Parameters, sim: Toplevel | None,
     
         print(f'Simu max: {max(y_interp)}; Exp max: {max(exp_y_f)}')
     
+    # Calculate the residuals in double precision for the minimizer
+    residuals = y_interp.astype(np.float64) - exp_y_f
+    
     # Return the normalized function
     if normalize == 'One':
-        return (np.array(y_interp) - np.array(exp_y_f)) / max(exp_y_f)
+        return residuals / np.max(exp_y_f)
     else:
-        return np.array(y_interp) - np.array(exp_y_f)
+        return residuals
 
 
 # Create the function to be minimized for the fitting
@@ -899,7 +901,7 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
              energy_values: List[float], efficiency_values: List[float], baseline: bool = False,
              xe: List[List[float]] = [], ye: List[List[float]] = [], we: List[List[float]] = [],
              xse: List[List[List[float]]] = [], yse: List[List[List[float]]] = [],
-             wse: List[List[List[float]]] = []):
+             wse: List[List[List[float]]] = [], context: FitContext | None = None):
     """
     Function to be minimized in the fitting
         
@@ -921,6 +923,7 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
             ws: natural width values for each satellite transition in each radiative transition to simulate
             energy_values: energy values read from the detector efficiency data
             efficiency_values: efficiency values read from the detector efficiency data
+            context: experimental spectrum data prepared for the fit, built from exp_x and exp_y if not given
             
         Returns:
             list with the differences between the simulated y values and the experimental intensities
@@ -936,6 +939,10 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
     # Normalizer for the function to match the plotted values
     normalize = guiVars.normalizevar.get() # type: ignore
     
+    # Experimental data prepared for the fit
+    if context is None:
+        context = FitContext(exp_x, exp_y)
+    
     # Get the parameters from the list of initialized parameters
     ind_xoff = name.index('xoff')
     xoff = params[ind_xoff]
@@ -982,9 +989,9 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
     
     if baseline:
         exp_base = interp1d(generalVars.xfinal, generalVars.currentBaseline, 'cubic')
-        eff_y = np.array(exp_y) - exp_base(generalVars.exp_x)
+        eff_y = context.exp_y - exp_base(context.exp_x)
     else:
-        eff_y = np.array(exp_y)
+        eff_y = context.exp_y
     
     
     if guiVars.fit_shake_prob.get(): # type: ignore
@@ -1017,12 +1024,14 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
         generalVars.ytot_exc, generalVars.ydiagtot_exc, generalVars.ysattot_exc, generalVars.yshkofftot_exc, \
         generalVars.yshkuptot_exc, generalVars.yfinal_exc, generalVars.yfinals_exc = \
             y_calculator(sim, sat, peak, generalVars.xfinal, xe, ye, we, xse, yse, wse, res, \
-                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff)
+                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff,
+                workspace=fitWorkspace_exc)
     
     generalVars.ytot, generalVars.ydiagtot, generalVars.ysattot, generalVars.yshkofftot, \
         generalVars.yshkuptot, generalVars.yfinal, generalVars.yfinals = \
             y_calculator(sim, sat, peak, generalVars.xfinal, x, y, w, xs, ys, ws, res, \
-                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff)
+                energy_values, efficiency_values, xoff, sat_xoff, shkoff_xoff, shkup_xoff,
+                workspace=fitWorkspace)
     
     if len(generalVars.extra_fitting_functions) > 0:
         for key in generalVars.extra_fitting_functions:
@@ -1058,7 +1067,7 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
             
     
     # Calculate the normalization multiplier
-    normalization_var = normalizer(y0, max(eff_y), ytot_max)
+    normalization_var = normalizer(y0, np.max(eff_y), ytot_max)
     
     
     # Interpolate the data
@@ -1070,23 +1079,20 @@ def func2min_minuit(params: tuple, name: tuple, sim: Toplevel | None,
     """
     Interpolated function of the simulated points
     """
-        
-    # Initialize the interpolated y values
-    y_interp: List[float] = []     ## pode conter valores yfinal, regra geral nunca nenhum vai coincidir
+    
+    # Experimental points inside the simulated energies
+    exp_mask = context.expMask(generalVars.xfinal)
+    
+    # Get the values of the interpolation for the experimental x values
+    y_interp = f_interpolate(context.exp_x[exp_mask])
     """
-    List for the interpolated values of the simulated y at each energy value of the experimental spectrum
+    Interpolated values of the simulated y at each energy value of the experimental spectrum
     """
-    exp_y_f: List[float] = [] ## filtro para os valores experimentais
-    
-    for g, h in enumerate(exp_x):  
-        if h > min(generalVars.xfinal) and h < max(generalVars.xfinal):  
-            # Get the values of the interpolation for the experimental x values
-            y_interp.append(f_interpolate(h)) 
-            exp_y_f.append(eff_y[g])  ## para cada valor de energia experimmental vai buscar o seu valor de intensidade correspondente
+    exp_y_f = eff_y[exp_mask]
     
     var = np.sqrt(exp_y_f)
     
-    neg_log1 = template_nll_asy(mu=exp_y_f, n=y_interp, mu_var=var) 
+    neg_log1 = template_nll_asy(mu=exp_y_f, n=np.array(y_interp, dtype=np.float64), mu_var=var) 
     return (neg_log1)
     
 
@@ -1114,7 +1120,8 @@ def calculateResidues(exp_x: List[float], exp_y: List[float], exp_sigma: List[fl
     # Initialize a list for the interpolated experimental y values
     y_interp = [0.0 for i in range(len(exp_x))]
     # Interpolate the total plotted intensities
-    f_interpolate = interp1d(np.array(xfinal), (np.array(generalVars.ytot) * normalization_var) + y0, kind='cubic')
+    # The chi^2 is always calculated in double precision
+    f_interpolate = interp1d(np.array(xfinal, dtype=np.float64), (np.array(generalVars.ytot, dtype=np.float64) * normalization_var) + y0, kind='cubic')
     
     # Initialize a list for the residue values
     y_res = [0.0 for x in range(len(exp_x))]
@@ -1135,7 +1142,7 @@ def calculateResidues(exp_x: List[float], exp_y: List[float], exp_sigma: List[fl
                 chi_sum += (y_res[g] ** 2) / ((exp_sigma[g] / max(exp_y))**2)
     
     # Calculate the reduced chi^2 value
-    generalVars.chi_sqrd = chi_sum / (len(exp_x) - number_of_fit_variables)
+    generalVars.chi_sqrd = float(chi_sum / (len(exp_x) - number_of_fit_variables))
     # Plot the residues
     residues_graph.plot(exp_x, y_res)
     # Print the value in the console
@@ -1229,12 +1236,15 @@ def execute_autofit(sim: Toplevel | None, sat: str, enoffset: float, sat_enoffse
     
     params= initializeFitParameters(sat, generalVars.exp_x, eff_y, enoffset, sat_enoffset, shkoff_enoffset, shkup_enoffset, y0, res, quantify)
     
+    # Prepare the experimental data once for all the function evaluations
+    context = FitContext(generalVars.exp_x, eff_y)
+    
     # Minimize the function for the initialized parameters
     number_of_fit_variables = len(params.valuesdict())
     minner = Minimizer(func2min, params,
                        fcn_args=(sim, generalVars.exp_x, eff_y, num_of_points, sat, peak,
                                  x, y, w, xs, ys, ws, energy_values, efficiency_values, quantify,
-                                 xe, ye, we, xse, yse, wse))
+                                 xe, ye, we, xse, yse, wse, context))
     
     result = minner.minimize()
     
@@ -1362,6 +1372,9 @@ def execute_autofit_minuit(sim: Toplevel | None, sat: str, enoffset: float, sat_
     else:
         params,name,limits= initializeFitParameters_minuit(generalVars.exp_x, generalVars.exp_y, enoffset, sat_enoffset, shkoff_enoffset, shkup_enoffset, y0, res, quantify)
     
+    # Prepare the experimental data once for all the function evaluations
+    context = FitContext(generalVars.exp_x, generalVars.exp_y)
+    
     # Minimize the function for the initialized parameters
     number_of_fit_variables = len(params)
     
@@ -1369,7 +1382,8 @@ def execute_autofit_minuit(sim: Toplevel | None, sat: str, enoffset: float, sat_
                              exp_y = list(generalVars.exp_y), num_of_points=num_of_points,
                              sat = sat, peak = peak, x = x, y = y, w = w, xs = xs, ys = ys, ws = ws,
                              energy_values = energy_values, efficiency_values = efficiency_values,
-                             baseline = quantify, xe = xe, ye = ye, we = we, xse = xse, yse = yse, wse = wse)
+                             baseline = quantify, xe = xe, ye = ye, we = we, xse = xse, yse = yse, wse = wse,
+                             context = context)
     
     m = Minuit(fun_min_minuit, params, name = name) # type: ignore
     
@@ -11,9 +11,17 @@ import interface.variables as guiVars
 
 from simulation.shake import avgDiagramOverlap, avgDiagramOverlapExc
 
-from data.definitions import Line
+from simulation.mults import batch_overlap
 
-from typing import List
+from data.definitions import Line, LineTable, filterLines
+
+from typing import List, Dict, Tuple
+
+
+satelliteGroupsSize: int = 256
+"""
+Maximum number of satellite groupings kept in the cache
+"""
 
 
 # --------------------------------------------------------- #
@@ -25,8 +33,8 @@ from typing import List
 
 # Update the radiative and satellite rates for the selected transition
 def updateRadTransitionVals(transition: str, num: int, beam: float, FWHM: float,
-                            linelist: List[Line] | None = [], linelist_sat: List[Line] | None = [],
-                            linelist_up: List[Line] | None = []):
+                            linelist: List[Line] | LineTable | None = [], linelist_sat: List[Line] | LineTable | None = [],
+                            linelist_up: List[Line] | LineTable | None = []):
     """
     Function to update the radiative and satellite rates for the selected transition
         
@@ -48,7 +56,7 @@ def updateRadTransitionVals(transition: str, num: int, beam: float, FWHM: float,
     low_level: str = generalVars.the_dictionary[transition]["low_level"] # type: ignore
     high_level: str = generalVars.the_dictionary[transition]["high_level"] # type: ignore
     
-    list_to_process: List[Line] = []
+    list_to_process: List[Line] | LineTable = []
     if linelist != None:
         if linelist != []:
             list_to_process = linelist
@@ -57,14 +65,14 @@ def updateRadTransitionVals(transition: str, num: int, beam: float, FWHM: float,
     else:
         return num_of_transitions, low_level, high_level, [], []
 
-    list_to_process_sat: List[Line] = []
+    list_to_process_sat: List[Line] | LineTable = []
     if linelist_sat != None:
         if linelist_sat != []:
             list_to_process_sat = linelist_sat
         else:
             list_to_process_sat = generalVars.linesatellites
     
-    list_to_process_up: List[Line] = []
+    list_to_process_up: List[Line] | LineTable = []
     if linelist_up != None:
         if linelist_up != []:
             list_to_process_up = linelist_up
@@ -73,7 +81,9 @@ def updateRadTransitionVals(transition: str, num: int, beam: float, FWHM: float,
     
     if len(generalVars.jj_vals) == 0:
         # Filter the radiative and satellite rates data for the selected transition
-        diag_stick_val = [line for line in list_to_process if line.filterLevel(low_level, high_level, strict='h')]
+        diag_stick_val = filterLines(list_to_process, low_level, high_level, strict='h')
+        # Precompute the beam overlaps of all diagram levels in one pass
+        batch_overlap(diag_stick_val, beam, FWHM)
         
         if len(generalVars.ionizationsrad) > 0 or len(generalVars.ionizationssat) > 0:
             avgDOverlap = avgDiagramOverlap(diag_stick_val, beam, FWHM)
@@ -81,17 +91,19 @@ def updateRadTransitionVals(transition: str, num: int, beam: float, FWHM: float,
             avgDOverlap = 1.0
 
         if linelist_sat != None:
-            sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for line in list_to_process_sat if line.filterLevel(low_level, high_level, strict='na')]
+            sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for line in filterLines(list_to_process_sat, low_level, high_level, strict='na')]
         
             if linelist_up != None:
                 # Filter the shake-up satellite rates data for the selected transition
                 if generalVars.Shakeup_exists:
-                    sat_stick_val += [line.setDiagramOverlap(avgDOverlap) for line in list_to_process_up if line.filterLevel(low_level, high_level, strict='na')]
+                    sat_stick_val += [line.setDiagramOverlap(avgDOverlap) for line in filterLines(list_to_process_up, low_level, high_level, strict='na')]
         else:
             sat_stick_val = []
     else:
         # Filter the radiative and satellite rates data for the selected transition
-        diag_stick_val = [line for line in list_to_process if line.filterLevel(low_level, high_level, strict='h') and line.filterJJI()]
+        diag_stick_val = filterLines(list_to_process, low_level, high_level, strict='h', jj=True)
+        # Precompute the beam overlaps of all diagram levels in one pass
+        batch_overlap(diag_stick_val, beam, FWHM)
         
         if len(generalVars.ionizationsrad) > 0 or len(generalVars.ionizationssat) > 0:
             avgDOverlap = avgDiagramOverlap(diag_stick_val, beam, FWHM)
@@ -99,15 +111,18 @@ def updateRadTransitionVals(transition: str, num: int, beam: float, FWHM: float,
             avgDOverlap = 1.0
 
         if linelist_sat != None:
-            sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for line in list_to_process_sat if line.filterLevel(low_level, high_level, strict='na') and line.filterJJI()]
+            sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for line in filterLines(list_to_process_sat, low_level, high_level, strict='na', jj=True)]
             
             if linelist_up != None:
                 # Filter the shake-up satellite rates data for the selected transition
                 if generalVars.Shakeup_exists:
-                    sat_stick_val += [line.setDiagramOverlap(avgDOverlap) for line in list_to_process_up if line.filterLevel(low_level, high_level, strict='na') and line.filterJJI()]
+                    sat_stick_val += [line.setDiagramOverlap(avgDOverlap) for line in filterLines(list_to_process_up, low_level, high_level, strict='na', jj=True)]
         else:
             sat_stick_val = []
     
+    # Precompute the beam overlaps of all satellite levels in one pass
+    batch_overlap(sat_stick_val, beam, FWHM)
+    
     return num_of_transitions, low_level, high_level, diag_stick_val, sat_stick_val
 
 # Update the satellite rates for the selected transition
@@ -127,10 +142,10 @@ def updateSatTransitionVals(low_level: str, high_level: str, key: str, sat_stick
     """
     if not free:
         # Filter the satellite rates data for the combinations of selected levels
-        sat_stick_val_ind1 = [line for line in sat_stick_val if line.filterLevel(low_level + key, key + high_level, strict='na')]
-        sat_stick_val_ind2 = [line for line in sat_stick_val if line.filterLevel(low_level + key, high_level + key, strict='na')]
-        sat_stick_val_ind3 = [line for line in sat_stick_val if line.filterLevel(key + low_level, key + high_level, strict='na')]
-        sat_stick_val_ind4 = [line for line in sat_stick_val if line.filterLevel(key + low_level, high_level + key, strict='na')]
+        sat_stick_val_ind1 = filterLines(sat_stick_val, low_level + key, key + high_level, strict='na')
+        sat_stick_val_ind2 = filterLines(sat_stick_val, low_level + key, high_level + key, strict='na')
+        sat_stick_val_ind3 = filterLines(sat_stick_val, key + low_level, key + high_level, strict='na')
+        sat_stick_val_ind4 = filterLines(sat_stick_val, key + low_level, high_level + key, strict='na')
     else:
         # Filter the satellite rates data for the combinations of selected levels
         # --------------------------------------------- #
@@ -149,6 +164,45 @@ def updateSatTransitionVals(low_level: str, high_level: str, key: str, sat_stick
     return sat_stick_val_ind
 
 
+# Group the satellite rates of the selected transition by shake level
+def groupSatelliteLines(low_level: str, sat_stick_val: List[Line]) -> Dict[str, Tuple[List[Line], List[Line], List[Line]]]:
+    """
+    Function to group, in a single pass over the satellite rates, the lines of each shake level of the selected transition.
+    Each group has the same lines as updateSatTransitionVals with free=True for that shake level.
+    The line positions of each group are cached, so they are reused by the following simulations and fit evaluations of the same transition.
+        
+        Args:
+            low_level: low level of the selected transition
+            sat_stick_val: list with all the possible satellite transitions for the current diagram transition
+        
+        Returns:
+            groups: dictionary with the (all, shake-off, shake-up) satellite rates of each shake level
+    """
+    cache_key = (low_level, tuple(generalVars.label1), tuple(line.Shelli for line in sat_stick_val))
+    if cache_key not in generalVars.satelliteGroups:
+        # The 4 level combinations of updateSatTransitionVals for each shake level
+        parts: Dict[str, Tuple[List[int], List[int]]] = {key: ([], []) for key in generalVars.label1}
+        for i, line in enumerate(sat_stick_val):
+            for key, (part1, part3) in parts.items():
+                if low_level + key in line.Shelli:
+                    part1.append(i)
+                if key + low_level in line.Shelli:
+                    part3.append(i)
+        
+        positions: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+        for key, (part1, part3) in parts.items():
+            indexes = part1 + part1 + part3 + part3
+            positions[key] = (indexes, [i for i in indexes if len(sat_stick_val[i].Shelli) <= 4],
+                              [i for i in indexes if len(sat_stick_val[i].Shelli) > 4])
+        
+        if len(generalVars.satelliteGroups) >= satelliteGroupsSize:
+            del generalVars.satelliteGroups[next(iter(generalVars.satelliteGroups))]
+        generalVars.satelliteGroups[cache_key] = positions
+    
+    return {key: tuple([sat_stick_val[i] for i in indexes] for indexes in group) # type: ignore
+            for key, group in generalVars.satelliteGroups[cache_key].items()}
+
+
 # Update the radiative and satellite rates for the selected transition and charge state
 def updateRadExcitationVals(transition: str, num: int, beam: float, FWHM: float, exc_index: int, exc: str):
     """
@@ -175,25 +229,30 @@ def updateRadExcitationVals(transition: str, num: int, beam: float, FWHM: float,
     
     if len(generalVars.jj_vals) == 0:
         # Filter the radiative and satellite rates data for the selected transition and charge state
-        # diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) for line in linerad if line.filterLevel(low_level, high_level, strict='h') and generalVars.rad_EXC[i] == exc]
-        diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) for line in linerad if line.filterLevel(low_level, high_level, strict='na') and generalVars.rad_EXC[i] == exc]
+        # diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) if generalVars.rad_EXC[i] == exc for line in filterLines(linerad, low_level, high_level, strict='h')]
+        diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) if generalVars.rad_EXC[i] == exc for line in filterLines(linerad, low_level, high_level, strict='na')]
+        batch_overlap(diag_stick_val, beam, FWHM, exc_index)
 
         if len(generalVars.ionizationsrad_exc) > 0 or len(generalVars.ionizationssat_exc) > 0:
             avgDOverlap = avgDiagramOverlapExc(diag_stick_val, beam, FWHM, exc_index)
         else:
             avgDOverlap = 1.0
 
-        sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for i, linesat in enumerate(generalVars.linesatellites_EXC) for line in linesat if line.filterLevel(low_level, high_level, strict='na') and generalVars.sat_EXC[i] == exc]
+        sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for i, linesat in enumerate(generalVars.linesatellites_EXC) if generalVars.sat_EXC[i] == exc for line in filterLines(linesat, low_level, high_level, strict='na')]
     else:
         # Filter the radiative and satellite rates data for the selected transition and charge state
-        # diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) for line in linerad if line.filterLevel(low_level, high_level, strict='h') and generalVars.rad_EXC[i] == exc and line.filterJJI()]
-        diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) for line in linerad if line.filterLevel(low_level, high_level, strict='na') and generalVars.rad_EXC[i] == exc and line.filterJJI()]
+        # diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) if generalVars.rad_EXC[i] == exc for line in filterLines(linerad, low_level, high_level, strict='h', jj=True)]
+        diag_stick_val = [line for i, linerad in enumerate(generalVars.lineradrates_EXC) if generalVars.rad_EXC[i] == exc for line in filterLines(linerad, low_level, high_level, strict='na', jj=True)]
+        batch_overlap(diag_stick_val, beam, FWHM, exc_index)
         if len(generalVars.ionizationsrad_exc) > 0 or len(generalVars.ionizationssat_exc) > 0:
             avgDOverlap = avgDiagramOverlapExc(diag_stick_val, beam, FWHM, exc_index)
         else:
             avgDOverlap = 1.0
         
-        sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for i, linesat in enumerate(generalVars.linesatellites_EXC) for line in linesat if line.filterLevel(low_level, high_level, strict='na') and generalVars.sat_EXC[i] == exc and line.filterJJI()]
+        sat_stick_val = [line.setDiagramOverlap(avgDOverlap) for i, linesat in enumerate(generalVars.linesatellites_EXC) if generalVars.sat_EXC[i] == exc for line in filterLines(linesat, low_level, high_level, strict='na', jj=True)]
+    
+    # Precompute the beam overlaps of all satellite levels in one pass
+    batch_overlap(sat_stick_val, beam, FWHM, exc_index)
         
     return num_of_transitions, low_level, high_level, diag_stick_val, sat_stick_val
 
@@ -221,10 +280,10 @@ def updateAugTransitionVals(transition: str, num: int):
 
     if len(generalVars.jj_vals) == 0:
         # Filter the auger rates data for the selected transition
-        aug_stick_val = [line for line in generalVars.lineauger if line.filterLevel(low_level, high_level, auger_level, strict='na')]
+        aug_stick_val = filterLines(generalVars.lineauger, low_level, high_level, auger_level, strict='na')
     else:
         # Filter the auger rates data for the selected transition
-        aug_stick_val = [line for line in generalVars.lineauger if line.filterLevel(low_level, high_level, auger_level, strict='na') and line.filterJJI()]
+        aug_stick_val = filterLines(generalVars.lineauger, low_level, high_level, auger_level, strict='na', jj=True)
 
     return num_of_transitions, aug_stick_val
 
@@ -256,25 +315,25 @@ def updateRadCSTrantitionsVals(transition: str, num: int, ncs: bool, cs: str):
     if len(generalVars.jj_vals) == 0:
         # Filter the radiative and satellite rates data for the selected transition and charge state
         if not ncs:
-            diag_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_PCS) for line in linerad if line.filterLevel(low_level, high_level, strict='h') and generalVars.rad_PCS[i] == cs]
+            diag_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_PCS) if generalVars.rad_PCS[i] == cs for line in filterLines(linerad, low_level, high_level, strict='h')]
         else:
-            diag_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_NCS) for line in linerad if line.filterLevel(low_level, high_level, strict='h') and generalVars.rad_NCS[i] == cs]
+            diag_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_NCS) if generalVars.rad_NCS[i] == cs for line in filterLines(linerad, low_level, high_level, strict='h')]
 
         if not ncs:
-            sat_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[generalVars.rad_PCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_PCS) for line in linesat if line.filterLevel(low_level, high_level, strict='na') and generalVars.sat_PCS[i] == cs]
+            sat_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[generalVars.rad_PCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_PCS) if generalVars.sat_PCS[i] == cs for line in filterLines(linesat, low_level, high_level, strict='na')]
         else:
-            sat_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[generalVars.rad_NCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_NCS) for line in linesat if line.filterLevel(low_level, high_level, strict='na') and generalVars.sat_NCS[i] == cs]
+            sat_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[generalVars.rad_NCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_NCS) if generalVars.sat_NCS[i] == cs for line in filterLines(linesat, low_level, high_level, strict='na')]
     else:
         # Filter the radiative and satellite rates data for the selected transition and charge state
         if not ncs:
-            diag_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_PCS) for line in linerad if line.filterLevel(low_level, high_level, strict='h') and generalVars.rad_PCS[i] == cs and line.filterJJI()]
+            diag_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_PCS) if generalVars.rad_PCS[i] == cs for line in filterLines(linerad, low_level, high_level, strict='h', jj=True)]
         else:
-            diag_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_NCS) for line in linerad if line.filterLevel(low_level, high_level, strict='h') and generalVars.rad_NCS[i] == cs and line.filterJJI()]
+            diag_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[i].get())) for i, linerad in enumerate(generalVars.lineradrates_NCS) if generalVars.rad_NCS[i] == cs for line in filterLines(linerad, low_level, high_level, strict='h', jj=True)]
 
         if not ncs:
-            sat_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[generalVars.rad_PCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_PCS) for line in linesat if line.filterLevel(low_level, high_level, strict='na') and generalVars.sat_PCS[i] == cs and line.filterJJI()]
+            sat_stick_val = [line.setMixValue(float(guiVars.PCS_radMixValues[generalVars.rad_PCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_PCS) if generalVars.sat_PCS[i] == cs for line in filterLines(linesat, low_level, high_level, strict='na', jj=True)]
         else:
-            sat_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[generalVars.rad_NCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_NCS) for line in linesat if line.filterLevel(low_level, high_level, strict='na') and generalVars.sat_NCS[i] == cs and line.filterJJI()]
+            sat_stick_val = [line.setMixValue(float(guiVars.NCS_radMixValues[generalVars.rad_NCS.index(cs)].get())) for i, linesat in enumerate(generalVars.linesatellites_NCS) if generalVars.sat_NCS[i] == cs for line in filterLines(linesat, low_level, high_level, strict='na', jj=True)]
         
     return num_of_transitions, low_level, high_level, diag_stick_val, sat_stick_val
 
@@ -304,14 +363,14 @@ def updateAugCSTransitionsVals(transition: str, num: int, ncs: bool, cs: str):
     if len(generalVars.jj_vals) == 0:
         # Filter the auger rates data for the selected transition and charge state
         if not ncs:
-            aug_stick_val = [line.setMixValue(float(guiVars.PCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_PCS) for line in lineaug if line.filterLevel(low_level, high_level, auger_level, strict='na') and generalVars.aug_PCS[i] == cs]
+            aug_stick_val = [line.setMixValue(float(guiVars.PCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_PCS) if generalVars.aug_PCS[i] == cs for line in filterLines(lineaug, low_level, high_level, auger_level, strict='na')]
         else:
-            aug_stick_val = [line.setMixValue(float(guiVars.NCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_NCS) for line in lineaug if line.filterLevel(low_level, high_level, auger_level, strict='na') and generalVars.aug_PCS[i] == cs]
+            aug_stick_val = [line.setMixValue(float(guiVars.NCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_NCS) if generalVars.aug_PCS[i] == cs for line in filterLines(lineaug, low_level, high_level, auger_level, strict='na')]
     else:
         # Filter the auger rates data for the selected transition and charge state
         if not ncs:
-            aug_stick_val = [line.setMixValue(float(guiVars.PCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_PCS) for line in lineaug if line.filterLevel(low_level, high_level, auger_level, strict='na') and generalVars.aug_PCS[i] == cs and line.filterJJI()]
+            aug_stick_val = [line.setMixValue(float(guiVars.PCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_PCS) if generalVars.aug_PCS[i] == cs for line in filterLines(lineaug, low_level, high_level, auger_level, strict='na', jj=True)]
         else:
-            aug_stick_val = [line.setMixValue(float(guiVars.NCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_NCS) for line in lineaug if line.filterLevel(low_level, high_level, auger_level, strict='na') and generalVars.aug_PCS[i] == cs and line.filterJJI()]
+            aug_stick_val = [line.setMixValue(float(guiVars.NCS_augMixValues[i].get())) for i, lineaug in enumerate(generalVars.lineaugrates_NCS) if generalVars.aug_PCS[i] == cs for line in filterLines(lineaug, low_level, high_level, auger_level, strict='na', jj=True)]
 
     return num_of_transitions, aug_stick_val
@@ -2,7 +2,7 @@
 Module with functions that calculate various multipliers for line intensities, such as excitation beam overlap and cascade boosts.
 """
 
-from data.definitions import Line
+from data.definitions import Line, buildBRIndex
 
 import interface.variables as guiVars
 import data.variables as generalVars
@@ -10,35 +10,84 @@ import data.variables as generalVars
 import math
 
 import numpy as np
+import numpy.typing as npt
 
 import scipy.integrate as integrate
 
-from typing import List, Dict, Type
+from simulation.overlap import normalise, normalised_overlap, normalised_overlap_exc
+
+from collections import OrderedDict
+
+from bisect import bisect_right
+
+from typing import List, Dict, Type, Tuple
+
+
+overlapCacheSize: int = 65536
+"""
+Maximum number of beam overlap integrals kept in the cache
+"""
+overlapCache: OrderedDict[Tuple, float] = OrderedDict()
+"""
+Least recently used cache of the beam overlap integrals, keyed by the overlap type, formation energy, partial width, beam energy and FWHM
+"""
 
 # --------------------------------------------------------- #
 #                                                           #
-#        FUNCTIONS TO CALCULATE INTENSITY MULTIPLIERS       #
+#                 BEAM OVERLAP CACHE FUNCTIONS              #
 #                                                           #
 # --------------------------------------------------------- #
 
-# Calculate the overlap between the beam energy profile and the energy necessary to reach the level
-def get_overlap(line: Line, beam: float, FWHM: float) -> float:
+# Get an overlap integral from the cache or calculate and store it
+def cached_overlap(key: Tuple, integral, *args) -> float:
     """
-    Function to calculate the levels overlap with the beam energy profile
+    Function to get an overlap integral from the cache, calculating it and evicting the least recently used entry when it is missing
         
         Args:
-            line: the data line of the transition that we want to find the ionization energy
-            beam: the beam energy introduced in the interface
-            FWHM: the beam energy FWHM introduced in the interface
-            shakeup: orbital where the shake-up electron ends in. If empty it is not a shake-up transition
-
+            key: cache key with the overlap type and the inputs of the integral
+            integral: function that calculates the integral
+            args: arguments of the integral function
+        
         Returns:
             overlap: the overlap
     """
+    if key in overlapCache:
+        overlapCache.move_to_end(key)
+        return overlapCache[key]
     
-    if beam <= 0.0:
-        return 1.0
+    overlap = integral(*args)
+    
+    overlapCache[key] = overlap
+    if len(overlapCache) > overlapCacheSize:
+        overlapCache.popitem(last=False)
     
+    return overlap
+
+# Clear the overlap cache
+def clear_overlap_cache():
+    """
+    Function to clear the overlap cache, so the integrals of a previous element are not kept
+    """
+    overlapCache.clear()
+
+# --------------------------------------------------------- #
+#                                                           #
+#        FUNCTIONS TO CALCULATE INTENSITY MULTIPLIERS       #
+#                                                           #
+# --------------------------------------------------------- #
+
+# Get the formation energy and partial width used in the overlap of a level
+def overlap_inputs(line: Line) -> Tuple[float, float]:
+    """
+    Function to get the formation energy and the partial width used in the beam overlap of a level
+        
+        Args:
+            line: the data line of the transition that we want to find the ionization energy
+        
+        Returns:
+            formationEnergy: energy necessary to reach the level
+            pWidth: partial width of the level
+    """
     if len(line.Shelli) <= 4:
         if len(line.Shelli) == 2:
             pWidth = generalVars.partialWidths['diagram'][line.keyI()]
@@ -51,7 +100,135 @@ def get_overlap(line: Line, beam: float, FWHM: float) -> float:
         pWidth = 0.4719 * max(generalVars.partialWidths['shakeup'][line.keyI()], 1E-100)
         formationEnergy = generalVars.formationEnergies['shakeup'][line.keyI()] + pWidth
     
+    return formationEnergy, pWidth
+
+# Get the formation energy and partial width used in the overlap of an excitation level
+def overlap_inputs_exc(line: Line, exc_index: int) -> Tuple[float, float]:
+    """
+    Function to get the formation energy and the partial width used in the resonant beam overlap of an excitation level
+        
+        Args:
+            line: the excitation data line of the transition that we want to find the ionization energy
+            exc_index: index of the excitation
+        
+        Returns:
+            formationEnergy: energy necessary to reach the level
+            pWidth: partial width of the level
+    """
+    if len(line.Shelli) <= 4:
+        if len(line.Shelli) == 2:
+            if line.keyI() not in generalVars.formationEnergies_exc[exc_index]['diagram']:
+                print(f'{generalVars.rad_EXC[exc_index]} -> {line.keyI()}')
+            
+            formationEnergy = generalVars.formationEnergies_exc[exc_index]['diagram'][line.keyI()]
+            pWidth = generalVars.partialWidths_exc[exc_index]['diagram'][line.keyI()]
+            pWidth = max(pWidth, 1E-100)
+        else:
+            # print(f'{generalVars.rad_EXC[exc_index]} -> {line.keyI()}')
+            formationEnergy = generalVars.formationEnergies_exc[exc_index]['satellite'][line.keyI()]
+            pWidth = generalVars.partialWidths_exc[exc_index]['satellite'][line.keyI()]
+            pWidth = max(pWidth, 1E-100)
+    else:
+        formationEnergy = generalVars.formationEnergies_exc[exc_index]['shakeup'][line.keyI()]
+        pWidth = max(generalVars.partialWidths_exc[exc_index]['shakeup'][line.keyI()], 1E-100)
+    
+    pWidth /= 2.0
+    pWidth *= 1.02
+    
+    return formationEnergy, pWidth
+
+# Calculate the overlaps of all levels with the beam energy profile in one vectorised pass
+def batch_overlap(lines: List[Line], beam: float, FWHM: float, exc_index: int = -1) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the overlaps of a list of levels with the beam energy profile in one vectorised pass.
+    The overlaps are evaluated in normalised coordinates, where the radiative overlap has a closed form and the
+    excitation overlap is integrated with a shared simpson rule.
+    Each line keeps its overlap, so get_overlap and get_overlap_exc return it for the same beam without integrating again.
+        
+        Args:
+            lines: the data lines of the levels
+            beam: the beam energy introduced in the interface
+            FWHM: the beam energy FWHM introduced in the interface
+            exc_index: index of the excitation, or -1 for the radiative overlap
+        
+        Returns:
+            overlaps: the overlap of each line (nan for the lines without formation energy or partial width)
+    """
+    overlaps: npt.NDArray[np.float64] = np.ones(len(lines))
+    
+    if beam <= 0.0 or len(lines) == 0:
+        return overlaps
+    
+    # Gather the inputs of the levels with formation energies and partial widths
+    indexes: List[int] = []
+    formationEnergies: List[float] = []
+    pWidths: List[float] = []
+    for i, line in enumerate(lines):
+        try:
+            formationEnergy, pWidth = overlap_inputs(line) if exc_index == -1 else overlap_inputs_exc(line, exc_index)
+        except (KeyError, IndexError):
+            overlaps[i] = np.nan
+            continue
+        
+        indexes.append(i)
+        formationEnergies.append(formationEnergy)
+        pWidths.append(pWidth)
+    
+    detuning, ratio = normalise(np.array(formationEnergies), np.array(pWidths), beam, FWHM)
+    if exc_index == -1:
+        overlaps[indexes] = normalised_overlap(detuning, ratio)
+    else:
+        overlaps[indexes] = normalised_overlap_exc(detuning, ratio)
+    
+    key = (beam, FWHM, exc_index)
+    for i in indexes:
+        lines[i].setOverlap(float(overlaps[i]), key)
+    
+    return overlaps
+
+
+# Calculate the overlap between the beam energy profile and the energy necessary to reach the level
+def get_overlap(line: Line, beam: float, FWHM: float) -> float:
+    """
+    Function to calculate the levels overlap with the beam energy profile
+        
+        Args:
+            line: the data line of the transition that we want to find the ionization energy
+            beam: the beam energy introduced in the interface
+            FWHM: the beam energy FWHM introduced in the interface
+            shakeup: orbital where the shake-up electron ends in. If empty it is not a shake-up transition
+
+        Returns:
+            overlap: the overlap
+    """
+    
+    if beam <= 0.0:
+        return 1.0
     
+    # Use the overlap precomputed by batch_overlap for this beam
+    if getattr(line, 'overlapKey', None) == (beam, FWHM, -1):
+        return line.overlap
+    
+    formationEnergy, pWidth = overlap_inputs(line)
+    
+    # The integral only depends on these values, so it is shared by all lines and simulations with the same inputs
+    return cached_overlap(('rad', formationEnergy, pWidth, beam, FWHM), overlap_integral, formationEnergy, pWidth, beam, FWHM)
+
+
+# Integrate the overlap between the beam energy profile and the level profile
+def overlap_integral(formationEnergy: float, pWidth: float, beam: float, FWHM: float) -> float:
+    """
+    Function to integrate the overlap between the beam energy profile and the level profile
+        
+        Args:
+            formationEnergy: energy necessary to reach the level
+            pWidth: partial width of the level
+            beam: the beam energy introduced in the interface
+            FWHM: the beam energy FWHM introduced in the interface
+        
+        Returns:
+            overlap: the overlap
+    """
     def integrand(x):
         x1 = x[x > beam]
         x2 = x[x <= beam]
@@ -111,26 +288,29 @@ def get_overlap_exc(line: Line, beam: float, FWHM: float, exc_index: int) -> flo
     if beam <= 0.0:
         return 1.0
     
-    if len(line.Shelli) <= 4:
-        if len(line.Shelli) == 2:
-            if line.keyI() not in generalVars.formationEnergies_exc[exc_index]['diagram']:
-                print(f'{generalVars.rad_EXC[exc_index]} -> {line.keyI()}')
-            
-            formationEnergy = generalVars.formationEnergies_exc[exc_index]['diagram'][line.keyI()]
-            pWidth = generalVars.partialWidths_exc[exc_index]['diagram'][line.keyI()]
-            pWidth = max(pWidth, 1E-100)
-        else:
-            # print(f'{generalVars.rad_EXC[exc_index]} -> {line.keyI()}')
-            formationEnergy = generalVars.formationEnergies_exc[exc_index]['satellite'][line.keyI()]
-            pWidth = generalVars.partialWidths_exc[exc_index]['satellite'][line.keyI()]
-            pWidth = max(pWidth, 1E-100)
-    else:
-        formationEnergy = generalVars.formationEnergies_exc[exc_index]['shakeup'][line.keyI()]
-        pWidth = max(generalVars.partialWidths_exc[exc_index]['shakeup'][line.keyI()], 1E-100)
+    # Use the overlap precomputed by batch_overlap for this beam
+    if getattr(line, 'overlapKey', None) == (beam, FWHM, exc_index):
+        return line.overlap
     
-    pWidth /= 2.0
-    pWidth *= 1.02
+    formationEnergy, pWidth = overlap_inputs_exc(line, exc_index)
     
+    return cached_overlap(('exc', formationEnergy, pWidth, beam, FWHM), overlap_integral_exc, formationEnergy, pWidth, beam, FWHM)
+
+
+# Integrate the resonant overlap between the beam energy profile and the excitation level profile
+def overlap_integral_exc(formationEnergy: float, pWidth: float, beam: float, FWHM: float) -> float:
+    """
+    Function to integrate the resonant overlap between the beam energy profile and the excitation level profile
+        
+        Args:
+            formationEnergy: energy necessary to reach the level
+            pWidth: partial width of the level
+            beam: the beam energy introduced in the interface
+            FWHM: the beam energy FWHM introduced in the interface
+        
+        Returns:
+            overlap: the overlap
+    """
     def integrand(x):
         l = (0.5 * pWidth / np.pi) / (np.power((x - formationEnergy), 2) + (0.5 * pWidth) ** 2)
         g = (0.5 * pWidth / np.pi) / ((0.5 * pWidth) ** 2) * np.exp(-np.power(((x - beam) / FWHM), 2) * np.log(2))
@@ -150,26 +330,82 @@ def setupExcitationYields():
         generalVars.level_decayrates_exc.append({})
         for line in generalVars.linenurates_EXC[exc_index]:
             generalVars.level_decayrates_exc[exc_index][line.keyI()] = line.rate
+    
+    # Lookup tables for get_ExcRatio
+    total_decays: float = sum(generalVars.total_decayrates_exc)
+    generalVars.ratio_decayrates_exc = [total / total_decays for total in generalVars.total_decayrates_exc]
+    
+    for level_decays in generalVars.level_decayrates_exc[len(generalVars.prefix_decayrates_exc):]:
+        generalVars.prefix_decayrates_exc.append(setupPrefixDecays(level_decays))
+
+
+# Sum the level decay rates that contain each shell prefix
+def setupPrefixDecays(level_decays: Dict[str, float]) -> Dict[str, Tuple[float, int]]:
+    """
+    Function to sum the level decay rates of an excitation whose level key contains each 2 character shell prefix
+        
+        Args:
+            level_decays: dictionary with the decay rate of each level key
+        
+        Returns:
+            prefix_decays: dictionary with the (sum, number) of the decay rates for each prefix found in the level keys
+    """
+    prefix_decays: Dict[str, Tuple[float, int]] = {}
+    for key, rate in level_decays.items():
+        # Each level is counted once for every different prefix it contains
+        for prefix in {key[i:i + 2] for i in range(len(key) - 1)}:
+            total, count = prefix_decays.get(prefix, (0.0, 0))
+            prefix_decays[prefix] = (total + rate, count + 1)
+    
+    return prefix_decays
 
 
 # Calculate the excitaion ratio normalized for all loaded excitations
 def get_ExcRatio(line: Line, exc_index: int) -> float:
-    excitation_ratio: float = generalVars.total_decayrates_exc[exc_index] / sum(generalVars.total_decayrates_exc)
+    excitation_ratio: float = generalVars.ratio_decayrates_exc[exc_index]
+    
+    totalDirectDecays, numDirectDecays = generalVars.prefix_decayrates_exc[exc_index].get(line.keyI()[:2], (0.0, 0))
     
     if len(line.keyI().split("_")[0]) == 4:
-        totalDirectDecays: float = sum([generalVars.level_decayrates_exc[exc_index][key] for key in generalVars.level_decayrates_exc[exc_index] if line.keyI()[:2] in key])
-        avgDirectDecay: float = totalDirectDecays / sum([line.keyI()[:2] in key for key in generalVars.level_decayrates_exc[exc_index]])
-        level_ratio: float = avgDirectDecay / sum(generalVars.level_decayrates_exc[exc_index][key] for key in generalVars.level_decayrates_exc[exc_index] if line.keyI()[:2] in key)
+        avgDirectDecay: float = totalDirectDecays / numDirectDecays
+        level_ratio: float = avgDirectDecay / totalDirectDecays
     else:
         if line.keyI() not in generalVars.level_decayrates_exc[exc_index]:
             print(f'{generalVars.rad_EXC[exc_index]} -> {line.keyI()}')
             print(generalVars.level_decayrates_exc[exc_index])
 
-        level_ratio: float = generalVars.level_decayrates_exc[exc_index][line.keyI()] / sum(generalVars.level_decayrates_exc[exc_index][key] for key in generalVars.level_decayrates_exc[exc_index] if line.keyI()[:2] in key)
+        level_ratio: float = generalVars.level_decayrates_exc[exc_index][line.keyI()] / totalDirectDecays
     
     return excitation_ratio * level_ratio
 
 
+# Calculate the excitation ratios of a list of lines
+def batch_ExcRatio(lines: List[Line], exc_index: int) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the excitation ratios of a list of lines with the lookup tables of get_ExcRatio
+        
+        Args:
+            lines: the excitation data lines
+            exc_index: index of the excitation
+        
+        Returns:
+            ratios: the excitation ratio of each line
+    """
+    level_decays = generalVars.level_decayrates_exc[exc_index]
+    prefix_decays = generalVars.prefix_decayrates_exc[exc_index]
+    
+    keys = [line.keyI() for line in lines]
+    totals = np.array([prefix_decays.get(key[:2], (0.0, 0))[0] for key in keys])
+    counts = np.array([prefix_decays.get(key[:2], (0.0, 0))[1] for key in keys])
+    diagram = np.array([len(line.Shelli) == 4 for line in lines], dtype=np.bool_)
+    rates = np.array([level_decays.get(key, np.nan) if not shake else 0.0 for key, shake in zip(keys, diagram)])
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level_ratios = np.where(diagram, 1.0 / counts, rates / totals)
+    
+    return generalVars.ratio_decayrates_exc[exc_index] * level_ratios
+
+
 # Find the branching ratio from Auger process of a higher shell for the satellite transition
 def get_AugerBR(line: Line):
     """
@@ -182,9 +418,7 @@ def get_AugerBR(line: Line):
             BR: the branching ratio
     """
     if generalVars.ionizationssat is not None:
-        for level in generalVars.ionizationssat:
-                if line.filterInitialState(level):
-                    return level.br
+        return get_BRIndex('sat').get((line.Shelli, line.jji, line.eigvi), 0.0)
     
     return 0.0
 
@@ -201,13 +435,230 @@ def get_DiagramBR(line: Line):
             BR: the branching ratio
     """
     if generalVars.ionizationsrad is not None:
-        for level in generalVars.ionizationsrad:
-                if line.filterInitialState(level):
-                    return level.br
+        return get_BRIndex('rad').get((line.Shelli, line.jji, line.eigvi), 0.0)
     
     return 0.0
 
 
+# Get the branching ratio index of the ionization energies
+def get_BRIndex(levelType: str) -> Dict[Tuple[str, int, int], float]:
+    """
+    Function to get the hashed branching ratio index of the 1 hole or 2 hole ionization energies.
+    The index is built on the first lookup and rebuilt whenever the level list is replaced (e.g. when a new element is loaded).
+        
+        Args:
+            levelType: 'rad' for the 1 hole levels or 'sat' for the 2 hole levels
+        
+        Returns:
+            dictionary with the branching ratio of each initial state
+    """
+    if levelType == 'rad':
+        if generalVars.ionizationsrad_BRLevels is not generalVars.ionizationsrad:
+            generalVars.ionizationsrad_BR = buildBRIndex(generalVars.ionizationsrad)
+            generalVars.ionizationsrad_BRLevels = generalVars.ionizationsrad
+        
+        return generalVars.ionizationsrad_BR
+    else:
+        if generalVars.ionizationssat_BRLevels is not generalVars.ionizationssat:
+            generalVars.ionizationssat_BR = buildBRIndex(generalVars.ionizationssat)
+            generalVars.ionizationssat_BRLevels = generalVars.ionizationssat
+        
+        return generalVars.ionizationssat_BR
+
+
+# Find the branching ratios of a list of transitions
+def batch_BR(lines: List[Line], levelType: str) -> npt.NDArray[np.float64]:
+    """
+    Function to find the branching ratios of a list of transitions with the hashed index of the ionization energies
+        
+        Args:
+            lines: the data lines of the transitions
+            levelType: 'rad' to use the Diagram branching ratios or 'sat' to use the Auger branching ratios
+        
+        Returns:
+            BRs: the branching ratio of each transition (0 for the transitions without a matching level)
+    """
+    index = get_BRIndex(levelType)
+    return np.fromiter((index.get((line.Shelli, line.jji, line.eigvi), 0.0) for line in lines), dtype=np.float64, count=len(lines))
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#                  CASCADE BOOST ENGINE                     #
+#                                                           #
+# --------------------------------------------------------- #
+
+class CascadeGraph():
+    """
+    Class with the level feeding graph of a set of transition lists, used to calculate the cascade boosts.
+    Each level label points to the transitions that feed it (labelF), in the order of the transition lists,
+    and the cascade chains and branch boosts are memoised for each level.
+    """
+    def __init__(self, sources: List[Tuple[List[Line], str]]):
+        """
+        Args:
+            sources: list of (transition lines, 'rad' or 'sat') in the order they are searched.
+                     The second value selects between the Diagram and Auger branching ratios for the lines
+        """
+        self.labelsI: List[str] = []
+        """
+        Initial level label of each transition
+        """
+        self.BRs: List[float] = []
+        """
+        Branching ratio of each transition
+        """
+        self.feeders: Dict[str, List[int]] = {}
+        """
+        Indexes of the transitions that feed each level, in search order
+        """
+        
+        for lines, levelType in sources:
+            if lines is None:
+                continue
+            
+            offset = len(self.labelsI)
+            self.BRs.extend(batch_BR(lines, levelType).tolist())
+            for i, line in enumerate(lines):
+                self.labelsI.append(line.labelI())
+                self.feeders.setdefault(line.labelF(), []).append(offset + i)
+        
+        self.steps: Dict[str, Tuple[int, List[int]] | None] = {}
+        """
+        Memoised cascade step of each level: the transition that continues the cascade and the transitions that branch from it
+        """
+        self.chainBoosts: Dict[str, float] = {}
+        """
+        Memoised product of (1 + BR) along the cascade chain of each level
+        """
+        self.branchBoosts: Dict[str, Dict[str, float]] = {}
+        """
+        Memoised boosts of the branches spawned from the cascade chain of each level, summed by the level they start from
+        """
+    
+    def step(self, label: str) -> Tuple[int, List[int]] | None:
+        """
+        Function to get the next step of a cascade from a level.
+        The cascade continues with the first transition that feeds the level, and the later transitions
+        that feed the new level start new branches.
+        
+            Args:
+                label: label of the level
+            
+            Returns:
+                None if no transition feeds the level, otherwise the index of the transition that continues the cascade
+                and the indexes of the transitions that branch from the new level
+        """
+        if label not in self.steps:
+            feeders = self.feeders.get(label, [])
+            if len(feeders) == 0:
+                self.steps[label] = None
+            else:
+                first = feeders[0]
+                branches = self.feeders.get(self.labelsI[first], [])
+                self.steps[label] = (first, branches[bisect_right(branches, first):])
+        
+        return self.steps[label]
+    
+    def chain(self, label: str) -> List[int]:
+        """
+        Function to get the transitions that make the cascade chain from a level
+        
+            Args:
+                label: label of the level
+            
+            Returns:
+                indexes of the transitions in the chain
+        """
+        positions: List[int] = []
+        visited = {label}
+        
+        step = self.step(label)
+        while step is not None:
+            positions.append(step[0])
+            label = self.labelsI[step[0]]
+            # Stop the chain if the level feeding graph has a cycle
+            if label in visited:
+                break
+            
+            visited.add(label)
+            step = self.step(label)
+        
+        return positions
+    
+    def chainBoost(self, label: str) -> float:
+        """
+        Function to get the product of (1 + BR) along the cascade chain of a level
+        
+            Args:
+                label: label of the level
+            
+            Returns:
+                the chain boost
+        """
+        if label not in self.chainBoosts:
+            self.chainBoosts[label] = math.prod([self.BRs[p] + 1 for p in self.chain(label)])
+        
+        return self.chainBoosts[label]
+    
+    def branchBoost(self, label: str) -> Dict[str, float]:
+        """
+        Function to get the boosts of all branches spawned from the cascade chain of a level, including the nested branches
+        
+            Args:
+                label: label of the level
+            
+            Returns:
+                dictionary with the summed (boost - 1) of the branches that start from each level
+        """
+        if label in self.branchBoosts:
+            return self.branchBoosts[label]
+        
+        # Guard against cycles in the level feeding graph
+        self.branchBoosts[label] = {}
+        
+        boosts: Dict[str, float] = {}
+        node = label
+        for p in self.chain(label):
+            start = self.labelsI[p]
+            for q in self.step(node)[1]: # type: ignore
+                head = self.labelsI[q]
+                boosts[start] = boosts.get(start, 0.0) + (self.BRs[q] + 1) * self.chainBoost(head) - 1
+                for l, boost in self.branchBoost(head).items():
+                    boosts[l] = boosts.get(l, 0.0) + boost
+            
+            node = start
+        
+        self.branchBoosts[label] = boosts
+        return boosts
+    
+    def totalBoost(self, initial: str, rootBR: float) -> float:
+        """
+        Function to calculate the total cascade boost of a transition
+        
+            Args:
+                initial: label of the initial level of the transition
+                rootBR: branching ratio of the transition
+            
+            Returns:
+                the total boost
+        """
+        positions = self.chain(initial)
+        labels = [initial] + [self.labelsI[p] for p in positions]
+        BRs = [rootBR] + [self.BRs[p] for p in positions]
+        boosts = self.branchBoost(initial)
+        
+        totalBoost = 0.0
+        for l in labels[::-1]:
+            i = labels.index(l)
+            if l in boosts:
+                totalBoost += math.prod(BRs[i:]) + boosts[l]
+            else:
+                totalBoost = (totalBoost + 1) * (BRs[i] + 1) - 1
+        
+        return totalBoost
+
+
 def get_cascadeBoost(cascadeType: str):
     
     Initials: List[str] = []
@@ -215,257 +666,44 @@ def get_cascadeBoost(cascadeType: str):
     MatrixDict: Dict[str, float] = {}
     
     if cascadeType == 'diagram':
-        if len(generalVars.radBoostMatrixDict) == 0:
-            for level in generalVars.diagramwidths:
-                initial = level.labelI()
-                final = level.labelF()
-                Initials.append(initial)
-                Finals.append(final)
-                
-                MatrixDict[level.key()] = level.intensity
-                
-                cascades = [[initial]]
-                cascadesBRs = [[get_DiagramBR(level)]]
-                
-                casc_idx = 0
-                depth = 0
-                
-                while True:
-                    depth_found = False
-                    curr_cascade = cascades[casc_idx].copy()
-                    
-                    for line in generalVars.lineradrates:
-                        if line.labelF() == cascades[casc_idx][depth] and not depth_found:
-                            cascades[casc_idx].append(line.labelI())
-                            depth += 1
-                            depth_found = True
-                            
-                            cascadesBRs[casc_idx].append(get_DiagramBR(line))
-                        elif line.labelF() == cascades[casc_idx][depth] and depth_found:
-                            cascades.append([line.labelF(), line.labelI()])
-                            cascadesBRs.append([get_DiagramBR(line)])
-                    
-                    if curr_cascade == cascades[casc_idx]:
-                        if len(cascades) > casc_idx + 1:
-                            casc_idx += 1
-                            depth = 1
-                        else:
-                            break
-                
-                root_cascade_idx = 0
-                totalBoosts_perCascade: Dict[str, float] = {}
-                knots: Dict[str, int] = {}
-                for i, cascade in enumerate(cascades):
-                    if cascade[0] == initial:
-                        root_cascade_idx = i
-                    else:
-                        if cascade[0] not in totalBoosts_perCascade:
-                            totalBoosts_perCascade[cascade[0]] = math.prod([br + 1 for br in cascadesBRs[i]])
-                            knots[cascade[0]] = 0
-                        else:
-                            knots[cascade[0]] += 1
-                            totalBoosts_perCascade[cascade[0] + "_" + str(knots[cascade[0]])] = math.prod([br + 1 for br in cascadesBRs[i]])
-
-                totalBoost = 0.0
-                for l in cascades[root_cascade_idx][::-1]:
-                    i = cascades[root_cascade_idx].index(l)
-                    if l in totalBoosts_perCascade:
-                        preCascadeBoost = totalBoosts_perCascade[l] - 1
-                        
-                        if l in knots:
-                            for knot in range(knots[l]):
-                                preCascadeBoost += totalBoosts_perCascade[l + "_" + str(knot)] - 1
-                            
-                            totalBoost += math.prod(cascadesBRs[root_cascade_idx][i:]) + preCascadeBoost
-                    else:
-                        totalBoost = (totalBoost + 1) * (cascadesBRs[root_cascade_idx][i] + 1) - 1
-                
-                generalVars.radBoostMatrixDict[level.key()] = totalBoost
-        else:
-            for level in generalVars.diagramwidths:
-                initial = level.labelI()
-                final = level.labelF()
-                Initials.append(initial)
-                Finals.append(final)
-                
-                MatrixDict[level.key()] = level.intensity
+        levels = generalVars.diagramwidths
+        BoostMatrixDict = generalVars.radBoostMatrixDict
+        sources = [(generalVars.lineradrates, 'rad')]
+        get_BR = get_DiagramBR
     elif cascadeType == 'auger':
-        if len(generalVars.augBoostMatrixDict) == 0:
-            for level in generalVars.augerwidths:
-                initial = level.labelI()
-                final = level.labelF()
-                Initials.append(initial)
-                Finals.append(final)
-                
-                MatrixDict[level.key()] = level.intensity
-                
-                cascades = [[initial]]
-                cascadesBRs = [[get_DiagramBR(level)]]
-                
-                casc_idx = 0
-                depth = 0
-                
-                while True:
-                    depth_found = False
-                    curr_cascade = cascades[casc_idx].copy()
-                    
-                    for line in generalVars.lineauger:
-                        if line.labelF() == cascades[casc_idx][depth] and not depth_found:
-                            cascades[casc_idx].append(line.labelI())
-                            depth += 1
-                            depth_found = True
-                            
-                            cascadesBRs[casc_idx].append(get_DiagramBR(line))
-                        elif line.labelF() == cascades[casc_idx][depth] and depth_found:
-                            cascades.append([line.labelF(), line.labelI()])
-                            cascadesBRs.append([get_DiagramBR(line)])
-                    
-                    for line in generalVars.lineradrates:
-                        if line.labelF() == cascades[casc_idx][depth] and not depth_found:
-                            cascades[casc_idx].append(line.labelI())
-                            depth += 1
-                            depth_found = True
-                            
-                            cascadesBRs[casc_idx].append(get_DiagramBR(line))
-                        elif line.labelF() == cascades[casc_idx][depth] and depth_found:
-                            cascades.append([line.labelF(), line.labelI()])
-                            cascadesBRs.append([get_DiagramBR(line)])
-                    
-                    if curr_cascade == cascades[casc_idx]:
-                        if len(cascades) > casc_idx + 1:
-                            casc_idx += 1
-                            depth = 1
-                        else:
-                            break
-                
-                root_cascade_idx = 0
-                totalBoosts_perCascade: Dict[str, float] = {}
-                knots: Dict[str, int] = {}
-                for i, cascade in enumerate(cascades):
-                    if cascade[0] == initial:
-                        root_cascade_idx = i
-                    else:
-                        if cascade[0] not in totalBoosts_perCascade:
-                            totalBoosts_perCascade[cascade[0]] = math.prod([br + 1 for br in cascadesBRs[i]])
-                            knots[cascade[0]] = 0
-                        else:
-                            knots[cascade[0]] += 1
-                            totalBoosts_perCascade[cascade[0] + "_" + str(knots[cascade[0]])] = math.prod([br + 1 for br in cascadesBRs[i]])
-
-                totalBoost = 0.0
-                for l in cascades[root_cascade_idx][::-1]:
-                    i = cascades[root_cascade_idx].index(l)
-                    if l in totalBoosts_perCascade:
-                        preCascadeBoost = totalBoosts_perCascade[l] - 1
-                        
-                        if l in knots:
-                            for knot in range(knots[l]):
-                                preCascadeBoost += totalBoosts_perCascade[l + "_" + str(knot)] - 1
-                            
-                            totalBoost += math.prod(cascadesBRs[root_cascade_idx][i:]) + preCascadeBoost
-                    else:
-                        totalBoost = (totalBoost + 1) * (cascadesBRs[root_cascade_idx][i] + 1) - 1
-                
-                generalVars.augBoostMatrixDict[level.key()] = totalBoost
-        else:
-            for level in generalVars.augerwidths:
-                initial = level.labelI()
-                final = level.labelF()
-                Initials.append(initial)
-                Finals.append(final)
-                
-                MatrixDict[level.key()] = level.intensity
+        levels = generalVars.augerwidths
+        BoostMatrixDict = generalVars.augBoostMatrixDict
+        sources = [(generalVars.lineauger, 'rad'), (generalVars.lineradrates, 'rad')]
+        get_BR = get_DiagramBR
     elif cascadeType == 'satellite':
-        if len(generalVars.satBoostMatrixDict) == 0:
-            for level in generalVars.satellitewidths:
-                initial = level.labelI()
-                final = level.labelF()
-                Initials.append(initial)
-                Finals.append(final)
-                
-                MatrixDict[level.key()] = level.intensity
-                
-                cascades = [[initial]]
-                cascadesBRs = [[get_AugerBR(level)]]
-                
-                casc_idx = 0
-                depth = 0
-                
-                while True:
-                    depth_found = False
-                    curr_cascade = cascades[casc_idx].copy()
-                    
-                    for line in generalVars.linesatellites:
-                        if line.labelF() == cascades[casc_idx][depth] and not depth_found:
-                            cascades[casc_idx].append(line.labelI())
-                            depth += 1
-                            depth_found = True
-                            
-                            cascadesBRs[casc_idx].append(get_AugerBR(line))
-                        elif line.labelF() == cascades[casc_idx][depth] and depth_found:
-                            cascades.append([line.labelF(), line.labelI()])
-                            cascadesBRs.append([get_AugerBR(line)])
-                    
-                    for line in generalVars.lineauger:
-                        if line.labelF() == cascades[casc_idx][depth] and not depth_found:
-                            cascades[casc_idx].append(line.labelI())
-                            depth += 1
-                            depth_found = True
-                            
-                            cascadesBRs[casc_idx].append(get_DiagramBR(line))
-                        elif line.labelF() == cascades[casc_idx][depth] and depth_found:
-                            cascades.append([line.labelF(), line.labelI()])
-                            cascadesBRs.append([get_DiagramBR(line)])
-                    
-                    for line in generalVars.lineradrates:
-                        if line.labelF() == cascades[casc_idx][depth] and not depth_found:
-                            cascades[casc_idx].append(line.labelI())
-                            depth += 1
-                            depth_found = True
-                            
-                            cascadesBRs[casc_idx].append(get_DiagramBR(line))
-                        elif line.labelF() == cascades[casc_idx][depth] and depth_found:
-                            cascades.append([line.labelF(), line.labelI()])
-                            cascadesBRs.append([get_DiagramBR(line)])
-                    
-                    if curr_cascade == cascades[casc_idx]:
-                        if len(cascades) > casc_idx + 1:
-                            casc_idx += 1
-                            depth = 1
-                        else:
-                            break
-                
-                root_cascade_idx = 0
-                totalBoosts_perCascade: Dict[str, float] = {}
-                knots: Dict[str, int] = {}
-                for i, cascade in enumerate(cascades):
-                    if cascade[0] == initial:
-                        root_cascade_idx = i
-                    else:
-                        if cascade[0] not in totalBoosts_perCascade:
-                            totalBoosts_perCascade[cascade[0]] = math.prod([br + 1 for br in cascadesBRs[i]])
-                            knots[cascade[0]] = 0
-                        else:
-                            knots[cascade[0]] += 1
-                            totalBoosts_perCascade[cascade[0] + "_" + str(knots[cascade[0]])] = math.prod([br + 1 for br in cascadesBRs[i]])
-
-                totalBoost = 0.0
-                for l in cascades[root_cascade_idx][::-1]:
-                    i = cascades[root_cascade_idx].index(l)
-                    if l in totalBoosts_perCascade:
-                        preCascadeBoost = totalBoosts_perCascade[l] - 1
-                        
-                        if l in knots:
-                            for knot in range(knots[l]):
-                                preCascadeBoost += totalBoosts_perCascade[l + "_" + str(knot)] - 1
-                            
-                            totalBoost += math.prod(cascadesBRs[root_cascade_idx][i:]) + preCascadeBoost
-                    else:
-                        totalBoost = (totalBoost + 1) * (cascadesBRs[root_cascade_idx][i] + 1) - 1
-                
-                generalVars.satBoostMatrixDict[level.key()] = totalBoost
+        levels = generalVars.satellitewidths
+        BoostMatrixDict = generalVars.satBoostMatrixDict
+        sources = [(generalVars.linesatellites, 'sat'), (generalVars.lineauger, 'rad'), (generalVars.lineradrates, 'rad')]
+        get_BR = get_AugerBR
     else:
         raise RuntimeError("Error: unexpected cascade boost type: " + cascadeType + ". Implemented types are diagram, auger and satellite.")
     
+    if len(BoostMatrixDict) == 0:
+        # Build the level feeding graph once for all levels
+        graph = CascadeGraph(sources)
+        
+        for level in levels:
+            initial = level.labelI()
+            final = level.labelF()
+            Initials.append(initial)
+            Finals.append(final)
+            
+            MatrixDict[level.key()] = level.intensity
+            
+            BoostMatrixDict[level.key()] = graph.totalBoost(initial, get_BR(level))
+    elif cascadeType != 'satellite':
+        for level in levels:
+            initial = level.labelI()
+            final = level.labelF()
+            Initials.append(initial)
+            Finals.append(final)
+            
+            MatrixDict[level.key()] = level.intensity
+    
     
     return Initials, Finals, MatrixDict
@@ -0,0 +1,118 @@
+"""
+Module with the normalised beam overlap functions.
+In units of the level half width the overlaps only depend on the detuning of the beam and the ratio between the beam FWHM and the level width.
+"""
+
+from __future__ import annotations
+
+from simulation.batch import maxBlockSize
+
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from scipy.special import erf
+from scipy.integrate import simpson
+
+
+overlapRange: float = 100.0
+"""
+Integration range of the radiative overlap, in level half widths around the formation energy (50 partial widths)
+"""
+overlapRange_exc: float = 200.0
+"""
+Integration range of the excitation overlap, in level half widths around the formation energy (100 partial widths)
+"""
+overlapGrid_exc: npt.NDArray[np.float64] = np.linspace(-overlapRange_exc, overlapRange_exc, 10001, endpoint=True)
+"""
+Shared simpson integration grid of the excitation overlap, in level half widths around the formation energy
+"""
+
+# --------------------------------------------------------- #
+#                                                           #
+#              NORMALISED OVERLAP FUNCTIONS                 #
+#                                                           #
+# --------------------------------------------------------- #
+
+# Convert the level and beam values to the normalised overlap coordinates
+def normalise(formationEnergy: npt.NDArray[np.float64] | float, pWidth: npt.NDArray[np.float64] | float,
+              beam: float, FWHM: float) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Function to convert the level and beam values to the normalised overlap coordinates
+
+        Args:
+            formationEnergy: energy necessary to reach each level
+            pWidth: partial width of each level
+            beam: the beam energy introduced in the interface
+            FWHM: the beam energy FWHM introduced in the interface
+
+        Returns:
+            detuning: beam energy detuning from the formation energy, in level half widths
+            ratio: ratio between the beam FWHM and the level half width
+    """
+    halfWidth = 0.5 * np.asarray(pWidth, dtype=np.float64)
+
+    detuning = (beam - np.asarray(formationEnergy, dtype=np.float64)) / halfWidth
+    ratio = FWHM / halfWidth
+
+    return detuning, ratio
+
+# Calculate the radiative overlap in normalised coordinates
+def normalised_overlap(detuning: npt.NDArray[np.float64], ratio: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the radiative overlap in normalised coordinates.
+    Below the beam energy the integrand is the level lorentzian and above it is the beam gaussian at the lorentzian peak,
+    so both parts of the integral are evaluated analytically.
+
+        Args:
+            detuning: beam energy detuning from the formation energy, in level half widths
+            ratio: ratio between the beam FWHM and the level half width
+
+        Returns:
+            overlap: the overlap of each level
+    """
+    detuning = np.asarray(detuning, dtype=np.float64)
+    ratio = np.asarray(ratio, dtype=np.float64)
+
+    # Lorentzian part up to the beam energy
+    lorentz = (np.arctan(np.clip(detuning, -overlapRange, overlapRange)) + np.arctan(overlapRange)) / np.pi
+
+    # Gaussian part from the beam energy up to the end of the integration range
+    sqrtLn2 = np.sqrt(np.log(2))
+    low = np.maximum(detuning, -overlapRange)
+    gauss = 0.5 * ratio / np.sqrt(np.pi * np.log(2)) * \
+            (erf(sqrtLn2 * (overlapRange - detuning) / ratio) - erf(sqrtLn2 * (low - detuning) / ratio))
+
+    return lorentz + np.where(detuning < overlapRange, gauss, 0.0)
+
+# Calculate the excitation overlap in normalised coordinates
+def normalised_overlap_exc(detuning: npt.NDArray[np.float64], ratio: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the resonant excitation overlap in normalised coordinates.
+    The minimum of the level lorentzian and the beam gaussian is integrated for all levels at once with a shared simpson rule.
+
+        Args:
+            detuning: beam energy detuning from the formation energy, in level half widths
+            ratio: ratio between the beam FWHM and the level half width
+
+        Returns:
+            overlap: the overlap of each level
+    """
+    detuning, ratio = np.broadcast_arrays(np.asarray(detuning, dtype=np.float64), np.asarray(ratio, dtype=np.float64))
+    shape = detuning.shape
+    detuning = detuning.ravel()
+    ratio = ratio.ravel()
+
+    t = overlapGrid_exc
+    lorentz = 1.0 / (1.0 + t ** 2)
+
+    overlap: npt.NDArray[np.float64] = np.empty(len(detuning))
+    block: int = max(1, maxBlockSize // len(t))
+    for start in range(0, len(detuning), block):
+        stop = start + block
+        gauss = np.exp(-np.log(2) * ((t[np.newaxis, :] - detuning[start:stop, np.newaxis]) / ratio[start:stop, np.newaxis]) ** 2)
+        overlap[start:stop] = simpson(np.minimum(lorentz[np.newaxis, :], gauss), x=t, axis=-1) / np.pi
+
+    return overlap.reshape(shape)
+
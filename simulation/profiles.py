@@ -11,7 +11,7 @@ import numpy as np
 from scipy.special import wofz
 
 
-from typing import List
+from typing import Dict, List
 import numpy.typing as npt
 
 from pybaselines import Baseline
@@ -31,6 +31,28 @@ from scipy.special import erf
 #                                                           #
 # --------------------------------------------------------- #
 
+# The profile constants are python floats so they keep the precision of the arrays they multiply (numpy scalars would promote float32 arrays)
+ln2: float = float(np.log(2))
+"""
+Natural logarithm of 2
+"""
+sqrtLn2Pi: float = float(np.sqrt(np.log(2) / np.pi))
+"""
+Normalization constant of the gaussian profile, sqrt(ln(2) / pi)
+"""
+sqrt2: float = float(np.sqrt(2))
+"""
+Square root of 2
+"""
+sqrt2Pi: float = float(np.sqrt(2 * np.pi))
+"""
+Normalization constant of the voigt profile, sqrt(2 pi)
+"""
+sqrt2Ln2: float = float(np.sqrt(2 * np.log(2)))
+"""
+Ratio between the gaussian HWHM and its standard deviation, sqrt(2 ln(2))
+"""
+
 # Gaussian profile
 def G(T: npt.NDArray[np.float64], energy: float, intens: float, res: float, width: float):
     """ 
@@ -46,7 +68,7 @@ def G(T: npt.NDArray[np.float64], energy: float, intens: float, res: float, widt
         Returns:
             y: list of y values for each of the x values in T
     """
-    y: npt.NDArray[np.float64] = intens * np.sqrt(np.log(2) / np.pi) / (res + width) * np.exp(-((T - energy) / (res + width)) ** 2 * np.log(2))
+    y: npt.NDArray[np.float64] = intens * sqrtLn2Pi / (res + width) * np.exp(-((T - energy) / (res + width)) ** 2 * ln2)
     
     return y
 
@@ -69,10 +91,106 @@ def L(T: npt.NDArray[np.float64], energy: float, intens: float, res: float, widt
     
     return y
 
+voigtModes: Dict[str, str] = {'Voigt': 'Faddeeva', 'Voigt (Humlicek)': 'Humlicek', 'Pseudo-Voigt': 'Pseudo'}
+"""
+Voigt implementation used for each of the voigt profile types that can be selected in the interface or headless config
+"""
+
+# Humlicek approximation of the Faddeeva function
+def humlicek(z: npt.NDArray[np.complex128]) -> npt.NDArray[np.complex128]:
+    """
+    Function to calculate the Faddeeva function w(z) for Im(z) >= 0 with the region based W4 rational approximation from
+    J. Humlicek, J. Quant. Spectrosc. Radiat. Transfer 27 (1982) 437. The relative error is below 1E-4 across the plane.
+        
+        Args:
+            z: complex values where to calculate the function
+        
+        Returns:
+            w: values of the Faddeeva function
+    """
+    # Keep single precision arguments in complex64
+    z = np.asarray(z, dtype=np.result_type(z, np.complex64))
+    shape = z.shape
+    z = z.ravel()
+    
+    t: npt.NDArray[np.complex128] = z.imag - 1j * z.real
+    s: npt.NDArray[np.float64] = np.abs(z.real) + z.imag
+    w: npt.NDArray[np.complex128] = np.empty_like(z)
+    
+    # Region I: far from the center, one term asymptotic expansion
+    r = s >= 15.0
+    tr = t[r]
+    w[r] = tr * 0.5641896 / (0.5 + tr * tr)
+    
+    # Region II
+    r = (s < 15.0) & (s >= 5.5)
+    tr = t[r]
+    u = tr * tr
+    w[r] = tr * (1.410474 + u * 0.5641896) / (0.75 + u * (3.0 + u))
+    
+    # Region III
+    r = (s < 5.5) & (z.imag >= 0.195 * np.abs(z.real) - 0.176)
+    tr = t[r]
+    w[r] = (16.4955 + tr * (20.20933 + tr * (11.96482 + tr * (3.778987 + tr * 0.5642236)))) / \
+            (16.4955 + tr * (38.82363 + tr * (39.27121 + tr * (21.69274 + tr * (6.699398 + tr)))))
+    
+    # Region IV: close to the real axis
+    r = (s < 5.5) & (z.imag < 0.195 * np.abs(z.real) - 0.176)
+    tr = t[r]
+    u = tr * tr
+    w[r] = np.exp(u) - tr * (36183.31 - u * (3321.9905 - u * (1540.787 - u * (219.0313 - u * (35.76683 - u * (1.320522 - u * 0.56419)))))) / \
+            (32066.6 - u * (24322.84 - u * (9022.228 - u * (2186.181 - u * (364.2191 - u * (61.57037 - u * (1.841439 - u)))))))
+    
+    return w.reshape(shape)
+
+# Width and mixing of the pseudo-Voigt profile
+def pseudoV_mixing(res, width):
+    """
+    Function to calculate the common FWHM and the lorentzian fraction of the Thompson-Cox-Hastings pseudo-Voigt
+        
+        Args:
+            res: experimental resolution to be added to the profile width
+            width: natural width of the transition for the profile
+        
+        Returns:
+            f: FWHM of the gaussian and lorentzian components
+            eta: fraction of the lorentzian component
+    """
+    fG = 2 * res
+    fL = width
+    f = (fG ** 5 + 2.69269 * fG ** 4 * fL + 2.42843 * fG ** 3 * fL ** 2 + 4.47163 * fG ** 2 * fL ** 3 + 0.07842 * fG * fL ** 4 + fL ** 5) ** (1 / 5)
+    r = fL / f
+    eta = 1.36603 * r - 0.47719 * r ** 2 + 0.11116 * r ** 3
+    
+    return f, eta
+
+# Pseudo-Voigt profile
+def pseudoV(T: npt.NDArray[np.float64], energy: float, intens: float, res: float, width: float):
+    """ 
+    Function to calculate the Thompson-Cox-Hastings pseudo-Voigt approximation of the Voigt line shape.
+    The profile is a mixture of a gaussian and a lorentzian with a common FWHM. The maximum error is about 1% of the peak value.
+        
+        Args:
+            T: list of x values for which we want the y values of the profile
+            energy: x value of the profile center
+            intens: hight of the profile
+            res: experimental resolution to be added to the profile width
+            width: natural width of the transition for the profile
+        
+        Returns:
+            y: list of y values for each of the x values in T
+    """
+    f, eta = pseudoV_mixing(res, width)
+    
+    y: npt.NDArray[np.float64] = eta * L(T, energy, intens, 0.0, f) + (1 - eta) * G(T, energy, intens, 0.0, f / 2)
+    
+    return y
+
 # Voigt profile
 def V(T: npt.NDArray[np.float64], energy: float, intens: float, res: float, width: float):
     """ 
-    Function to calculate the Voigt line shape at x with HWHM alpha
+    Function to calculate the Voigt line shape at x with HWHM alpha.
+    The implementation used is selected by generalVars.voigtMode (Faddeeva, Humlicek or Pseudo).
         
         Args:
             T: list of x values for which we want the y values of the profile
@@ -84,11 +202,90 @@ def V(T: npt.NDArray[np.float64], energy: float, intens: float, res: float, widt
         Returns:
             y: list of y values for each of the x values in T
     """
-    sigma: float = res / np.sqrt(2 * np.log(2))
-    y: npt.NDArray[np.float64] = np.real(intens * wofz(complex(T - energy, width / 2) / sigma / np.sqrt(2))) / sigma / np.sqrt(2 * np.pi)
+    if generalVars.voigtMode == 'Pseudo':
+        return pseudoV(T, energy, intens, res, width)
+    
+    sigma: float = res / sqrt2Ln2
+    # Build the complex argument element-wise so that energy, intens and width can also be broadcast arrays
+    z = (T - energy + 1j * (width / 2)) / sigma / sqrt2
+    
+    if generalVars.voigtMode == 'Humlicek':
+        y: npt.NDArray[np.float64] = np.real(intens * humlicek(z)) / sigma / sqrt2Pi
+    else:
+        y = np.real(intens * wofz(z)) / sigma / sqrt2Pi
     
     return y
 
+# Support of the truncated profiles
+def profile_support(profile, intens: npt.NDArray[np.float64], res: float, width: npt.NDArray[np.float64],
+                    num_widths: float, tolerance: float):
+    """
+    Function to calculate the region around each line center where the profile needs to be evaluated.
+    Inside the core the profile is evaluated exactly. Between the core and the tail limit the voigt profiles
+    are replaced by their analytic far-field tail, intens * gamma / pi / (T - energy) ** 2, whose relative error with respect
+    to the exact profile is about (3 sigma ** 2 - gamma ** 2) / (T - energy) ** 2, so the core is extended until the error
+    of the tail is below the tolerance. In Pseudo mode the tail is the one of the lorentzian component of the pseudo-voigt,
+    eta * intens * (f / 2) / pi / (T - energy) ** 2, with the FWHM f and lorentzian fraction eta of pseudoV.
+    The lorentzian has no tail region, as its exact evaluation costs the same as the tail.
+    Outside the tail limit the profile is below tolerance times its peak value and is not evaluated.
+
+        Args:
+            profile: profile function (G, L or V)
+            intens: hight of each profile
+            res: experimental resolution to be added to the profile width
+            width: natural width of each profile
+            num_widths: number of (natural + instrumental) widths of the core around each line center
+            tolerance: relative error tolerance with respect to the peak of each profile
+
+        Returns:
+            core: half width of the region where each profile is evaluated exactly
+            tail_coeff: coefficient of the analytic 1 / (T - energy) ** 2 tail for each profile (0 for the gaussian and lorentzian)
+            tail: half width of the region where the tail of each profile is evaluated
+    """
+    core: npt.NDArray[np.float64] = num_widths * (res + width)
+    log_tol: float = np.log(1 / tolerance)
+
+    if profile is G:
+        # Extend the core until the gaussian falls below the tolerance
+        core = np.maximum(core, (res + width) * np.sqrt(log_tol / ln2))
+        tail_coeff: npt.NDArray[np.float64] = np.zeros_like(core)
+        peak: npt.NDArray[np.float64] = np.ones_like(core)
+    elif profile is L:
+        # Extend the core until the lorentzian falls below the tolerance
+        gamma: npt.NDArray[np.float64] = 0.5 * (width + res)
+        core = np.maximum(core, gamma / np.sqrt(tolerance))
+        tail_coeff = np.zeros_like(core)
+        peak = intens / (np.pi * gamma)
+    elif generalVars.voigtMode == 'Pseudo':
+        f, eta = pseudoV_mixing(res, width)
+        gamma = f / 2
+        sigma = gamma / sqrt2Ln2
+        # Extend the core until the gaussian component of the pseudo-voigt falls below the tolerance
+        core = np.maximum(core, sigma * np.sqrt(2 * log_tol))
+        # The tail of the pseudo-voigt is the tail of its lorentzian component, whose relative error is gamma ** 2 / (T - energy) ** 2
+        tail_coeff = eta * intens * gamma / np.pi
+        peak = eta * intens / (np.pi * gamma) + (1 - eta) * intens * sqrtLn2Pi / gamma
+        tail_error = np.divide(tail_coeff * gamma ** 2, tolerance * peak,
+                               out=np.zeros_like(core), where=peak > 0)
+        core = np.maximum(core, tail_error ** 0.25)
+    else:
+        sigma: float = res / sqrt2Ln2
+        gamma = width / 2
+        # Extend the core until the gaussian component of the voigt falls below the tolerance
+        core = np.maximum(core, sigma * np.sqrt(2 * log_tol))
+        tail_coeff = intens * gamma / np.pi
+        peak = np.real(intens * wofz(1j * gamma / sigma / sqrt2)) / sigma / sqrt2Pi
+        # Extend the core until the error of the analytic tail, tail_coeff * |3 sigma^2 - gamma^2| / (T - energy) ** 4, is below the tolerance
+        tail_error = np.divide(tail_coeff * np.abs(3 * sigma ** 2 - gamma ** 2), tolerance * peak,
+                               out=np.zeros_like(core), where=peak > 0)
+        core = np.maximum(core, tail_error ** 0.25)
+
+    tail: npt.NDArray[np.float64] = np.copy(core)
+    has_tail = (tail_coeff > 0) & (peak > 0)
+    tail[has_tail] = np.maximum(core[has_tail], np.sqrt(tail_coeff[has_tail] / (tolerance * peak[has_tail])))
+
+    return core, tail_coeff, tail
+
 def background_SNIP(xvals: List[float], yvals: List[float],
                     decreasing: bool = False, max_half_window: int = int(len(generalVars.exp_x) / 15),
                     smooth_half_window: int = 1, num_points: int = 500, newx: List[float] = []):
@@ -8,7 +8,7 @@ import interface.variables as guiVars
 
 import data.variables as generalVars
 
-from simulation.lineUpdater import updateSatTransitionVals
+from simulation.lineUpdater import updateSatTransitionVals, groupSatelliteLines
 
 from interface.plotters import stem_ploter
 
@@ -18,6 +18,8 @@ from simulation.shake import calculateTotalShake, get_shakeoff, get_shakeup
 
 from data.definitions import Line, processLine
 
+from utils.misc.progress import get_reporter
+
 from typing import List
 
 #GUI Imports for warnings
@@ -68,6 +70,7 @@ def stick_satellite(sim: Toplevel | None, graph_area: Axes | None, sat_stick_val
 
     # Initialize a variable to control the progress bar
     b1 = 0
+    reporter = get_reporter(sim)
     
     # Extract the energy values
     x = [row.energy for row in sat_stick_val if len(row.Shelli) <= 4]
@@ -121,9 +124,7 @@ def stick_satellite(sim: Toplevel | None, graph_area: Axes | None, sat_stick_val
         
         # Update the progress bar
         b1 += 100 / len(generalVars.label1)
-        guiVars.progress_var.set(b1) # type: ignore
-        if sim:
-            sim.update_idletasks()
+        reporter.update(b1, force=ind == len(generalVars.label1) - 1)
     
     return bad, graph_area
 
@@ -167,17 +168,20 @@ def simu_sattelite(sat_sim_val: List[Line], low_level: str, high_level: str,
         if len(generalVars.satBoostMatrixDict) == 0:
             get_cascadeBoost('satellite')
     
+    # Group the satellite lines of each shake level (key) in one pass, reusing the groups of previous simulations
+    sat_groups = groupSatelliteLines(low_level, sat_sim_val)
+    
     # SHAKE-OFF
     # Loop the shake labels read from the shake weights file
     for ind, key in enumerate(generalVars.label1):
-        # Filter the specific combination of radiative transition and shake level (key) to simulate
-        sat_sim_val_ind = updateSatTransitionVals(low_level, high_level, key, sat_sim_val, True)
+        # Get the specific combination of radiative transition and shake level (key) to simulate
+        sat_sim_val_ind, sat_sim_val_off, _ = sat_groups[key]
         
         # Check if there is at least one satellite transition
         if len(sat_sim_val_ind) > 0:
             # Extract the energies, intensities and widths of the transition (different j and eigv)
-            x1s = [row.energy for row in sat_sim_val_ind if len(row.Shelli) <= 4]
-            w1s = [row.totalWidth for row in sat_sim_val_ind if len(row.Shelli) <= 4]
+            x1s = [row.energy for row in sat_sim_val_off]
+            w1s = [row.totalWidth for row in sat_sim_val_off]
             
             if calc_int:
                 if exc_mech == 'EII':
@@ -191,14 +195,14 @@ def simu_sattelite(sat_sim_val: List[Line], low_level: str, high_level: str,
                 
                 if element == '':
                     y1s = [row.effectiveIntensity(beam, FWHM, crossSection, casc, 'satellite',
-                                                  key, shake_amps, exc_index=exc_index) for row in sat_sim_val_ind if len(row.Shelli) <= 4]
+                                                  key, shake_amps, exc_index=exc_index) for row in sat_sim_val_off]
                 else:
                     y1s = [row.effectiveIntensity(beam, FWHM, crossSection, casc, 'satellite',
                                                 key, shake_amps,
                                                 shakeoff_lines=generalVars.shakeoff_quant[element],
                                                 shakeup_lines=generalVars.shakeup_quant[element],
                                                 shakeup_splines=generalVars.shakeUPSplines_quant[element],
-                                                shake_missing=generalVars.missing_shakeup_quant[element]) for row in sat_sim_val_ind if len(row.Shelli) <= 4]
+                                                shake_missing=generalVars.missing_shakeup_quant[element]) for row in sat_sim_val_off]
                 
                 ys_inds.append(y1s)
             
@@ -213,15 +217,15 @@ def simu_sattelite(sat_sim_val: List[Line], low_level: str, high_level: str,
     if generalVars.Shakeup_exists:
         # Loop the shake labels read from the shake weights file
         for ind, key in enumerate(generalVars.label1):
-            # Filter the specific combination of radiative transition and shake level (key) to simulate
-            sat_sim_val_ind = updateSatTransitionVals(low_level, high_level, key, sat_sim_val, True)
+            # Get the specific combination of radiative transition and shake level (key) to simulate
+            sat_sim_val_ind, _, sat_sim_val_up = sat_groups[key]
             # sat_sim_val_ind = updateSatTransitionVals(low_level, high_level, key, sat_sim_val)
             
             # Check if there is at least one satellite transition
             if len(sat_sim_val_ind) > 0:
                 # Extract the energies, intensities and widths of the transition (different j and eigv)
-                x1s = [row.energy for row in sat_sim_val_ind if len(row.Shelli) > 4]
-                w1s = [row.totalWidth for row in sat_sim_val_ind if len(row.Shelli) > 4]
+                x1s = [row.energy for row in sat_sim_val_up]
+                w1s = [row.totalWidth for row in sat_sim_val_up]
                 
                 if calc_int:
                     if exc_mech == 'EII':
@@ -235,14 +239,14 @@ def simu_sattelite(sat_sim_val: List[Line], low_level: str, high_level: str,
                     
                     if element == '':
                         y1s = [row.effectiveIntensity(beam, FWHM, crossSection, False,
-                                                    'shakeup', key, shake_amps) for row in sat_sim_val_ind if len(row.Shelli) > 4]
+                                                    'shakeup', key, shake_amps) for row in sat_sim_val_up]
                     else:
                         y1s = [row.effectiveIntensity(beam, FWHM, crossSection, False,
                                                     'shakeup', key, shake_amps,
                                                     shakeoff_lines=generalVars.shakeoff_quant[element],
                                                     shakeup_lines=generalVars.shakeup_quant[element],
                                                     shakeup_splines=generalVars.shakeUPSplines_quant[element],
-                                                    shake_missing=generalVars.missing_shakeup_quant[element]) for row in sat_sim_val_ind if len(row.Shelli) > 4]
+                                                    shake_missing=generalVars.missing_shakeup_quant[element]) for row in sat_sim_val_up]
                     
                     ys_inds.append(y1s)
                 
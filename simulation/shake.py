@@ -8,11 +8,14 @@ from __future__ import annotations
 import data.variables as generalVars
 import interface.variables as guiVars
 
-from data.definitions import Line
+from data.definitions import Line, filterLines, lineFieldValues
 
 from scipy.interpolate import interp1d
 
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+import numpy as np
+import numpy.typing as npt
 
 
 # --------------------------------------------------------- #
@@ -81,6 +84,11 @@ def setupShake(sat_lines: List[Line] | None = [], up_lines: List[Line] | None =
     else:
         up_flag = generalVars.Shakeup_exists
     
+    # Build the numeric shake tables used in the intensity calculations
+    get_shakeoffTable(shakeoff)
+    if up_flag:
+        get_shakeupTable(shakeup)
+    
     if up_flag:
         shakeValues = {}
         shakeOrbitals = {}
@@ -97,25 +105,37 @@ def setupShake(sat_lines: List[Line] | None = [], up_lines: List[Line] | None =
         for key in shakeValues:
             generalVars.shakeUPSplines[key] = interp1d(shakeOrbitals[key], shakeValues[key])
         
+        build_shakeupGrid(generalVars.shakeUPSplines, generalVars.missing_shakeup)
+        
         # Setup the missing shake-up probabilities
         
-        existing_shakeups = dict.fromkeys([row.Shelli[2:4] + "_" + str(row.jji) for row in shkup_lines], 0.0)
-        total_per_excitation = dict.fromkeys([row.Shelli[4:] for row in shkup_lines], 0.0)
+        # Read the fields of the shake-up lines as columns, without creating a line object for each row
+        shelli, jji, intensity = lineFieldValues(shkup_lines, 'Shelli', 'jji', 'intensity')
+        
+        existing_shakeups = dict.fromkeys([Shelli[2:4] + "_" + str(jj) for Shelli, jj in zip(shelli, jji)], 0.0)
+        total_per_excitation = dict.fromkeys([Shelli[4:] for Shelli in shelli], 0.0)
         found_excitations = {}
+        found_indexes: List[int] = []
         
-        for row in shkup_lines:
-            key = row.Shelli[2:4]
-            if key + "_" + str(row.jji) not in found_excitations:
-                found_excitations[key + "_" + str(row.jji)] = []
+        for i, (Shelli, jj, inty) in enumerate(zip(shelli, jji, intensity)):
+            key = Shelli[2:4]
+            if key + "_" + str(jj) not in found_excitations:
+                found_excitations[key + "_" + str(jj)] = []
             
-            if row.Shelli[4:] not in total_per_excitation:
-                total_per_excitation[row.Shelli[4:]] = row.intensity
+            if Shelli[4:] not in total_per_excitation:
+                total_per_excitation[Shelli[4:]] = inty
             else:
-                total_per_excitation[row.Shelli[4:]] += row.intensity
+                total_per_excitation[Shelli[4:]] += inty
             
-            if row.Shelli[4:-1] not in found_excitations[key + "_" + str(row.jji)]:
-                existing_shakeups[key + "_" + str(row.jji)] += get_shakeup(key, row.Shelli[4:], row.jji)
-                found_excitations[key + "_" + str(row.jji)].append(row.Shelli[4:-1])
+            if Shelli[4:-1] not in found_excitations[key + "_" + str(jj)]:
+                found_indexes.append(i)
+                found_excitations[key + "_" + str(jj)].append(Shelli[4:-1])
+        
+        # Look up the shake-up probabilities of the first line of each excitation in one batch
+        found_rows: List[Line] = [shkup_lines[i] for i in found_indexes]
+        found_keys = [row.Shelli[2:4] for row in found_rows]
+        for key, row, prob in zip(found_keys, found_rows, get_shakeup_batch(found_keys, found_rows)):
+            existing_shakeups[key + "_" + str(row.jji)] += prob
         
         # Setup the shake-up ratios between excitations
         for exc in total_per_excitation:
@@ -131,6 +151,9 @@ def setupShake(sat_lines: List[Line] | None = [], up_lines: List[Line] | None =
         for key in existing_shakeups:
             generalVars.missing_shakeup[key] = (shakeup_sums[key] - existing_shakeups[key]) / len(found_excitations[key])
         
+        # Fold the new missing shake-up probabilities into the tabulated probabilities
+        build_shakeupGrid(generalVars.shakeUPSplines, generalVars.missing_shakeup)
+        
         # Setup shakeup relations
         
         for shake1 in shakeup:
@@ -147,8 +170,8 @@ def setupShake(sat_lines: List[Line] | None = [], up_lines: List[Line] | None =
     
     existing_shakeoffs = {}
     
-    for row in satellite_lines:
-        key = row.Shelli[2:4]
+    for Shelli in lineFieldValues(satellite_lines, 'Shelli')[0]:
+        key = Shelli[2:4]
         if key not in existing_shakeoffs:
             existing_shakeoffs[key] = get_shakeoff(key, shakeoff)
     
@@ -246,6 +269,12 @@ def setupShakeExc(sat_lines: List[List[Line]] | None = [], up_lines: List[List[L
     else:
         up_flag = generalVars.Shakeup_exists_exc
     
+    # Build the numeric shake tables used in the intensity calculations
+    for exc_index, shakes in enumerate(shakeoff):
+        get_shakeoffTable(shakes)
+        if up_flag[exc_index]:
+            get_shakeupTable(shakeup[exc_index])
+    
     for exc_index, shakes in enumerate(shakeup):
         if up_flag[exc_index]:
             shakeValues = {}
@@ -263,20 +292,32 @@ def setupShakeExc(sat_lines: List[List[Line]] | None = [], up_lines: List[List[L
             for key in shakeValues:
                 generalVars.shakeUPSplines_exc[exc_index][key] = interp1d(shakeOrbitals[key], shakeValues[key])
             
+            build_shakeupGrid(generalVars.shakeUPSplines_exc[exc_index], generalVars.missing_shakeup_exc[exc_index])
+            
         
             # Setup the missing shake-up probabilities
             
-            existing_shakeups = dict.fromkeys([row.Shelli[2:4] + "_" + str(row.jji) for row in shkup_lines[exc_index]], 0.0)
+            # Read the fields of the shake-up lines as columns, without creating a line object for each row
+            shelli, jji = lineFieldValues(shkup_lines[exc_index], 'Shelli', 'jji')
+            
+            existing_shakeups = dict.fromkeys([Shelli[2:4] + "_" + str(jj) for Shelli, jj in zip(shelli, jji)], 0.0)
             found_excitations = {}
+            found_indexes: List[int] = []
             
-            for row in shkup_lines[exc_index]:
-                key = row.Shelli[2:4]
-                if key + "_" + str(row.jji) not in found_excitations:
-                    found_excitations[key + "_" + str(row.jji)] = []
+            for i, (Shelli, jj) in enumerate(zip(shelli, jji)):
+                key = Shelli[2:4]
+                if key + "_" + str(jj) not in found_excitations:
+                    found_excitations[key + "_" + str(jj)] = []
                 
-                if row.Shelli[4:-1] not in found_excitations[key + "_" + str(row.jji)]:
-                    existing_shakeups[key + "_" + str(row.jji)] += get_shakeup_exc(key, row.Shelli[4:], row.jji, exc_index)
-                    found_excitations[key + "_" + str(row.jji)].append(row.Shelli[4:-1])
+                if Shelli[4:-1] not in found_excitations[key + "_" + str(jj)]:
+                    found_indexes.append(i)
+                    found_excitations[key + "_" + str(jj)].append(Shelli[4:-1])
+            
+            # Look up the shake-up probabilities of the first line of each excitation in one batch
+            found_rows: List[Line] = [shkup_lines[exc_index][i] for i in found_indexes]
+            found_keys = [row.Shelli[2:4] for row in found_rows]
+            for key, row, prob in zip(found_keys, found_rows, get_shakeup_batch(found_keys, found_rows, exc_index=exc_index)):
+                existing_shakeups[key + "_" + str(row.jji)] += prob
             
             shakeup_sums = {}
             
@@ -288,6 +329,9 @@ def setupShakeExc(sat_lines: List[List[Line]] | None = [], up_lines: List[List[L
             for key in existing_shakeups:
                 generalVars.missing_shakeup_exc[exc_index][key] = (shakeup_sums[key] - existing_shakeups[key]) / len(found_excitations[key])
             
+            # Fold the new missing shake-up probabilities into the tabulated probabilities
+            build_shakeupGrid(generalVars.shakeUPSplines_exc[exc_index], generalVars.missing_shakeup_exc[exc_index])
+            
             # Setup shakeup relations
             
             for shake1 in shakes:
@@ -308,8 +352,8 @@ def setupShakeExc(sat_lines: List[List[Line]] | None = [], up_lines: List[List[L
         
         if shakeoff[exc_index][0][0] != '':
             existing_shakeoffs = {}
-            for row in lines:
-                key = row.Shelli[2:4]
+            for Shelli in lineFieldValues(lines, 'Shelli')[0]:
+                key = Shelli[2:4]
                 if key not in existing_shakeoffs:
                     existing_shakeoffs[key] = get_shakeoff_exc(key, exc_index, shakeoff[exc_index])
         
@@ -346,6 +390,306 @@ def setupShakeExc(sat_lines: List[List[Line]] | None = [], up_lines: List[List[L
     return generalVars.shakeUPSplines_exc, generalVars.missing_shakeup_exc, generalVars.shake_relations_exc, generalVars.missing_shakeoff_exc, generalVars.shake_relations_exc, generalVars.shake_relations_exc
 
 
+# --------------------------------------------------------- #
+#                                                           #
+#                  NUMERIC SHAKE TABLES                     #
+#                                                           #
+# --------------------------------------------------------- #
+
+class ShakeTable():
+    """
+    Class with the numeric shake probabilities read from a shake-off or shake-up file, indexed by 2J and shake label.
+    The shake-off table holds every row of the file and the shake-up table holds the SUM rows of each shake label.
+    """
+    def __init__(self, labels: List[str], jjs: List[int], probs: List[float], avgNorm: int):
+        """
+        Args:
+            labels: shake label of each row
+            jjs: 2J value of each row
+            probs: shake probability of each row
+            avgNorm: sum of the different 2J + 1 values in the file, used to normalise the average shake probability
+        """
+        self.labels: List[str] = list(dict.fromkeys(labels))
+        """
+        Different shake labels in the table, in file order
+        """
+        self.labelIndex: Dict[str, int] = {label: i for i, label in enumerate(self.labels)}
+        """
+        Index of each shake label in the table columns
+        """
+        self.probsJJ: Dict[int, npt.NDArray[np.float64]] = {}
+        """
+        Summed probability of each shake label for each 2J value
+        """
+        self.totalsJJ: Dict[int, float] = {}
+        """
+        Total probability for each 2J value, without shake amplitudes
+        """
+        self.weighted: npt.NDArray[np.float64] = np.zeros(len(self.labels))
+        """
+        Sum of the probabilities weighted by 2J + 1 for each shake label
+        """
+        self.weights: npt.NDArray[np.float64] = np.zeros(len(self.labels))
+        """
+        Sum of 2J + 1 for each shake label
+        """
+        self.avgNorm: int = avgNorm
+        """
+        Sum of the different 2J + 1 values in the file
+        """
+        
+        for label, jj, prob in zip(labels, jjs, probs):
+            if jj not in self.probsJJ:
+                self.probsJJ[jj] = np.zeros(len(self.labels))
+            
+            self.probsJJ[jj][self.labelIndex[label]] += prob
+            self.weighted[self.labelIndex[label]] += prob * (jj + 1)
+            self.weights[self.labelIndex[label]] += jj + 1
+        
+        for jj in self.probsJJ:
+            self.totalsJJ[jj] = float(np.sum(self.probsJJ[jj]))
+    
+    def amplitudes(self, shake_amps: dict, prefix: str) -> npt.NDArray[np.float64]:
+        """
+        Function to get the shake amplitude of each shake label in the table
+        
+            Args:
+                shake_amps: parameters to multiply the shake probabilities during fitting
+                prefix: prefix of the amplitude parameters in shake_amps
+            
+            Returns:
+                amplitude of each shake label (1.0 if there is no parameter for the label)
+        """
+        return np.array([shake_amps[prefix + label] if prefix + label in shake_amps else 1.0 for label in self.labels])
+    
+    def total(self, JJ2: int, shake_amps: dict, prefix: str) -> float:
+        """
+        Function to calculate the total shake probability for a 2J value
+        
+            Args:
+                JJ2: 2*J value of the initial level
+                shake_amps: parameters to multiply the shake probabilities during fitting
+                prefix: prefix of the amplitude parameters in shake_amps
+            
+            Returns:
+                sum of the shake probabilities for all shake labels with 2J of JJ2
+        """
+        if JJ2 not in self.probsJJ:
+            return 0.0
+        
+        if len(shake_amps) == 0:
+            return self.totalsJJ[JJ2]
+        
+        return float(self.probsJJ[JJ2] @ self.amplitudes(shake_amps, prefix))
+    
+    def average(self, shake_amps: dict, prefix: str) -> float:
+        """
+        Function to calculate the total shake probability averaged over the 2J values, weighted by 2J + 1
+        
+            Args:
+                shake_amps: parameters to multiply the shake probabilities during fitting
+                prefix: prefix of the amplitude parameters in shake_amps
+            
+            Returns:
+                average of the total shake probability
+        """
+        if len(self.probsJJ) == 0:
+            return 0.0
+        
+        amps = self.amplitudes(shake_amps, prefix)
+        return sum([(jj + 1) * float(probs @ amps) for jj, probs in self.probsJJ.items()]) / self.avgNorm
+
+
+shakeTables: Dict[int, Tuple[List[List[str]], ShakeTable]] = {}
+"""
+Numeric shake tables built for each shake-off and shake-up file, keyed by the id of the list of rows read from the file
+"""
+
+# Build the numeric shake-off table of a shake-off file
+def get_shakeoffTable(shakeoff: List[List[str]]) -> ShakeTable:
+    """
+    Function to get the numeric shake-off table of the rows read from a shake-off file, building it the first time
+    
+        Args:
+            shakeoff: rows of the shake-off file
+        
+        Returns:
+            the shake-off table
+    """
+    if id(shakeoff) in shakeTables and shakeTables[id(shakeoff)][0] is shakeoff:
+        return shakeTables[id(shakeoff)][1]
+    
+    rows = [shake for shake in shakeoff if len(shake) > 3]
+    table = ShakeTable([shake[1] for shake in rows], [int(shake[2]) for shake in rows], [float(shake[3]) for shake in rows],
+                       sum(set([int(shake[2]) + 1 for shake in rows])))
+    
+    shakeTables[id(shakeoff)] = (shakeoff, table)
+    return table
+
+# Build the numeric shake-up table of a shake-up file
+def get_shakeupTable(shakeup: List[List[str]]) -> ShakeTable:
+    """
+    Function to get the numeric shake-up table of the SUM rows read from a shake-up file, building it the first time
+    
+        Args:
+            shakeup: rows of the shake-up file
+        
+        Returns:
+            the shake-up table
+    """
+    if id(shakeup) in shakeTables and shakeTables[id(shakeup)][0] is shakeup:
+        return shakeTables[id(shakeup)][1]
+    
+    rows = [shake for shake in shakeup if len(shake) > 4]
+    sums = [shake for shake in rows if shake[2] == 'SUM']
+    table = ShakeTable([shake[1] for shake in sums], [int(shake[3]) for shake in sums], [float(shake[4]) for shake in sums],
+                       sum(set([int(shake[3]) + 1 for shake in rows])))
+    
+    shakeTables[id(shakeup)] = (shakeup, table)
+    return table
+
+
+class ShakeUpGrid():
+    """
+    Class with the shake-up probabilities tabulated densely over (shake orbital, 2J, excitation orbital n).
+    The values reproduce the linear shake-up splines at every integer n, are 0 outside the range of each spline,
+    and have the missing shake-up probabilities folded in.
+    """
+    def __init__(self, splines: Dict[str, interp1d], missing: Dict[str, float]):
+        """
+        Args:
+            splines: shake-up splines for each shake orbital and 2J key (orbital_2J)
+            missing: missing shake-up probability for each shake orbital and 2J key
+        """
+        self.keyIndex: Dict[str, int] = {key: i for i, key in enumerate(splines)}
+        """
+        Row of each shake orbital and 2J key
+        """
+        self.nmin: int = min([int(spline.x[0]) for spline in splines.values()], default=0)
+        """
+        Excitation orbital n of the first column
+        """
+        nmax: int = max([int(spline.x[-1]) for spline in splines.values()], default=-1)
+        
+        self.values: npt.NDArray[np.float64] = np.zeros((len(splines), nmax - self.nmin + 1))
+        """
+        Shake-up probability for each key and excitation orbital n
+        """
+        
+        for key, spline in splines.items():
+            # Same linear interpolation as the spline, on the sorted nodes
+            x = np.asarray(spline.x, dtype=np.float64)
+            y = np.asarray(spline.y, dtype=np.float64)
+            n = np.arange(int(x[0]), int(x[-1]) + 1, dtype=np.float64)
+            
+            hi = np.clip(np.searchsorted(x, n), 1, len(x) - 1)
+            lo = hi - 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = (y[hi] - y[lo]) / (x[hi] - x[lo]) * (n - x[lo]) + y[lo]
+            
+            self.values[self.keyIndex[key], int(x[0]) - self.nmin:int(x[-1]) - self.nmin + 1] = values + missing.get(key, 0.0)
+    
+    def lookup(self, key: str, shakeF: str, JJ2: int) -> float:
+        """
+        Function to get the tabulated shake-up probability
+        
+            Args:
+                key: electron shake-up orbital label
+                shakeF: excitation orbital of the shake-up electron
+                JJ2: 2*J value of the initial level
+            
+            Returns:
+                shake-up probability (0 if there is no probability for the key or the excitation orbital is out of range)
+        """
+        row = self.keyIndex.get(key + '_' + str(JJ2))
+        if row is None:
+            return 0.0
+        
+        try:
+            col = int(shakeF[:-1]) - self.nmin
+        except ValueError:
+            return 0.0
+        
+        if col < 0 or col >= self.values.shape[1]:
+            return 0.0
+        
+        return float(self.values[row, col])
+    
+    def lookup_batch(self, keys: List[str], shakeFs: List[str], JJ2s: List[int]) -> npt.NDArray[np.float64]:
+        """
+        Function to get the tabulated shake-up probabilities for lists of lines
+        
+            Args:
+                keys: electron shake-up orbital label of each line
+                shakeFs: excitation orbital of the shake-up electron of each line
+                JJ2s: 2*J value of the initial level of each line
+            
+            Returns:
+                shake-up probability of each line
+        """
+        rows = np.array([self.keyIndex.get(key + '_' + str(JJ2), -1) for key, JJ2 in zip(keys, JJ2s)], dtype=np.int64)
+        cols = np.array([int(shakeF[:-1]) - self.nmin if shakeF[:-1].isdigit() else -1 for shakeF in shakeFs], dtype=np.int64)
+        
+        valid = (rows >= 0) & (cols >= 0) & (cols < self.values.shape[1])
+        
+        probs: npt.NDArray[np.float64] = np.zeros(len(rows))
+        probs[valid] = self.values[rows[valid], cols[valid]]
+        
+        return probs
+
+
+shakeUpGrids: Dict[int, Tuple[dict, Dict[str, float], ShakeUpGrid]] = {}
+"""
+Tabulated shake-up probabilities, keyed by the id of the shake-up splines dictionary they were built from
+"""
+
+# Tabulate the shake-up probabilities of a set of shake-up splines
+def build_shakeupGrid(splines: dict, missing: Dict[str, float]) -> ShakeUpGrid:
+    """
+    Function to tabulate the shake-up probabilities of a set of shake-up splines and missing probabilities.
+    This needs to be called again when the splines or the missing probabilities change.
+    
+        Args:
+            splines: shake-up splines for each shake orbital and 2J key
+            missing: missing shake-up probability for each shake orbital and 2J key
+        
+        Returns:
+            the tabulated shake-up probabilities
+    """
+    grid = ShakeUpGrid(splines, missing)
+    shakeUpGrids[id(splines)] = (splines, missing, grid)
+    
+    return grid
+
+# Get the tabulated shake-up probabilities of a set of shake-up splines
+def get_shakeupGrid(splines: dict, missing: Dict[str, float]) -> ShakeUpGrid:
+    """
+    Function to get the tabulated shake-up probabilities of a set of shake-up splines, building them the first time
+    
+        Args:
+            splines: shake-up splines for each shake orbital and 2J key
+            missing: missing shake-up probability for each shake orbital and 2J key
+        
+        Returns:
+            the tabulated shake-up probabilities
+    """
+    if id(splines) in shakeUpGrids:
+        cached_splines, cached_missing, grid = shakeUpGrids[id(splines)]
+        if cached_splines is splines and cached_missing is missing:
+            return grid
+    
+    return build_shakeupGrid(splines, missing)
+
+# Clear the numeric shake tables and the tabulated shake-up probabilities
+def clear_shake_tables():
+    """
+    Function to clear the numeric shake tables and the tabulated shake-up probabilities,
+    so the rows and splines of a previous element are not kept
+    """
+    shakeTables.clear()
+    shakeUpGrids.clear()
+
+
 # Calculate the total shake probability from shake-up and shake-off probabilities
 def calculateTotalShake(JJ2: int, shake_amps: dict = {}, shakeoff_lines: List[List[str]] | None = [], shakeup_lines: List[List[str]] | None = []) -> float:
     """
@@ -377,16 +721,11 @@ def calculateTotalShake(JJ2: int, shake_amps: dict = {}, shakeoff_lines: List[Li
         shakeoff = generalVars.shakeoff
     
     if len(shakeup) > 0 and len(shakeup[0]) > 1:
-        totalShakeup = sum([float(shake[4]) * \
-                            (shake_amps['shakeup_amps_' + shake[1]] if 'shakeup_amps_' + shake[1] in shake_amps else 1.0) \
-                            for shake in shakeup if int(shake[3]) == JJ2 and shake[2] == 'SUM'])
+        totalShakeup = get_shakeupTable(shakeup).total(JJ2, shake_amps, 'shakeup_amps_')
     else:
         totalShakeup = 0.0
     
-    return sum([float(shake[3]) * \
-                (shake_amps['shake_amps_' + shake[1]] if 'shake_amps_' + shake[1] in shake_amps else 1.0) \
-                for shake in shakeoff if int(shake[2]) == JJ2]) + \
-            totalShakeup
+    return get_shakeoffTable(shakeoff).total(JJ2, shake_amps, 'shake_amps_') + totalShakeup
 
 # Calculate the average total shake probability for all 2J ground state values
 def calculateAvgTotalShake(shake_amps: dict = {}, shakeoff_lines: List[List[str]] | None = [], shakeup_lines: List[List[str]] | None = []) -> float:
@@ -418,18 +757,11 @@ def calculateAvgTotalShake(shake_amps: dict = {}, shakeoff_lines: List[List[str]
         shakeoff = generalVars.shakeoff
     
     if len(shakeup) > 0 and len(shakeup[0]) > 1:
-        avgShakeup = sum([float(shake[4]) * (int(shake[3]) + 1) * \
-                            (shake_amps['shakeup_amps_' + shake[1]] if 'shakeup_amps_' + shake[1] in shake_amps else 1.0) \
-                            for shake in shakeup if shake[2] == 'SUM']) / \
-                        sum(list(set([int(shake[3]) + 1 for shake in shakeup])))
+        avgShakeup = get_shakeupTable(shakeup).average(shake_amps, 'shakeup_amps_')
     else:
         avgShakeup = 0.0
     
-    return (sum([float(shake[3]) * (int(shake[3]) + 1) * \
-                (shake_amps['shake_amps_' + shake[1]] if 'shake_amps_' + shake[1] in shake_amps else 1.0) \
-                for shake in shakeoff]) / \
-            sum(list(set([int(shake[2]) + 1 for shake in shakeoff])))) + \
-            avgShakeup
+    return get_shakeoffTable(shakeoff).average(shake_amps, 'shake_amps_') + avgShakeup
 
 
 # Search for the shake-off probability for the shake electron key
@@ -443,8 +775,6 @@ def get_shakeoff(key: str, shakelines: List[List[str]] | None = []):
         Returns:
             shake-off probability for the requested level
     """
-    probs = []
-    
     lines = []
     if shakelines != None:
         if shakelines != []:
@@ -454,12 +784,13 @@ def get_shakeoff(key: str, shakelines: List[List[str]] | None = []):
     else:
         lines = generalVars.shakeoff
     
-    for shake in lines:
-        if shake[1] == key:
-            probs.append(shake)
-    
+    table = get_shakeoffTable(lines)
+    if key in table.labelIndex:
+        weighted, weights = float(table.weighted[table.labelIndex[key]]), float(table.weights[table.labelIndex[key]])
+    else:
+        weighted, weights = 0.0, 0.0
     
-    total_shakeoff = sum([float(prob[3]) * (int(prob[2]) + 1) for prob in probs]) / sum([(int(prob[2]) + 1) for prob in probs])
+    total_shakeoff = weighted / weights
     
     return total_shakeoff + generalVars.missing_shakeoff
 
@@ -474,8 +805,6 @@ def get_shakeoff_exc(key: str, exc_index: int, shakelines: List[List[str]] | Non
         Returns:
             shake-off probability for the requested level
     """
-    probs = []
-    
     lines = []
     if shakelines != None:
         if shakelines != []:
@@ -485,13 +814,10 @@ def get_shakeoff_exc(key: str, exc_index: int, shakelines: List[List[str]] | Non
     else:
         lines = generalVars.shakeoff_exc[exc_index]
     
-    for shake in lines:
-        if shake[1] == key:
-            probs.append(shake)
+    table = get_shakeoffTable(lines)
+    total_shakeoff = table.weighted[table.labelIndex[key]] if key in table.labelIndex else 0.0
     
-    total_shakeoff = sum([float(prob[3]) * (int(prob[2]) + 1) for prob in probs])# / sum([(int(prob[2]) + 1) for prob in probs])
-    
-    return total_shakeoff + generalVars.missing_shakeoff_exc[exc_index]
+    return float(total_shakeoff) + generalVars.missing_shakeoff_exc[exc_index]
 
 
 # Search for the shake-up probability for the shake electron key and 2*J value JJ2
@@ -520,23 +846,7 @@ def get_shakeup(key: str, shakeF: str, JJ2: int, splines = {}, missing: Dict[str
         missing_shakeup = generalVars.missing_shakeup
     
     
-    if key + '_' + str(JJ2) not in shakeUPSplines:
-        return 0.0
-    
-    if key + '_' + str(JJ2) not in missing_shakeup:
-        try:
-            # print(f'{(JJ2 + 1)} * {shakeUPSplines[key + "_" + str(JJ2)](int(shakeF[:-1]))} = {(JJ2+1) * shakeUPSplines[key + "_" + str(JJ2)](int(shakeF[:-1]))}')
-            return shakeUPSplines[key + '_' + str(JJ2)](int(shakeF[:-1]))
-        except ValueError:
-            # print("Warning: Out of bounds excitation orbital in shake-up probability calculation!")
-            return 0.0
-    else:
-        try:
-            # print(f'{(JJ2 + 1)} * {(shakeUPSplines[key + "_" + str(JJ2)](int(shakeF[:-1])) + missing_shakeup[key + "_" + str(JJ2)])} = {(JJ2 + 1) * (shakeUPSplines[key + "_" + str(JJ2)](int(shakeF[:-1])) + missing_shakeup[key + "_" + str(JJ2)])}')
-            return (shakeUPSplines[key + '_' + str(JJ2)](int(shakeF[:-1])) + missing_shakeup[key + "_" + str(JJ2)])
-        except ValueError:
-            # print("Warning: Out of bounds excitation orbital in shake-up probability calculation!")
-            return 0.0
+    return get_shakeupGrid(shakeUPSplines, missing_shakeup).lookup(key, shakeF, JJ2)
 
 
 # Search for the shake-up probability for the shake electron key and 2*J value JJ2
@@ -565,21 +875,37 @@ def get_shakeup_exc(key: str, shakeF: str, JJ2: int, exc_index: int, splines = {
         missing_shakeup = generalVars.missing_shakeup_exc[exc_index]
     
     
-    if key + '_' + str(JJ2) not in shakeUPSplines:
-        return 0.0
+    return get_shakeupGrid(shakeUPSplines, missing_shakeup).lookup(key, shakeF, JJ2)
+
+
+# Search for the shake-up probabilities of a list of shake-up lines
+def get_shakeup_batch(keys: List[str], lines: List[Line], splines = {}, missing: Dict[str, float] = {}, exc_index: int = -1) -> npt.NDArray[np.float64]:
+    """
+    Function to search for the shake-up probabilities of a list of shake-up lines in a single lookup
     
-    if key + '_' + str(JJ2) not in missing_shakeup:
-        try:
-            return shakeUPSplines[key + '_' + str(JJ2)](int(shakeF[:-1]))
-        except ValueError:
-            # print("Warning: Out of bounds excitation orbital in shake-up probability calculation!")
-            return 0.0
+        Args:
+            keys: electron shake-up orbital label of each line
+            lines: shake-up lines, with the excitation orbital after the shake orbital in Shelli
+            exc_index: index of the excitation, or -1 for the non-excitation probabilities
+        
+        Returns:
+            shake-up probability of each line
+    """
+    shakeUPSplines = {}
+    missing_shakeup = {}
+    
+    if splines != {}:
+        shakeUPSplines = splines
     else:
-        try:
-            return (shakeUPSplines[key + '_' + str(JJ2)](int(shakeF[:-1])) + missing_shakeup[key + "_" + str(JJ2)])
-        except ValueError:
-            # print("Warning: Out of bounds excitation orbital in shake-up probability calculation!")
-            return 0.0
+        shakeUPSplines = generalVars.shakeUPSplines if exc_index == -1 else generalVars.shakeUPSplines_exc[exc_index]
+    
+    if missing != {}:
+        missing_shakeup = missing
+    else:
+        missing_shakeup = generalVars.missing_shakeup if exc_index == -1 else generalVars.missing_shakeup_exc[exc_index]
+    
+    return get_shakeupGrid(shakeUPSplines, missing_shakeup).lookup_batch(keys, [line.Shelli[4:] for line in lines],
+                                                                          [line.jji for line in lines])
 
 
 # Search for the 2j values possible for the selected transitions in the transition_list
@@ -606,7 +932,7 @@ def jj_search(transition_list: List[str]):
                 low_level: str = generalVars.the_dictionary[transition]["low_level"] # type: ignore
                 high_level: str = generalVars.the_dictionary[transition]["high_level"] # type: ignore
                 
-                jj_vals += [line.jji for line in lines_to_search if line.filterLevel(low_level, high_level, strict='na')]
+                jj_vals += [line.jji for line in filterLines(lines_to_search, low_level, high_level, strict='na')]
             
             if 'Satellites' in sat:
                 lines_to_search = generalVars.linesatellites
@@ -614,7 +940,7 @@ def jj_search(transition_list: List[str]):
                     low_level: str = generalVars.the_dictionary[transition]["low_level"] # type: ignore
                     high_level: str = generalVars.the_dictionary[transition]["high_level"] # type: ignore
                     
-                    jj_vals += [line.jji for line in lines_to_search if line.filterLevel(low_level, high_level, strict='na')]
+                    jj_vals += [line.jji for line in filterLines(lines_to_search, low_level, high_level, strict='na')]
             
         else:
             lines_to_search = generalVars.lineauger
@@ -623,7 +949,7 @@ def jj_search(transition_list: List[str]):
                 low_level: str = generalVars.the_aug_dictionary[transition]["low_level"] # type: ignore
                 high_level: str = generalVars.the_aug_dictionary[transition]["high_level"] # type: ignore
             
-                jj_vals += [line.jji for line in lines_to_search if line.filterLevel(low_level, high_level, strict='na')]
+                jj_vals += [line.jji for line in filterLines(lines_to_search, low_level, high_level, strict='na')]
     else:
         if sat != 'Auger':
             lines_to_search_PCS = generalVars.lineradrates_PCS
@@ -668,9 +994,9 @@ def jj_search(transition_list: List[str]):
                     high_level: str = generalVars.the_dictionary[transition]["high_level"] # type: ignore
                     
                     if not cs_type[cs_index]:
-                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_PCS) for line in lines if line.filterLevel(low_level, high_level, strict='na') and generalVars.rad_PCS[i] == cs]
+                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_PCS) if generalVars.rad_PCS[i] == cs for line in filterLines(lines, low_level, high_level, strict='na')]
                     else:
-                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_NCS) for line in lines if line.filterLevel(low_level, high_level, strict='na') and generalVars.rad_NCS[i] == cs]
+                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_NCS) if generalVars.rad_NCS[i] == cs for line in filterLines(lines, low_level, high_level, strict='na')]
             
             if 'Satellites' in sat:
                 lines_to_search_PCS = generalVars.linesatellites_PCS
@@ -686,9 +1012,9 @@ def jj_search(transition_list: List[str]):
                         high_level: str = generalVars.the_dictionary[transition]["high_level"] # type: ignore
                         
                         if not cs_type[cs_index]:
-                            jj_vals += [line.jji for i, lines in enumerate(lines_to_search_PCS) for line in lines if line.filterLevel(low_level, high_level, strict='na') and generalVars.rad_PCS[i] == cs]
+                            jj_vals += [line.jji for i, lines in enumerate(lines_to_search_PCS) if generalVars.rad_PCS[i] == cs for line in filterLines(lines, low_level, high_level, strict='na')]
                         else:
-                            jj_vals += [line.jji for i, lines in enumerate(lines_to_search_NCS) for line in lines if line.filterLevel(low_level, high_level, strict='na') and generalVars.rad_NCS[i] == cs]
+                            jj_vals += [line.jji for i, lines in enumerate(lines_to_search_NCS) if generalVars.rad_NCS[i] == cs for line in filterLines(lines, low_level, high_level, strict='na')]
         else:
             lines_to_search_PCS = generalVars.lineaugrates_PCS
             lines_to_search_NCS = generalVars.lineaugrates_NCS
@@ -729,9 +1055,9 @@ def jj_search(transition_list: List[str]):
                     high_level: str = generalVars.the_aug_dictionary[transition]["high_level"] # type: ignore
                     
                     if not cs_type[cs_index]:
-                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_PCS) for line in lines if line.filterLevel(low_level, high_level, strict='na') and generalVars.aug_PCS[i] == cs]
+                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_PCS) if generalVars.aug_PCS[i] == cs for line in filterLines(lines, low_level, high_level, strict='na')]
                     else:
-                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_NCS) for line in lines if line.filterLevel(low_level, high_level, strict='na') and generalVars.aug_PCS[i] == cs]
+                        jj_vals += [line.jji for i, lines in enumerate(lines_to_search_NCS) if generalVars.aug_PCS[i] == cs for line in filterLines(lines, low_level, high_level, strict='na')]
         
     jj_vals = list(set(jj_vals))
     jj_vals.sort()
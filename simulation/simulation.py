@@ -197,6 +197,8 @@ def make_simulation(sim: Toplevel | None, f: Figure | None, graph_area: Axes | N
         norm = None
         autofit = guiVars.autofitvar.get() # type: ignore
         
+        generalVars.computeDtype = np.float32 if guiVars.single_precision.get() else np.float64 # type: ignore
+        
         beam = None
     else:
         if 'number_points' in headless_config:
@@ -282,7 +284,7 @@ def make_simulation(sim: Toplevel | None, f: Figure | None, graph_area: Axes | N
             peak = headless_config['type_var']
         else:
             print("Error: No transition line profile chosen.")
-            print("Please define the value for the type_var in the headless_config dictionary (available: 'Voigt', 'Lorentzian', 'Gaussian').")
+            print("Please define the value for the type_var in the headless_config dictionary (available: 'Voigt', 'Voigt (Humlicek)', 'Pseudo-Voigt', 'Lorentzian', 'Gaussian').")
             print("Stopping....")
             exit(-1)
         if 'yoffset' in headless_config:
@@ -315,8 +317,19 @@ def make_simulation(sim: Toplevel | None, f: Figure | None, graph_area: Axes | N
             print("Please define the value for the excitation_energy in the headless_config dictionary.")
             print("Stopping....")
             exit(-1)
+        # Optional precision of the simulation and fitting ('single' or 'double')
+        if 'precision' in headless_config:
+            generalVars.computeDtype = np.float32 if headless_config['precision'] == 'single' else np.float64
+        # Optional resolution backend ('Direct' evaluates every line with the resolution, 'FFT' convolves the natural spectrum)
+        if 'profile_backend' in headless_config:
+            generalVars.profileBackend = headless_config['profile_backend']
+        # Optional truncated profile evaluation (0 widths evaluates the profiles over the full grid)
+        if 'profile_window' in headless_config:
+            generalVars.profileWindow = headless_config['profile_window']
+        if 'profile_tolerance' in headless_config:
+            generalVars.profileTolerance = headless_config['profile_tolerance']
+
 
-    
     # ---------------------------------------------------------------------------------------------------------------
     # Load and plot the experimental spectrum
     generalVars.exp_x = []
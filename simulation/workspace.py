@@ -0,0 +1,119 @@
+"""
+Module with the reusable intensity buffers for the y_calculator
+"""
+
+from __future__ import annotations
+
+from data.definitions import ComponentStore
+
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#                SIMULATION WORKSPACE BUFFERS               #
+#                                                           #
+# --------------------------------------------------------- #
+
+class Workspace():
+    """
+    Class to hold the intensity buffers filled by the y_calculator.
+    The buffers are only allocated when the grid or component shapes change, otherwise they are zeroed in place.
+    Each caller that keeps its results alive at the same time as another (e.g. the excitation and the main simulation)
+    needs its own workspace, as the buffers are overwritten on every call.
+    """
+    def __init__(self):
+        self.shape: Tuple[int, int, type] | None = None
+        """
+        Shape (number of points, number of diagram transitions, floating point type) of the current buffers
+        """
+        self.yfinal: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the simulated y values of each diagram transition
+        """
+        self.yfinals: ComponentStore | None = None
+        """
+        Store for the simulated y values of the satellite components with lines in each diagram transition
+        """
+        self.ytot: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the total simulated y values
+        """
+        self.yextrastot: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the total simulated y values of the extra fitting components
+        """
+        self.ydiagtot: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the total simulated y values of the diagram transitions
+        """
+        self.ysattot: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the total simulated y values of the satellite transitions
+        """
+        self.yshkofftot: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the total simulated y values of the shake-off transitions
+        """
+        self.yshkuptot: npt.NDArray[np.float64] = np.array([])
+        """
+        Buffer for the total simulated y values of the shake-up transitions
+        """
+
+    def prepare(self, num_points: int, num_diag: int, dtype: type = np.float64) -> Workspace:
+        """
+        Function to get the buffers ready for a new calculation, allocating them if the shapes changed or zeroing them otherwise
+
+            Args:
+                num_points: number of simulated x values
+                num_diag: number of diagram transitions
+                dtype: floating point type of the buffers
+
+            Returns:
+                the workspace object with zeroed buffers
+        """
+        shape = (num_points, num_diag, dtype)
+
+        if shape != self.shape:
+            self.shape = shape
+            self.yfinal = np.zeros((num_diag, num_points), dtype=dtype)
+            self.ytot = np.zeros(num_points, dtype=dtype)
+            self.yextrastot = np.zeros(num_points, dtype=dtype)
+            self.ydiagtot = np.zeros(num_points, dtype=dtype)
+            self.ysattot = np.zeros(num_points, dtype=dtype)
+            self.yshkofftot = np.zeros(num_points, dtype=dtype)
+            self.yshkuptot = np.zeros(num_points, dtype=dtype)
+        else:
+            for buffer in (self.yfinal, self.ytot, self.yextrastot,
+                           self.ydiagtot, self.ysattot, self.yshkofftot, self.yshkuptot):
+                buffer.fill(0.0)
+
+        return self
+
+    def components(self, num_transitions: int, num_slots: int, keys: npt.NDArray[np.int64], num_points: int,
+                   dtype: type = np.float64) -> ComponentStore:
+        """
+        Function to get a zeroed satellite component store, reusing the previous one if the same components are requested
+
+            Args:
+                num_transitions: number of diagram transitions
+                num_slots: number of shake label slots for each transition
+                keys: sorted flat index (transition * num_slots + slot) of the components with lines
+                num_points: number of simulated x values
+                dtype: floating point type of the stored values
+
+            Returns:
+                the component store
+        """
+        store = self.yfinals
+        if store is not None and store.num_transitions == num_transitions and store.num_slots == num_slots and \
+            store.data.shape[1] == num_points and store.data.dtype == dtype and np.array_equal(store.keys, keys):
+            store.data.fill(0.0)
+        else:
+            store = ComponentStore(num_transitions, num_slots, keys, num_points, dtype)
+            self.yfinals = store
+
+        return store
@@ -7,8 +7,13 @@ from __future__ import annotations
 #GUI Imports for warnings
 from tkinter import messagebox
 
-from simulation.profiles import G, L, V
+from simulation.profiles import G, L, V, voigtModes
+from simulation.batch import flatten_diagram_lines, flatten_satellite_lines, batch_profile_sum
+from simulation.convolution import fft_profile_sum
+from simulation.workspace import Workspace
+from data.definitions import ComponentStore
 from utils.experimental.detector import detector_efficiency
+from utils.misc.progress import get_reporter
 
 import data.variables as generalVars
 
@@ -35,10 +40,11 @@ def y_calculator(sim: Toplevel | None, transition_type: str, fit_type: str,
                  ys: List[List[List[float]]], ws: List[List[List[float]]],
                  res: float, energy_values: List[float], efficiency_values: List[float],
                  enoffset: float, sat_enoffset: float, shkoff_enoffset: float, shkup_enoffset: float,
-                 separate_offsets: bool | None = None, effic_var: str | None = None) -> \
+                 separate_offsets: bool | None = None, effic_var: str | None = None,
+                 workspace: Workspace | None = None) -> \
                     Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64],
                         npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.float64],
-                        npt.NDArray[np.float64]]:
+                        ComponentStore]:
     """ 
     Function to calculate the simulated intensities for all the transitions requested, taking into account the simulated offsets.
     This function is used only to apply the selected profile to the already filtered x, y and width values for the transitions.
@@ -61,111 +67,100 @@ def y_calculator(sim: Toplevel | None, transition_type: str, fit_type: str,
             sat_enoffset: satellite energy offset to simulate
             shkoff_enoffset: shake-off energy offset to simulate
             shkup_enoffset: shake-up energy offset to simulate
+            workspace: buffers to reuse for the simulated intensities (new buffers are allocated if None)
         
         Returns:
             yfinal: list of simulated y values for each diagram transition we want to simulate for each of the x values in T
             ytot: list of the simulated total y values for all transitions we want to simulate for each of the x values in T
-            yfinals: list of simulated y values for each satellite transition in each digram transition we want to simulate for each of the x values in T
+            yfinals: store of simulated y values for each satellite transition in each digram transition we want to simulate for each of the x values in T
     """
+    # Get the intensity buffers ready (allocated only when the shapes change, otherwise zeroed in place)
+    if workspace is None:
+        workspace = Workspace()
+    workspace.prepare(len(xfinal), len(x), generalVars.computeDtype)
+    
     # Initialize a list to store the final y values for each selected transition to be calulated
-    generalVars.yfinal = np.array([[0.0 for _ in range(len(xfinal))] for _ in range(len(x))])
+    generalVars.yfinal = workspace.yfinal
     """
     List of simulated y values for each diagrma transition we want to simulate for each of the x values in T
     """
     # Initialize a list to store the final y values summed across all selected transitions
-    generalVars.ytot = np.zeros(len(xfinal))
+    generalVars.ytot = workspace.ytot
     """
     List of the simulated total y values for all transitions we want to simulate for each of the x values in T
     """
     # Initialize a list to store the final y values summed across all extra fitting components
     if len(generalVars.extra_fitting_functions) > 0:
-        generalVars.yextrastot = np.zeros(len(xfinal))
+        generalVars.yextrastot = workspace.yextrastot
         """
         List of the simulated total y values for extra fitting components we comfigured for each of the x values in T
         """
     # Initialize a list to store the final y values summed across all selected diagram transitions
-    generalVars.ydiagtot = np.zeros(len(xfinal))
+    generalVars.ydiagtot = workspace.ydiagtot
     """
     List of the simulated total y values for all diagram transitions we want to simulate for each of the x values in T
     """
     # Initialize a list to store the final y values summed across all selected satellite transitions
-    generalVars.ysattot = np.zeros(len(xfinal))
+    generalVars.ysattot = workspace.ysattot
     """
     List of the simulated total y values for all satellite transitions we want to simulate for each of the x values in T
     """
     # Initialize a list to store the final y values summed across all selected shake-off transitions
-    generalVars.yshkofftot = np.zeros(len(xfinal))
+    generalVars.yshkofftot = workspace.yshkofftot
     """
     List of the simulated total y values for all shake-off transitions we want to simulate for each of the x values in T
     """
     # Initialize a list to store the final y values summed across all selected shake-up transitions
-    generalVars.yshkuptot = np.zeros(len(xfinal))
+    generalVars.yshkuptot = workspace.yshkuptot
     """
     List of the simulated total y values for all shake-up transitions we want to simulate for each of the x values in T
     """
-    # Initialize a list to store the final y values for each satellite transition for each of the selected transitions
-    generalVars.yfinals = []
+    # Initialize a store for the final y values of each satellite transition for each of the selected transitions
+    # Only the components with lines are stored (filled when calculating the satellites)
+    generalVars.yfinals = ComponentStore(len(xs), 2 * len(generalVars.label1), np.array([], dtype=np.int64), len(xfinal), generalVars.computeDtype)
     """
-    List of simulated y values for each satellite transition in each digram transition we want to simulate for each of the x values in T
+    Store of simulated y values for each satellite transition in each digram transition we want to simulate for each of the x values in T
     """
     
-    for j in range(len(xs)):
-        generalVars.yfinals.append([])
-        for i in generalVars.label1:
-            generalVars.yfinals[-1].append([0.0 for n in range(len(xfinal))])
-            generalVars.yfinals[-1].append([0.0 for n in range(len(xfinal))])
-    
-    generalVars.yfinals = np.array(generalVars.yfinals)
-    
     profile = V
-    if fit_type == 'Voigt':
+    if fit_type in voigtModes:
         profile = V
+        # Select the voigt implementation, which is also used by the extra fitting components
+        generalVars.voigtMode = voigtModes[fit_type]
     elif fit_type == 'Lorentzian':
         profile = L
     elif fit_type == 'Gaussian':
         profile = G
     
+    # The voigt profile can also be calculated as a convolution of the natural width spectrum with the resolution
+    profile_sum = batch_profile_sum
+    if generalVars.profileBackend == 'FFT' and profile is V:
+        profile_sum = fft_profile_sum
+    
+    # Throttled progress reporter for the interface or the console
+    reporter = get_reporter(sim)
+    
     b1max = 100 if '+' not in transition_type else 50
     if 'Diagram' in transition_type or 'Excitation' in transition_type or 'Auger' in transition_type:
         b1 = 0
-        # Loop all the diagram or auger transitions to calculate (y parameter)
+        
+        def diag_progress(fraction: float):
+            reporter.update(fraction * b1max)
+        
+        # Flatten all the diagram or auger lines and evaluate their profiles in a few broadcast blocks
+        # Each profile is calculated across the entire simulated range of x values and added to the y values of its transition
+        energies, intensities, widths, segments = flatten_diagram_lines(x, y, w, enoffset)
+        profile_sum(profile, xfinal, energies, intensities, res, widths, segments, generalVars.yfinal, diag_progress)
+        
         for j, k in enumerate(y):
-            # For each transition (high-low levels) loop all the different rates
-            # print("Diagram")
-            # print(str(x[j]) + "; " + str(y[j]) + "; " + str(w[j]))
-            el_idx: int = j // len(generalVars.the_dictionary)
-            tr_idx: int = j % len(generalVars.the_dictionary)
-            
-            # print(f'{el_idx}, {tr_idx}')
-            for i in range(len(k)):
-                # Depending on the profile selected add the y values of the calculated profile to the y values of this transition
-                # This profile is calculated across the entire simulated range of x values
-                generalVars.yfinal[j] = np.add(generalVars.yfinal[j],
-                                               profile(xfinal,
-                                                       x[j][i] + enoffset,
-                                                       y[j][i] * generalVars.weightFractions[el_idx][tr_idx],
-                                                       res,
-                                                       w[j][i]))
-                
-                # Add a proportionate amount of progress to the current progress value
-                b1 += b1max / (len(y) * len(k))
-                
-                if sim:
-                    # Set the progress on the interface
-                    guiVars.progress_var.set(b1) # type: ignore
-                    # Update the interface to show the progress
-                    sim.update_idletasks()
-            
             # If the transition rates list is not empty then add the y values for this transition into the total y values for all transitions
             if k != []:
-                generalVars.ytot = np.add(generalVars.ytot, generalVars.yfinal[j])
-                generalVars.ydiagtot = np.add(generalVars.ydiagtot, generalVars.yfinal[j])
+                np.add(generalVars.ytot, generalVars.yfinal[j], out=generalVars.ytot)
+                np.add(generalVars.ydiagtot, generalVars.yfinal[j], out=generalVars.ydiagtot)
         
-        if sim:
-            # Set and update the progress and progress bar to 100%
-            b1 = b1max
-            guiVars.progress_var.set(b1) # type: ignore
-            sim.update_idletasks()
+        # Set and update the progress and progress bar to 100%
+        b1 = b1max
+        reporter.update(b1, force=True)
     
     if 'Satellites' in transition_type or 'ESat' in transition_type:
         b1 = 0 if b1max == 100 else b1max
@@ -175,55 +170,27 @@ def y_calculator(sim: Toplevel | None, transition_type: str, fit_type: str,
         else:
             sep: bool = separate_offsets
         
-        # Similar to the diagram transitions but we need an extra for loop to get the rates of each satellite in each diagram transition
-        for j, k in enumerate(ys):
-            el_idx: int = j // len(generalVars.the_dictionary)
-            tr_idx: int = j % len(generalVars.the_dictionary)
-            
-            for l, m in enumerate(k):
-                # print(str(l) + " -> " + generalVars.label1[l])
-                # print(str(xs[j][l]) + "; " + str(ys[j][l]) + "; " + str(ws[j][l]))
-                for i, n in enumerate(m):
-                    if sep:
-                        if l < len(generalVars.label1):
-                            generalVars.yfinals[j][l] = np.add(generalVars.yfinals[j][l],
-                                                                profile(xfinal,
-                                                                        xs[j][l][i] + enoffset + shkoff_enoffset,
-                                                                        ys[j][l][i] * generalVars.weightFractions[el_idx][tr_idx],
-                                                                        res,
-                                                                        ws[j][l][i]))
-                        else:
-                            generalVars.yfinals[j][l] = np.add(generalVars.yfinals[j][l],
-                                                                profile(xfinal,
-                                                                        xs[j][l][i] + enoffset + shkup_enoffset,
-                                                                        ys[j][l][i] * generalVars.weightFractions[el_idx][tr_idx],
-                                                                        res,
-                                                                        ws[j][l][i]))
-                    else:
-                        generalVars.yfinals[j][l] = np.add(generalVars.yfinals[j][l],
-                                                            profile(xfinal,
-                                                                    xs[j][l][i] + enoffset + sat_enoffset,
-                                                                    ys[j][l][i] * generalVars.weightFractions[el_idx][tr_idx],
-                                                                    res,
-                                                                    ws[j][l][i]))
-
-                    if sim:
-                        b1 += b1max / (len(ys) * len(generalVars.label1) * len(m))
-                        guiVars.progress_var.set(b1) # type: ignore
-                        sim.update_idletasks()
-                
-                if m != []:
-                    generalVars.ytot = np.add(generalVars.ytot, generalVars.yfinals[j][l])
-                    generalVars.ysattot = np.add(generalVars.ysattot, generalVars.yfinals[j][l])
-                    if l < len(generalVars.label1):
-                        generalVars.yshkofftot = np.add(generalVars.yshkofftot, generalVars.yfinals[j][l])
-                    else:
-                        generalVars.yshkuptot = np.add(generalVars.yshkuptot, generalVars.yfinals[j][l])
+        def sat_progress(fraction: float):
+            reporter.update(b1 + fraction * b1max)
+        
+        # Similar to the diagram transitions but each line is accumulated into the row of its (transition, shake label) component
+        energies, intensities, widths, segments = flatten_satellite_lines(xs, ys, ws, enoffset, sat_enoffset, shkoff_enoffset, shkup_enoffset, sep)
+        # Only the components that have lines are allocated
+        keys = np.unique(segments)
+        generalVars.yfinals = workspace.components(len(xs), 2 * len(generalVars.label1), keys, len(xfinal), generalVars.computeDtype)
+        profile_sum(profile, xfinal, energies, intensities, res, widths, np.searchsorted(keys, segments),
+                    generalVars.yfinals.data, sat_progress)
+        
+        for (j, l), component in generalVars.yfinals.items():
+            np.add(generalVars.ytot, component, out=generalVars.ytot)
+            np.add(generalVars.ysattot, component, out=generalVars.ysattot)
+            if l < len(generalVars.label1):
+                np.add(generalVars.yshkofftot, component, out=generalVars.yshkofftot)
+            else:
+                np.add(generalVars.yshkuptot, component, out=generalVars.yshkuptot)
         
         b1 = 100
-        if sim:
-            guiVars.progress_var.set(b1) # type: ignore
-            sim.update_idletasks()
+        reporter.update(b1, force=True)
 
     
     if not effic_var:
@@ -236,13 +203,13 @@ def y_calculator(sim: Toplevel | None, transition_type: str, fit_type: str,
         # Get the efficiency values for the x values simulated
         detector_effi, detector_effi_sat, detector_effi_shkoff, detector_effi_shkup = detector_efficiency(energy_values, efficiency_values, xfinal, enoffset, sat_enoffset, shkoff_enoffset, shkup_enoffset)
         # Modify the y values by the effiency weights
-        generalVars.ytot = np.multiply(generalVars.ytot, np.array(detector_effi))
-        generalVars.ydiagtot = np.multiply(generalVars.ydiagtot, np.array(detector_effi))
-        generalVars.ysattot = np.multiply(generalVars.ysattot, np.array(detector_effi_sat))
-        generalVars.yshkofftot = np.multiply(generalVars.yshkofftot, np.array(detector_effi_shkoff))
-        generalVars.yshkuptot = np.multiply(generalVars.yshkuptot, np.array(detector_effi_shkup))
-        generalVars.yfinal = np.multiply(generalVars.yfinal, np.array(detector_effi))
-        generalVars.yfinals = np.multiply(generalVars.yfinals, np.array(detector_effi))
+        np.multiply(generalVars.ytot, np.array(detector_effi), out=generalVars.ytot)
+        np.multiply(generalVars.ydiagtot, np.array(detector_effi), out=generalVars.ydiagtot)
+        np.multiply(generalVars.ysattot, np.array(detector_effi_sat), out=generalVars.ysattot)
+        np.multiply(generalVars.yshkofftot, np.array(detector_effi_shkoff), out=generalVars.yshkofftot)
+        np.multiply(generalVars.yshkuptot, np.array(detector_effi_shkup), out=generalVars.yshkuptot)
+        np.multiply(generalVars.yfinal, np.array(detector_effi), out=generalVars.yfinal)
+        np.multiply(generalVars.yfinals.data, np.array(detector_effi), out=generalVars.yfinals.data)
     
     return generalVars.ytot, generalVars.ydiagtot, generalVars.ysattot, generalVars.yshkofftot, \
             generalVars.yshkuptot, generalVars.yfinal, generalVars.yfinals
@@ -257,10 +224,7 @@ def add_baseline(transition_type: str):
         generalVars.ydiagtot = np.add(generalVars.ydiagtot, generalVars.currentBaseline)
     
     if 'Satellites' in transition_type:
-        for j, yfinals in enumerate(generalVars.yfinals):
-            for l, yfinal in enumerate(yfinals):
-                if yfinal != []:
-                    generalVars.yfinals[j][l] = np.add(generalVars.yfinals[j][l], generalVars.currentBaseline) # type: ignore
+        np.add(generalVars.yfinals.data, generalVars.currentBaseline, out=generalVars.yfinals.data) # type: ignore
 
         generalVars.ysattot = np.add(generalVars.ysattot, generalVars.currentBaseline)
         generalVars.yshkofftot = np.add(generalVars.yshkofftot, generalVars.currentBaseline)
@@ -0,0 +1,11 @@
+"""
+Test configuration that makes the package modules importable from the repository root
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Initialize the global variables before the simulation modules import the definitions
+import data.variables
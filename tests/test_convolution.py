@@ -0,0 +1,29 @@
+"""
+Tests for the FFT resolution convolution backend against the direct voigt profiles
+"""
+
+import numpy as np
+import pytest
+
+from simulation.batch import batch_profile_sum
+from simulation.convolution import fft_profile_sum
+from simulation.profiles import V
+
+
+# Natural widths below, at and above the grid spacing (0.1), and line positions between grid points
+@pytest.mark.parametrize("width", [0.01, 0.05, 0.2, 0.5, 2.0])
+@pytest.mark.parametrize("offset", [0.0, 0.03, 0.05, 0.08])
+def test_fft_matches_direct_voigt(width: float, offset: float):
+    x = np.linspace(0.0, 100.0, 1001)
+    energies = np.array([50.0 + offset])
+    intensities = np.array([1.0])
+    widths = np.array([width])
+    segments = np.array([0])
+    
+    fft = np.zeros((1, len(x)))
+    direct = np.zeros((1, len(x)))
+    fft_profile_sum(V, x, energies, intensities, 0.5, widths, segments, fft)
+    batch_profile_sum(V, x, energies, intensities, 0.5, widths, segments, direct)
+    
+    assert np.trapezoid(fft[0], x) == pytest.approx(np.trapezoid(direct[0], x), rel=1e-4)
+    assert np.max(fft) == pytest.approx(np.max(direct), rel=1e-4)
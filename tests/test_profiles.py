@@ -0,0 +1,56 @@
+"""
+Tests for the truncated profile evaluation against the full grid evaluation
+"""
+
+import numpy as np
+import pytest
+
+import data.variables as generalVars
+
+from simulation.batch import batch_profile_sum
+from simulation.profiles import G, L, V
+
+
+# Lines narrower, as wide as and wider than the resolution, evaluated with each voigt implementation
+@pytest.mark.parametrize("voigtMode", ['Faddeeva', 'Humlicek', 'Pseudo'])
+@pytest.mark.parametrize("width", [0.02, 0.5, 3.0])
+@pytest.mark.parametrize("tolerance", [1e-4, 1e-6])
+def test_windowed_voigt_within_tolerance(monkeypatch, voigtMode: str, width: float, tolerance: float):
+    monkeypatch.setattr(generalVars, 'voigtMode', voigtMode)
+    monkeypatch.setattr(generalVars, 'profileTolerance', tolerance)
+
+    x = np.linspace(0.0, 1000.0, 100001)
+    energies = np.array([500.03])
+    intensities = np.array([1.0])
+    widths = np.array([width])
+    segments = np.array([0])
+
+    full = np.zeros((1, len(x)))
+    windowed = np.zeros((1, len(x)))
+    monkeypatch.setattr(generalVars, 'profileWindow', 0.0)
+    batch_profile_sum(V, x, energies, intensities, 0.5, widths, segments, full)
+    monkeypatch.setattr(generalVars, 'profileWindow', 1.0)
+    batch_profile_sum(V, x, energies, intensities, 0.5, widths, segments, windowed)
+
+    # The dropped profile and the error of the analytic tail are each below the tolerance
+    assert np.max(np.abs(windowed - full)) <= 2 * tolerance * np.max(full)
+
+
+@pytest.mark.parametrize("profile", [G, L])
+def test_windowed_profile_within_tolerance(monkeypatch, profile):
+    monkeypatch.setattr(generalVars, 'profileTolerance', 1e-6)
+
+    x = np.linspace(0.0, 1000.0, 100001)
+    energies = np.array([500.03])
+    intensities = np.array([1.0])
+    widths = np.array([0.5])
+    segments = np.array([0])
+
+    full = np.zeros((1, len(x)))
+    windowed = np.zeros((1, len(x)))
+    monkeypatch.setattr(generalVars, 'profileWindow', 0.0)
+    batch_profile_sum(profile, x, energies, intensities, 0.5, widths, segments, full)
+    monkeypatch.setattr(generalVars, 'profileWindow', 1.0)
+    batch_profile_sum(profile, x, energies, intensities, 0.5, widths, segments, windowed)
+
+    assert np.max(np.abs(windowed - full)) <= 1e-6 * np.max(full)
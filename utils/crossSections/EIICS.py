@@ -8,8 +8,9 @@ from __future__ import annotations
 import data.variables as generalVars
 
 import numpy as np
+import numpy.typing as npt
 
-from typing import List
+from typing import List, Dict, Tuple
 
 
 # --------------------------------------------------------- #
@@ -44,6 +45,35 @@ def MRBEB(C: float, B: float, impactEnergy: float):
     return SE
 
 
+def MRBEBArray(C: npt.ArrayLike, B: npt.ArrayLike, impactEnergy: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the electron impact cross section using the MRBEB model for arrays of values.
+    The arguments are broadcast against each other.
+    
+        Args:
+            C: effective nuclear shielding factors
+            B: electron binding energies for the electrons to be ionized
+            impactEnergy: energies of the progectile electrons
+        
+        Returns:
+            SE: electron impact cross sections
+    """
+    C, B, impactEnergy = np.broadcast_arrays(np.asarray(C, dtype=np.float64), np.asarray(B, dtype=np.float64),
+                                             np.asarray(impactEnergy, dtype=np.float64))
+    
+    bl = B/generalVars.mc2
+    t = impactEnergy/B
+    tl = impactEnergy/generalVars.mc2
+    beta2t = 1 - 1/((1+tl)**2)
+    beta2b = 1 - 1/((1+bl)**2)
+    c = (C/B)*2.0*generalVars.R
+    Pre = (4.0*np.pi*generalVars.a0*generalVars.a0*generalVars.Z*generalVars.alpha**4)/((beta2t + c * beta2b)*2*bl)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        SE = Pre * (0.5*(np.log(beta2t/(1-beta2t)) - beta2t - np.log(2*bl))*(1.0- 1.0/(t*t)) + (1.0 - 1.0/t) - (np.log(t)/(t+1.0))*((1+2*tl)/((1+tl/2)**2)) + ((bl*bl*(t-1))/(2*(1+tl/2)**2)) )
+    
+    return np.where(impactEnergy < B, 0.0, SE)
+
+
 def Zeff(meanR: float):
     '''
         As per the definition given by Douglas Hartree
@@ -98,6 +128,100 @@ def get_Zeff(label: str):
     return -1, -1
 
 
+class MRBEBTable():
+    """
+    Class with the shielding factors of the MRBEB cross section for each shell label.
+    The cross sections are normalised by the sum over all shells for the same binding and impact energies,
+    and the normalised values for all shells are cached for each (binding energy, impact energy) pair.
+    """
+    cacheSize: int = 4096
+    """
+    Maximum number of (binding energy, impact energy) pairs kept in the cache
+    """
+    
+    def __init__(self, labels: List[str]):
+        """
+        Args:
+            labels: shell labels
+        """
+        self.labels: List[str] = labels
+        """
+        Shell labels in the table
+        """
+        self.labelIndex: Dict[str, int] = {label: i for i, label in enumerate(labels)}
+        """
+        Index of each shell label
+        """
+        
+        # Every shell uses the shielding factor of the last label pair, as the per-shell cross sections did until now
+        Zeff1, n1 = get_Zeff(labels[-2])
+        Zeff2, n2 = get_Zeff(labels[-1])
+        
+        self.C: npt.NDArray[np.float64] = np.full(len(labels), C(Zeff1, Zeff2, n1, n2), dtype=np.float64)
+        """
+        Effective nuclear shielding factor of each shell
+        """
+        self.cache: Dict[Tuple[float, float], npt.NDArray[np.float64]] = {}
+        """
+        Normalised cross sections of all shells for each (binding energy, impact energy) pair
+        """
+    
+    def normalised(self, B: float, impactEnergy: float) -> npt.NDArray[np.float64]:
+        """
+        Function to get the normalised cross sections of all shells for a binding and impact energy
+        
+            Args:
+                B: electron binding energy
+                impactEnergy: energy of the projectile electron
+            
+            Returns:
+                cross section of each shell divided by the sum for all shells (0 if no shell can be ionized)
+        """
+        key = (float(B), float(impactEnergy))
+        if key not in self.cache:
+            if len(self.cache) >= self.cacheSize:
+                self.cache.clear()
+            
+            self.cache[key] = self.evaluate(np.array([B]), np.array([impactEnergy]))[0]
+        
+        return self.cache[key]
+    
+    def evaluate(self, B: npt.ArrayLike, impactEnergy: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """
+        Function to calculate the normalised cross sections of all shells for arrays of binding and impact energies
+        
+            Args:
+                B: electron binding energies
+                impactEnergy: energies of the projectile electrons
+            
+            Returns:
+                array with the normalised cross section of each shell in the last axis
+        """
+        B, impactEnergy = np.broadcast_arrays(np.asarray(B, dtype=np.float64), np.asarray(impactEnergy, dtype=np.float64))
+        
+        SE = MRBEBArray(self.C, B[..., np.newaxis], impactEnergy[..., np.newaxis])
+        total = np.sum(SE, axis=-1, keepdims=True)
+        
+        return np.divide(SE, total, out=np.zeros_like(SE), where=total != 0.0)
+
+
+class MRBEBCrossSection():
+    """
+    Class to calculate the normalised MRBEB cross section of one shell from a shared MRBEB table
+    """
+    def __init__(self, table: MRBEBTable, label: str):
+        """
+        Args:
+            table: the MRBEB table with all shells
+            label: shell label
+        """
+        self.table = table
+        self.index = table.labelIndex[label]
+    
+    def __call__(self, B: float, impactEnergy: float) -> float:
+        return float(self.table.normalised(B, impactEnergy)[self.index])
+
+
 def setupMRBEB(labels: List[str] | None = []):
     label1 = []
     if labels != None:
@@ -108,20 +232,9 @@ def setupMRBEB(labels: List[str] | None = []):
     else:
         label1 = generalVars.label1
     
-    totalMRBEB = []
-    
-    for i, label in enumerate(label1[:-1]):
-        Zeff1, n1 = get_Zeff(label)
-        Zeff2, n2 = get_Zeff(label1[i + 1])
-        totalMRBEB.append(lambda b, x: MRBEB(C(Zeff1, Zeff2, n1, n2), b, x))
-    
-    totalMRBEB.append(totalMRBEB[-1])
-    
-    for i, label in enumerate(label1[:-1]):
-        Zeff1, n1 = get_Zeff(label)
-        Zeff2, n2 = get_Zeff(label1[i + 1])
-        generalVars.elementMRBEB[label] = lambda b, x: MRBEB(C(Zeff1, Zeff2, n1, n2), b, x) / sum(totals(b, x) for totals in totalMRBEB)
+    table = MRBEBTable(label1)
     
-    generalVars.elementMRBEB[label1[-1]] = generalVars.elementMRBEB[label1[-2]]
+    for label in label1:
+        generalVars.elementMRBEB[label] = MRBEBCrossSection(table, label)
 
     return generalVars.elementMRBEB
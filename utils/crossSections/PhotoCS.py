@@ -1,16 +1,163 @@
-
 """
 Module that implements the functions for calculating the Photo Ionization cross section.
 At the moment only the ELAM database is used.
 """
 
+from __future__ import annotations
+
 import data.variables as generalVars
 
-import math
+import numpy as np
+import numpy.typing as npt
+
+from typing import List, Dict, Tuple
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#                  ELAM PHOTO IONIZATION                    #
+#                                                           #
+# --------------------------------------------------------- #
+
+class ELAMTables():
+    """
+    Class with the edge and photo absorption blocks of an ELAM element, parsed into arrays.
+    The cross section is interpolated linearly in log(energy) and log(cross section).
+    """
+    def __init__(self, ELAMElement: List[str]):
+        """
+        Args:
+            ELAMElement: lines of the ELAM database for the element
+        """
+        self.symbol: str = ''
+        """
+        Symbol of the element
+        """
+        self.Z: int = 0
+        """
+        Atomic number of the element
+        """
+        self.edges: Dict[str, Tuple[float, ...]] = {}
+        """
+        Edge energy, fluorescence yield and jump ratio of each edge label
+        """
+        
+        photo: List[List[float]] = []
+        
+        block = ''
+        for line in ELAMElement:
+            values = line.split()
+            if len(values) == 0:
+                continue
+            
+            if values[0] == 'Element':
+                self.symbol = values[1]
+                self.Z = int(values[2])
+                block = ''
+            elif values[0] == 'Edge':
+                self.edges[values[1]] = tuple(float(value) for value in values[2:])
+                block = ''
+            elif 'Photo' in line:
+                block = 'Photo'
+            elif 'Scatter' in line:
+                # The scattering block is not used
+                block = ''
+            elif 'EndElement' in line:
+                break
+            elif block != '':
+                try:
+                    row = [float(value) for value in values]
+                except ValueError:
+                    # Start of a block that is not used
+                    block = ''
+                    continue
+                
+                photo.append(row)
+        
+        photoTable = np.array(photo, dtype=np.float64).reshape(-1, 3)
+        
+        self.photoLogE: npt.NDArray[np.float64] = photoTable[:, 0]
+        """
+        log(energy) nodes of the photo absorption cross section
+        """
+        self.photoLogCS: npt.NDArray[np.float64] = photoTable[:, 1]
+        """
+        log(photo absorption cross section) at each node
+        """
+    
+    def interpolate(self, logE: npt.NDArray[np.float64], nodes: npt.NDArray[np.float64], values: npt.NDArray[np.float64],
+                    bounds_error: bool) -> npt.NDArray[np.float64]:
+        """
+        Function to interpolate a log-log table
+            
+            Args:
+                logE: log(energy) values to interpolate
+                nodes: log(energy) nodes of the table
+                values: log(cross section) values of the table
+                bounds_error: raise a ValueError for energies outside the table instead of returning nan
+            
+            Returns:
+                the interpolated cross sections
+        """
+        logE = np.asarray(logE, dtype=np.float64)
+        outside = (logE < nodes[0]) | (logE > nodes[-1])
+        if bounds_error and np.any(outside):
+            raise ValueError("A value in x_new is outside the interpolation range of the ELAM table.")
+        
+        return np.where(outside, np.nan, np.exp(np.interp(logE, nodes, values)))
+    
+    def photo(self, energies: npt.ArrayLike, bounds_error: bool = False) -> npt.NDArray[np.float64]:
+        """
+        Function to calculate the photo absorption cross section
+            
+            Args:
+                energies: photon energies, with any shape
+                bounds_error: raise a ValueError for energies outside the table instead of returning nan
+            
+            Returns:
+                the photo absorption cross section at each energy
+        """
+        return self.interpolate(np.log(energies), self.photoLogE, self.photoLogCS, bounds_error)
+
 
-from scipy.interpolate import interp1d
+class ELAMPhotoSpline():
+    """
+    Class to calculate the photo absorption cross section from log(energy), interchangeable with the previous interp1d spline
+    """
+    def __init__(self, tables: ELAMTables):
+        """
+        Args:
+            tables: the ELAM tables of the element
+        """
+        self.tables = tables
+    
+    def __call__(self, logE: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        return self.tables.interpolate(np.asarray(logE), self.tables.photoLogE, self.tables.photoLogCS, True)
+
+
+ELAMCache: Dict[int | Tuple[str, ...], ELAMTables] = {}
+"""
+Parsed ELAM tables of each element, keyed by the atomic number (or the ELAM lines if they have no element header)
+"""
 
-from typing import List
+# Parse the ELAM element data or get it from the cache
+def get_ELAMTables(ELAMElement: List[str]) -> ELAMTables:
+    """
+    Function to get the parsed ELAM tables of an element, parsing the ELAM lines only the first time the element is used
+        
+        Args:
+            ELAMElement: lines of the ELAM database for the element
+        
+        Returns:
+            the ELAM tables of the element
+    """
+    header = ELAMElement[0].split() if len(ELAMElement) > 0 else []
+    key = int(header[2]) if len(header) > 2 and header[0] == 'Element' else tuple(ELAMElement)
+    
+    if key not in ELAMCache:
+        ELAMCache[key] = ELAMTables(ELAMElement)
+    
+    return ELAMCache[key]
 
 
 def setupELAMPhotoIoniz(ELAMData: List[str] = []):
@@ -20,20 +167,6 @@ def setupELAMPhotoIoniz(ELAMData: List[str] = []):
     else:
         ELAMElement = generalVars.ELAMelement
     
-    found = False
-    x = []
-    y = []
+    generalVars.ELAMPhotoSpline = ELAMPhotoSpline(get_ELAMTables(ELAMElement))
     
-    for line in ELAMElement:
-        if 'Scatter' in line:
-            break
-        if found:
-            values = line.split()
-            x.append(float(values[0]))
-            y.append(math.exp(float(values[1])))
-        if 'Photo' in line:
-            found = True
-    
-    generalVars.ELAMPhotoSpline = interp1d(x, y)
-
-    return generalVars.ELAMPhotoSpline
\ No newline at end of file
+    return generalVars.ELAMPhotoSpline
@@ -13,15 +13,17 @@ import data.variables as generalVars
 import interface.variables as guiVars
 
 
+from data.definitions import Line, LineTable
+
 from simulation.mults import get_cascadeBoost
 
 import numpy as np
 
-from typing import List, Dict
-import numpy.typing as npt
+from scipy import sparse
 
+from typing import List, Dict, Tuple
+import numpy.typing as npt
 
-import copy
 
 
 # --------------------------------------------------------- #
@@ -31,69 +33,121 @@ import copy
 # --------------------------------------------------------- #
 
 
-def prepareBoostMatrices():
-    radInitials, radFinals, radMatrixDict = get_cascadeBoost('diagram')
-    
-    radInitials = list(set(radInitials))
-    radFinals = list(set(radFinals))
-    
-    radInitials.sort()
-    radFinals.sort()
+# Encode the initial and final level labels of a set of transitions as matrix indexes
+def labelIndexes(initials: List[str], finals: List[str]) -> Tuple[List[str], List[str], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Function to encode the initial and final level labels of a set of transitions as row and column indexes
+        
+        Args:
+            initials: initial level label of each transition
+            finals: final level label of each transition
+        
+        Returns:
+            sortedInitials: the different initial labels, sorted
+            sortedFinals: the different final labels, sorted
+            rows: row index of each transition
+            cols: column index of each transition
+    """
+    sortedInitials, rows = np.unique(np.array(initials, dtype=str), return_inverse=True)
+    sortedFinals, cols = np.unique(np.array(finals, dtype=str), return_inverse=True)
+    
+    return sortedInitials.tolist(), sortedFinals.tolist(), rows.astype(np.int64), cols.astype(np.int64)
+
+
+# Build a sparse matrix from the index encoded transitions
+def sparseMatrix(rows: npt.NDArray[np.int64], cols: npt.NDArray[np.int64], values: npt.ArrayLike,
+                 shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """
+    Function to build a sparse matrix from index encoded transitions.
+    When a transition is repeated the last value is kept, as when filling the matrix from a dictionary.
+        
+        Args:
+            rows: row index of each transition
+            cols: column index of each transition
+            values: value of each transition
+            shape: shape of the matrix
+        
+        Returns:
+            the sparse matrix
+    """
+    values = np.asarray(values, dtype=np.float64)
     
-    radData: npt.NDArray[np.float64] = np.zeros((len(radInitials), len(radFinals)))
-    radDataExtra: npt.NDArray[np.float64] = np.zeros((len(radInitials), len(radFinals)))
+    _, last = np.unique((rows * shape[1] + cols)[::-1], return_index=True)
+    keep = len(rows) - 1 - last
     
-    for i, initial in enumerate(radInitials):
-        for j, final in enumerate(radFinals):
-            key = initial + "->" + final
-            
-            if key in radMatrixDict:
-                radData[i, j] = generalVars.radBoostMatrixDict[key]
-                radDataExtra[i, j] = radMatrixDict[key] * (1 + generalVars.radBoostMatrixDict[key])
+    return sparse.coo_matrix((values[keep], (rows[keep], cols[keep])), shape=shape).tocsr()
+
+
+# Build the boost matrices for a cascade type
+def boostMatrices(cascadeType: str, boostDict: Dict[str, float]):
+    """
+    Function to build the sparse boost and total rate matrices for a cascade type
+        
+        Args:
+            cascadeType: diagram, auger or satellite
+            boostDict: dictionary with the boost of each transition
+        
+        Returns:
+            Initials: sorted initial level labels
+            Finals: sorted final level labels
+            Data: sparse matrix with the boost of each transition
+            DataExtra: sparse matrix with the rate of each transition including the boost
+    """
+    Initials, Finals, MatrixDict = get_cascadeBoost(cascadeType)
     
-    print("Done Radiative Boosts")
+    keys = [initial + "->" + final for initial, final in zip(Initials, Finals)]
+    Initials, Finals, rows, cols = labelIndexes(Initials, Finals)
     
+    boosts = np.array([boostDict[key] for key in keys], dtype=np.float64)
+    rates = np.array([MatrixDict[key] for key in keys], dtype=np.float64)
     
-    augInitials, augFinals, augMatrixDict = get_cascadeBoost('auger')
+    Data = sparseMatrix(rows, cols, boosts, (len(Initials), len(Finals)))
+    DataExtra = sparseMatrix(rows, cols, rates * (1 + boosts), (len(Initials), len(Finals)))
     
-    augInitials = list(set(augInitials))
-    augFinals = list(set(augFinals))
+    return Initials, Finals, Data, DataExtra
+
+
+# Logarithm of a sparse matrix for the log scale heatmaps
+def denseLog10(matrix: sparse.spmatrix) -> npt.NDArray[np.float64]:
+    """
+    Function to calculate the logarithm of a sparse matrix as a dense array, with -inf in the empty cells
+        
+        Args:
+            matrix: the sparse matrix
+        
+        Returns:
+            the log10 of each cell of the matrix
+    """
+    with np.errstate(divide='ignore'):
+        return np.log10(matrix.toarray())
+
+
+# Minimum logarithm of the positive values of a sparse matrix
+def minLog10(matrix: sparse.spmatrix) -> float:
+    """
+    Function to calculate the minimum log10 of the positive values stored in a sparse matrix
+        
+        Args:
+            matrix: the sparse matrix
+        
+        Returns:
+            the minimum log10 value
+    """
+    return float(np.min(np.log10(matrix.data[matrix.data > 0])))
+
+
+def prepareBoostMatrices():
+    radInitials, radFinals, radData, radDataExtra = boostMatrices('diagram', generalVars.radBoostMatrixDict)
     
-    augInitials.sort()
-    augFinals.sort()
+    print("Done Radiative Boosts")
     
-    augData: npt.NDArray[np.float64] = np.zeros((len(augInitials), len(augFinals)))
-    augDataExtra: npt.NDArray[np.float64] = np.zeros((len(augInitials), len(augFinals)))
     
-    for i, initial in enumerate(augInitials):
-        for j, final in enumerate(augFinals):
-            key = initial + "->" + final
-            
-            if key in augMatrixDict:
-                augData[i, j] = generalVars.augBoostMatrixDict[key]
-                augDataExtra[i, j] = augMatrixDict[key] * (1 + generalVars.augBoostMatrixDict[key])
+    augInitials, augFinals, augData, augDataExtra = boostMatrices('auger', generalVars.augBoostMatrixDict)
     
     print("Done Auger Boosts")
     
     
-    satInitials, satFinals, satMatrixDict = get_cascadeBoost('satellite')
-    
-    satInitials = list(set(satInitials))
-    satFinals = list(set(satFinals))
-    
-    satInitials.sort()
-    satFinals.sort()
-    
-    satData: npt.NDArray[np.float64] = np.zeros((len(satInitials), len(satFinals)))
-    satDataExtra: npt.NDArray[np.float64] = np.zeros((len(satInitials), len(satFinals)))
-    
-    for i, initial in enumerate(satInitials):
-        for j, final in enumerate(satFinals):
-            key = initial + "->" + final
-            
-            if key in satMatrixDict:
-                satData[i, j] = generalVars.satBoostMatrixDict[key]
-                satDataExtra[i, j] = satMatrixDict[key] * (1 + generalVars.satBoostMatrixDict[key])
+    satInitials, satFinals, satData, satDataExtra = boostMatrices('satellite', generalVars.satBoostMatrixDict)
     
     print("Done Satellite Boosts")
     
@@ -101,93 +155,34 @@ def prepareBoostMatrices():
     return radInitials, radFinals, radData, radDataExtra, \
             augInitials, augFinals, augData, augDataExtra, \
             satInitials, satFinals, satData, satDataExtra
-    
 
-def prepareRateMatrices():
-    radInitials: List[str] = []
-    radFinals: List[str] = []
-    radMatrixDict: Dict[str, float] = {}
-    
-    for line in generalVars.diagramwidths:
-        initial = line.labelI()
-        final = line.labelF()
-        radInitials.append(initial)
-        radFinals.append(final)
-        
-        radMatrixDict[line.key()] = line.intensity
-    
-    radInitials = list(set(radInitials))
-    radFinals = list(set(radFinals))
-    
-    radInitials.sort()
-    radFinals.sort()
-    
-    radData: npt.NDArray[np.float64] = np.zeros((len(radInitials), len(radFinals)))
-    
-    for i, initial in enumerate(radInitials):
-        for j, final in enumerate(radFinals):
-            key = initial + "->" + final
-            
-            if key in radMatrixDict:
-                radData[i, j] = radMatrixDict[key]
-    
-    
-    
-    augInitials: List[str] = []
-    augFinals: List[str] = []
-    augMatrixDict: Dict[str, float] = {}
-    
-    for line in generalVars.augerwidths:
-        initial = line.labelI()
-        final = line.labelF()
-        augInitials.append(initial)
-        augFinals.append(final)
+
+# Build the rate matrix of a set of transitions
+def rateMatrix(lines: List[Line]):
+    """
+    Function to build the sparse rate matrix of a set of transitions
         
-        augMatrixDict[line.key()] = line.intensity
-    
-    augInitials = list(set(augInitials))
-    augFinals = list(set(augFinals))
-    
-    augInitials.sort()
-    augFinals.sort()
-    
-    augData: npt.NDArray[np.float64] = np.zeros((len(augInitials), len(augFinals)))
-    
-    for i, initial in enumerate(augInitials):
-        for j, final in enumerate(augFinals):
-            key = initial + "->" + final
-            
-            if key in augMatrixDict:
-                augData[i, j] = augMatrixDict[key]
-    
-    
-    
-    satInitials: List[str] = []
-    satFinals: List[str] = []
-    satMatrixDict: Dict[str, float] = {}
-    
-    for line in generalVars.satellitewidths:
-        initial = line.labelI()
-        final = line.labelF()
-        satInitials.append(initial)
-        satFinals.append(final)
+        Args:
+            lines: the transitions
         
-        satMatrixDict[line.key()] = line.intensity
+        Returns:
+            Initials: sorted initial level labels
+            Finals: sorted final level labels
+            Data: sparse matrix with the rate of each transition
+    """
+    Initials, Finals, rows, cols = labelIndexes([line.labelI() for line in lines], [line.labelF() for line in lines])
     
-    satInitials = list(set(satInitials))
-    satFinals = list(set(satFinals))
+    Data = sparseMatrix(rows, cols, [line.intensity for line in lines], (len(Initials), len(Finals)))
     
-    satInitials.sort()
-    satFinals.sort()
+    return Initials, Finals, Data
+
+
+def prepareRateMatrices():
+    radInitials, radFinals, radData = rateMatrix(generalVars.diagramwidths)
     
-    satData: npt.NDArray[np.float64] = np.zeros((len(satInitials), len(satFinals)))
+    augInitials, augFinals, augData = rateMatrix(generalVars.augerwidths)
     
-    for i, initial in enumerate(satInitials):
-        for j, final in enumerate(satFinals):
-            key = initial + "->" + final
-            
-            if key in satMatrixDict:
-                satData[i, j] = satMatrixDict[key]
+    satInitials, satFinals, satData = rateMatrix(generalVars.satellitewidths)
     
     
     return radInitials, radFinals, radData, \
@@ -195,519 +190,282 @@ def prepareRateMatrices():
             satInitials, satFinals, satData
 
 
-def computeCascadeGraph(cascadeType: str):
-    nodes: List[Dict[str, int | float | str]] = []
-    edges: List[Dict[str, int | float]] = []
-    
-    hOffset = 1
-    vOffset = 1
-    
-    if cascadeType == "diagram":
-        for line in generalVars.lineradrates:
-            if line.energy > 0.0:
-                fStateEnergy = [level.energy for level in generalVars.ionizationsrad if line.filterFinalState(level)][0]
-                
-                node_f: Dict[str, int | float | str] = {}
-                node_f['x'] = line.jjf * hOffset
-                node_f['y'] = fStateEnergy * vOffset
-                node_f['label'] = line.labelF()
-                node_f['Energy'] = fStateEnergy
-                
-                
-                if node_f not in nodes:
-                    nodes.append(node_f)
-                
-                iStateEnergy = [level.energy for level in generalVars.ionizationsrad if line.filterInitialState(level)][0]
-                
-                appendInitial = False
-                node_i: Dict[str, int | float | str] = {}
-                node_i['x'] = line.jji * hOffset
-                node_i['y'] = iStateEnergy * vOffset
-                node_i['label'] = line.labelI()
-                node_i['Energy'] = iStateEnergy
-                
-                
-                EcrossSection = guiVars.exc_mech_var.get() # type: ignore
-                crossSection = 1.0
-                x = 0
-                maxFormation = max(generalVars.ionizationsrad, key=lambda x: x.gEnergy).gEnergy
-                for level in generalVars.ionizationsrad:
-                    if line.filterInitialState(level):
-                        x = guiVars.excitation_energy.get() # type: ignore
-                        formationEnergy = level.gEnergy
-                        if x == 0:
-                            x = maxFormation * 100
-                        
-                        if EcrossSection == 'EII':
-                            crossSection = generalVars.elementMRBEB[line.Shelli](formationEnergy, x)
-                        elif EcrossSection == 'PIon':
-                            crossSection = generalVars.ELAMPhotoSpline(np.log(x)) # type: ignore
-                        
-                        break
-                
-                if node_i not in nodes:
-                    appendInitial = True
-                else:
-                    idx = nodes.index(node_i)
-                    if 'beam' not in nodes[idx]:
-                        nodes[idx]['beam'] = x
-                        nodes[idx]['cross'] = crossSection
-                        nodes[idx]['type'] = EcrossSection
-                
-                node_i['beam'] = x
-                node_i['cross'] = crossSection
-                node_i['type'] = EcrossSection
-                
-                if appendInitial and node_i not in nodes:
-                    nodes.append(node_i)
-                
-                edge: Dict[str, int | float] = {}
-                
-                edge['final'] = nodes.index(node_f)
-                edge['initial'] = nodes.index(node_i)
-                
-                edge['energy'] = line.energy
-                edge['rate'] = line.intensity
-                edge['width'] = line.totalWidth
-                
-                edges.append(edge)
-        
+# Index the levels of an ionization energies file by their state
+def levelIndex(levels: List[Line]) -> Dict[Tuple[str, int, int], Line]:
+    """
+    Function to build the hashed (Shelli, jji, eigvi) -> level index of the levels read from an ionization energies file.
+    When a state is repeated the first level is kept, as in the linear search with the Line state filters.
         
-        maxX = max(nodes, key=lambda x: x['x'])['x'] * hOffset
-        maxY = max(nodes, key=lambda x: x['y'])['y'] * vOffset
+        Args:
+            levels: list or table of levels
         
+        Returns:
+            dictionary with the level of each state
+    """
+    index: Dict[Tuple[str, int, int], Line] = {}
+    for level in levels:
+        index.setdefault((level.Shelli, level.jji, level.eigvi), level)
+    
+    return index
+
+
+class CascadeGraphBuilder():
+    """
+    Class to build the nodes and edges of a cascade graph.
+    The levels are looked up in hashed indexes of the ionization energies and each node is stored once, keyed by its label and energy.
+    The edges are kept as columns and returned as a structured array.
+    """
+    hOffset: int = 1
+    """
+    Horizontal offset between the 2J values of the nodes
+    """
+    vOffset: int = 1
+    """
+    Vertical offset between the energy ranks of the nodes
+    """
+    edgeType = np.dtype([('initial', np.int64), ('final', np.int64),
+                         ('energy', np.float64), ('rate', np.float64), ('width', np.float64)])
+    """
+    Fields of the edges array
+    """
+    
+    def __init__(self):
+        self.levels: Dict[str, Dict[Tuple[str, int, int], Line]] = {'rad': levelIndex(generalVars.ionizationsrad),
+                                                                   'sat': levelIndex(generalVars.ionizationssat)}
+        """
+        Level index of the diagram and satellite ionization energies
+        """
+        self.EcrossSection: str = guiVars.exc_mech_var.get() # type: ignore
+        """
+        Excitation mechanism selected in the interface
+        """
+        self.beams: Dict[str, float] = {}
+        """
+        Beam energy used for the cross sections of the diagram and satellite levels
+        """
+        for levelType, levels in (('rad', generalVars.ionizationsrad), ('sat', generalVars.ionizationssat)):
+            beam = guiVars.excitation_energy.get() # type: ignore
+            if beam == 0 and len(levels) > 0:
+                beam = max(level.gEnergy for level in levels) * 100
+            
+            self.beams[levelType] = beam
         
-        sorted_nodes = copy.deepcopy(nodes)
-        sorted_nodes.sort(key=lambda x: x['y'])
+        self.crossSections: Dict[Tuple[str, str, float], float] = {}
+        """
+        Cross section of each (level type, shell, formation energy) already calculated (only the level type for the photo ionization)
+        """
         
-        for j, node in enumerate(sorted_nodes):
-            i = nodes.index(node)
-            nodes[i]['y'] -= nodes[i]['y'] + j * vOffset # type: ignore
+        self.nodes: List[Dict[str, int | float | str]] = []
+        """
+        Nodes of the graph
+        """
+        self.nodeIndex: Dict[Tuple[str, float], int] = {}
+        """
+        Index of the node of each (label, energy)
+        """
+        self.labelIndex: Dict[str, int] = {}
+        """
+        Index of the last node added with each label
+        """
         
-        for node in nodes:
-            node['x'] /= maxX # type: ignore
-            node['y'] /= maxY # type: ignore
-    elif cascadeType == "satellite":
-        for line in generalVars.linesatellites:
-            if line.energy > 0.0:
-                fStateEnergy = [level.energy for level in generalVars.ionizationssat if line.filterFinalState(level)][0]
-                
-                node_f = {}
-                node_f['x'] = line.jjf * hOffset
-                node_f['y'] = fStateEnergy * vOffset
-                node_f['label'] = line.labelF()
-                node_f['Energy'] = fStateEnergy
-                
-                
-                if node_f not in nodes:
-                    nodes.append(node_f)
-                
-                iStateEnergy = [level.energy for level in generalVars.ionizationssat if line.filterInitialState(level)][0]
-                
-                appendInitial = False
-                node_i = {}
-                node_i['x'] = line.jji * hOffset
-                node_i['y'] = iStateEnergy * vOffset
-                node_i['label'] = line.labelI()
-                node_i['Energy'] = iStateEnergy
-                
-                
-                EcrossSection = guiVars.exc_mech_var.get() # type: ignore
-                crossSection = 1.0
-                x = 0
-                maxFormation = max(generalVars.ionizationssat, key=lambda x: x.gEnergy).gEnergy
-                for level in generalVars.ionizationssat:
-                    if line.filterInitialState(level):
-                        x = guiVars.excitation_energy.get() # type: ignore
-                        formationEnergy = level.gEnergy
-                        if x == 0:
-                            x = maxFormation * 100
-                        
-                        if EcrossSection == 'EII':
-                            crossSection = generalVars.elementMRBEB[line.Shelli[:2]](formationEnergy, x)
-                        elif EcrossSection == 'PIon':
-                            crossSection = generalVars.ELAMPhotoSpline(np.log(x)) # type: ignore
-                        
-                        break
-                
-                if node_i not in nodes:
-                    appendInitial = True
-                else:
-                    idx = nodes.index(node_i)
-                    if 'beam' not in nodes[idx]:
-                        nodes[idx]['beam'] = x
-                        nodes[idx]['cross'] = crossSection
-                        nodes[idx]['type'] = EcrossSection
-                
-                node_i['beam'] = x
-                node_i['cross'] = crossSection
-                node_i['type'] = EcrossSection
-                
-                if appendInitial and node_i not in nodes:
-                    nodes.append(node_i)
-                                
-                edge = {}
-                
-                edge['final'] = nodes.index(node_f)
-                edge['initial'] = nodes.index(node_i)
-                
-                edge['energy'] = line.energy
-                edge['rate'] = line.intensity
-                edge['width'] = line.totalWidth
-                
-                edges.append(edge)
-        
-        add_auger = True
-        if add_auger:
-            for line in generalVars.lineauger:
-                if line.energy > 0.0:
-                    iStateEnergy = [level.energy for level in generalVars.ionizationsrad if line.filterInitialState(level)][0]
-                    
-                    appendInitial = False
-                    node_i = {}
-                    node_i['x'] = line.jji * hOffset
-                    node_i['y'] = iStateEnergy * vOffset
-                    node_i['label'] = line.labelI()
-                    node_i['Energy'] = iStateEnergy                
-                    
-                    
-                    EcrossSection = guiVars.exc_mech_var.get() # type: ignore
-                    crossSection = 1.0
-                    x = 0
-                    maxFormation = max(generalVars.ionizationsrad, key=lambda x: x.gEnergy).gEnergy
-                    for level in generalVars.ionizationsrad:
-                        if line.filterInitialState(level):
-                            x = guiVars.excitation_energy.get() # type: ignore
-                            formationEnergy = level.gEnergy
-                            if x == 0:
-                                x = maxFormation * 100
-                            
-                            if EcrossSection == 'EII':
-                                crossSection = generalVars.elementMRBEB[line.Shelli](formationEnergy, x)
-                            elif EcrossSection == 'PIon':
-                                crossSection = generalVars.ELAMPhotoSpline(np.log(x)) # type: ignore
-                            
-                            break
-                    
-                    if node_i not in nodes:
-                        appendInitial = True
-                    else:
-                        idx = nodes.index(node_i)
-                        if 'beam' not in nodes[idx]:
-                            nodes[idx]['beam'] = x
-                            nodes[idx]['cross'] = crossSection
-                            nodes[idx]['type'] = EcrossSection
-                            nodes[idx]['aug'] = 0
-                            
-                    
-                    node_i['beam'] = x
-                    node_i['cross'] = crossSection
-                    node_i['type'] = EcrossSection
-                    
-                    if appendInitial and node_i not in nodes:
-                        node_i['aug'] = 0
-                        if node_i not in nodes:
-                            nodes.append(node_i)
-                    
-                    edge = {}
-                    
-                    for i, node in enumerate(nodes):
-                        if node['label'] == line.labelF():
-                            edge['final'] = i
-                    
-                    if 'final' in edge:
-                        edge['initial'] = nodes.index(node_i)
-                        
-                        edge['energy'] = line.energy
-                        edge['rate'] = line.intensity
-                        edge['width'] = line.totalWidth
-                        
-                        edges.append(edge)
+        self.edgeInitials: List[int] = []
+        """
+        Initial node of each edge
+        """
+        self.edgeFinals: List[int] = []
+        """
+        Final node of each edge
+        """
+        self.edgeLines: List[Line] = []
+        """
+        Transition of each edge
+        """
+    
+    def crossSection(self, levelType: str, shell: str, formationEnergy: float) -> float:
+        """
+        Function to calculate the excitation cross section of a level, for the selected excitation mechanism
+            
+            Args:
+                levelType: 'rad' or 'sat' for the diagram or satellite levels
+                shell: shell of the level in the MRBEB cross sections
+                formationEnergy: energy necessary to reach the level
+            
+            Returns:
+                the cross section, or 1.0 when no excitation mechanism is selected
+        """
+        # The photo ionization cross section only depends on the beam energy, so it is calculated once for each level type
+        key = (levelType, shell, formationEnergy) if self.EcrossSection == 'EII' else (levelType, '', 0.0)
+        if key not in self.crossSections:
+            crossSection = 1.0
+            if self.EcrossSection == 'EII':
+                crossSection = generalVars.elementMRBEB[shell](formationEnergy, self.beams[levelType])
+            elif self.EcrossSection == 'PIon':
+                crossSection = generalVars.ELAMPhotoSpline(np.log(self.beams[levelType])) # type: ignore
+            
+            self.crossSections[key] = crossSection
         
-        add_dia = True
-        if add_dia:
-            for line in generalVars.lineradrates:
-                if line.energy > 0.0:
-                    iStateEnergy = [level.energy for level in generalVars.ionizationsrad if line.filterInitialState(level)][0]
-                    
-                    appendInitial = False
-                    node_i = {}
-                    node_i['x'] = line.jji * hOffset
-                    node_i['y'] = iStateEnergy * vOffset
-                    node_i['label'] = line.labelI()
-                    node_i['Energy'] = iStateEnergy                
-                    
-                    
-                    EcrossSection = guiVars.exc_mech_var.get() # type: ignore
-                    crossSection = 1.0
-                    x = 0
-                    maxFormation = max(generalVars.ionizationsrad, key=lambda x: x.gEnergy).gEnergy
-                    for level in generalVars.ionizationsrad:
-                        if line.filterInitialState(level):
-                            x = guiVars.excitation_energy.get() # type: ignore
-                            formationEnergy = level.gEnergy
-                            if x == 0:
-                                x = maxFormation * 100
-                            
-                            if EcrossSection == 'EII':
-                                crossSection = generalVars.elementMRBEB[line.Shelli](formationEnergy, x)
-                            elif EcrossSection == 'PIon':
-                                crossSection = generalVars.ELAMPhotoSpline(np.log(x)) # type: ignore
-                            
-                            break
-                    
-                    if node_i not in nodes:
-                        appendInitial = True
-                    else:
-                        idx = nodes.index(node_i)
-                        if 'beam' not in nodes[idx]:
-                            nodes[idx]['beam'] = x
-                            nodes[idx]['cross'] = crossSection
-                            nodes[idx]['type'] = EcrossSection
-                            nodes[idx]['dia'] = 0
-                            
-                    
-                    node_i['beam'] = x
-                    node_i['cross'] = crossSection
-                    node_i['type'] = EcrossSection
-                    
-                    if appendInitial and node_i not in nodes:
-                        node_i['aug'] = 0
-                        if node_i not in nodes:
-                            del node_i['aug']
-                            node_i['dia'] = 0
-                            nodes.append(node_i)
-                    
-                    edge = {}
-                    
-                    for i, node in enumerate(nodes):
-                        if node['label'] == line.labelF():
-                            edge['final'] = i
-                    
-                    if 'final' in edge:
-                        edge['initial'] = nodes.index(node_i)
-                        
-                        edge['energy'] = line.energy
-                        edge['rate'] = line.intensity
-                        edge['width'] = line.totalWidth
-                        
-                        edges.append(edge)
+        return self.crossSections[key]
+    
+    def addNode(self, label: str, jj: int, energy: float) -> int:
+        """
+        Function to add a node to the graph, if it was not added yet
+            
+            Args:
+                label: label of the level
+                jj: 2J value of the level
+                energy: energy of the level
+            
+            Returns:
+                the index of the node
+        """
+        key = (label, energy)
+        if key not in self.nodeIndex:
+            self.nodeIndex[key] = len(self.nodes)
+            self.labelIndex[label] = len(self.nodes)
+            self.nodes.append({'x': jj * self.hOffset, 'y': energy * self.vOffset, 'label': label, 'Energy': energy})
         
+        return self.nodeIndex[key]
+    
+    def addInitial(self, line: Line, levelType: str, shell: str, flag: str = '') -> int:
+        """
+        Function to add the initial level of a transition to the graph, with the cross section to reach it
+            
+            Args:
+                line: the transition
+                levelType: 'rad' or 'sat' for the ionization energies of the level
+                shell: shell of the level in the MRBEB cross sections
+                flag: key to mark the node with, when it is first used as an initial level
+            
+            Returns:
+                the index of the node
+        """
+        level = self.levels[levelType][(line.Shelli, line.jji, line.eigvi)]
         
-        maxX = max(nodes, key=lambda x: x['x'])['x'] * hOffset
-        maxY = max(nodes, key=lambda x: x['y'])['y'] * vOffset
-
-        sorted_nodes = copy.deepcopy(nodes)
-        sorted_nodes.sort(key=lambda x: x['y'])
+        i = self.addNode(line.labelI(), line.jji, level.energy)
+        node = self.nodes[i]
+        if 'beam' not in node:
+            node['beam'] = self.beams[levelType]
+            node['cross'] = self.crossSection(levelType, shell, level.gEnergy)
+            node['type'] = self.EcrossSection
+            if flag != '':
+                node[flag] = 0
         
-        for j, node in enumerate(sorted_nodes):
-            i = nodes.index(node)
-            nodes[i]['y'] -= nodes[i]['y'] + j * vOffset # type: ignore
+        return i
+    
+    def addTransitions(self, lines: List[Line] | LineTable, initialType: str, finalType: str = '', satellite: bool = False, flag: str = ''):
+        """
+        Function to add the transitions with positive energy to the graph
+            
+            Args:
+                lines: the transitions
+                initialType: 'rad' or 'sat' for the ionization energies of the initial levels
+                finalType: 'rad' or 'sat' for the ionization energies of the final levels.
+                            If empty, the transitions are connected to the last node added with their final label, and skipped if there is none
+                satellite: use the diagram shell of the initial levels for the MRBEB cross sections
+                flag: key to mark the nodes that are first used as initial levels by these transitions
+        """
+        if isinstance(lines, LineTable):
+            # Only build the line objects of the transitions with positive energy
+            lines = lines.take(np.flatnonzero(lines.columns['energy'] > 0.0))
         
-        for node in nodes:
-            node['x'] /= maxX # type: ignore
-            node['y'] /= maxY # type: ignore
-    elif cascadeType == 'auger':
-        for line in generalVars.lineauger:
+        for line in lines:
             if line.energy > 0.0:
-                fStateEnergy = [level.energy for level in generalVars.ionizationssat if line.filterFinalState(level)][0]
-                
-                node_f = {}
-                node_f['x'] = line.jjf * hOffset
-                node_f['y'] = fStateEnergy * vOffset
-                node_f['label'] = line.labelF()
-                node_f['Energy'] = fStateEnergy
-                
-                
-                if node_f not in nodes:
-                    nodes.append(node_f)
-                
-                iStateEnergy = [level.energy for level in generalVars.ionizationsrad if line.filterInitialState(level)][0]
-                
-                appendInitial = False
-                node_i = {}
-                node_i['x'] = line.jji * hOffset
-                node_i['y'] = iStateEnergy * vOffset
-                node_i['label'] = line.labelI()
-                node_i['Energy'] = iStateEnergy
-                
-                
-                EcrossSection = guiVars.exc_mech_var.get() # type: ignore
-                crossSection = 1.0
-                x = 0
-                maxFormation = max(generalVars.ionizationsrad, key=lambda x: x.gEnergy).gEnergy
-                for level in generalVars.ionizationsrad:
-                    if line.filterInitialState(level):
-                        x = guiVars.excitation_energy.get() # type: ignore
-                        formationEnergy = level.gEnergy
-                        if x == 0:
-                            x = maxFormation * 100
-                        
-                        if EcrossSection == 'EII':
-                            crossSection = generalVars.elementMRBEB[line.Shelli](formationEnergy, x)
-                        elif EcrossSection == 'PIon':
-                            crossSection = generalVars.ELAMPhotoSpline(np.log(x)) # type: ignore
-                        
-                        break
-                
-                if node_i not in nodes:
-                    appendInitial = True
-                else:
-                    idx = nodes.index(node_i)
-                    if 'beam' not in nodes[idx]:
-                        nodes[idx]['beam'] = x
-                        nodes[idx]['cross'] = crossSection
-                        nodes[idx]['type'] = EcrossSection
-                
-                node_i['beam'] = x
-                node_i['cross'] = crossSection
-                node_i['type'] = EcrossSection
+                if finalType != '':
+                    level = self.levels[finalType][(line.Shellf, line.jjf, line.eigvf)]
+                    final = self.addNode(line.labelF(), line.jjf, level.energy)
                 
-                if appendInitial and node_i not in nodes:
-                    nodes.append(node_i)
-                                
-                edge = {}
+                initial = self.addInitial(line, initialType, line.Shelli[:2] if satellite else line.Shelli, flag)
                 
-                edge['final'] = nodes.index(node_f)
-                edge['initial'] = nodes.index(node_i)
-                
-                edge['energy'] = line.energy
-                edge['rate'] = line.intensity
-                edge['width'] = line.totalWidth
+                if finalType == '':
+                    if line.labelF() not in self.labelIndex:
+                        continue
+                    
+                    final = self.labelIndex[line.labelF()]
                 
-                edges.append(edge)
+                self.edgeInitials.append(initial)
+                self.edgeFinals.append(final)
+                self.edgeLines.append(line)
+    
+    def layout(self) -> List[Dict[str, int | float | str]]:
+        """
+        Function to place the nodes of the graph, with x normalized by the maximum 2J value
+        and y as the normalized rank of the node energy (higher energies at the top)
+            
+            Returns:
+                the placed nodes
+        """
+        x = np.array([node['x'] for node in self.nodes], dtype=np.float64)
+        y = np.array([node['y'] for node in self.nodes], dtype=np.float64)
         
+        maxX = np.max(x) * self.hOffset
+        maxY = np.max(y) * self.vOffset
         
-        add_dia = True
-        if add_dia:
-            for line in generalVars.lineradrates:
-                if line.energy > 0.0:
-                    iStateEnergy = [level.energy for level in generalVars.ionizationsrad if line.filterInitialState(level)][0]
-                    
-                    appendInitial = False
-                    node_i = {}
-                    node_i['x'] = line.jji * hOffset
-                    node_i['y'] = iStateEnergy * vOffset
-                    node_i['label'] = line.labelI()
-                    node_i['Energy'] = iStateEnergy                
-                    
-                    
-                    EcrossSection = guiVars.exc_mech_var.get() # type: ignore
-                    crossSection = 1.0
-                    x = 0
-                    maxFormation = max(generalVars.ionizationsrad, key=lambda x: x.gEnergy).gEnergy
-                    for level in generalVars.ionizationsrad:
-                        if line.filterInitialState(level):
-                            x = guiVars.excitation_energy.get() # type: ignore
-                            formationEnergy = level.gEnergy
-                            if x == 0:
-                                x = maxFormation * 100
-                            
-                            if EcrossSection == 'EII':
-                                crossSection = generalVars.elementMRBEB[line.Shelli](formationEnergy, x)
-                            elif EcrossSection == 'PIon':
-                                crossSection = generalVars.ELAMPhotoSpline(np.log(x)) # type: ignore
-                            
-                            break
-                    
-                    if node_i not in nodes:
-                        appendInitial = True
-                    else:
-                        idx = nodes.index(node_i)
-                        if 'beam' not in nodes[idx]:
-                            nodes[idx]['beam'] = x
-                            nodes[idx]['cross'] = crossSection
-                            nodes[idx]['type'] = EcrossSection
-                            nodes[idx]['dia'] = 0
-                            
-                    
-                    node_i['beam'] = x
-                    node_i['cross'] = crossSection
-                    node_i['type'] = EcrossSection
-                    
-                    if appendInitial and node_i not in nodes:
-                        node_i['dia'] = 0
-                        if node_i not in nodes:
-                            nodes.append(node_i)
-                    
-                    edge = {}
-                    
-                    for i, node in enumerate(nodes):
-                        if node['label'] == line.labelF():
-                            edge['final'] = i
-                    
-                    if 'final' in edge:
-                        edge['initial'] = nodes.index(node_i)
-                        
-                        edge['energy'] = line.energy
-                        edge['rate'] = line.intensity
-                        edge['width'] = line.totalWidth
-                        
-                        edges.append(edge)
-        
+        ranks = np.empty(len(y), dtype=np.float64)
+        ranks[np.argsort(y, kind='stable')] = np.arange(len(y))
         
-        maxX = max(nodes, key=lambda x: x['x'])['x'] * hOffset
-        maxY = max(nodes, key=lambda x: x['y'])['y'] * vOffset
-
+        x /= maxX
+        y = -ranks * self.vOffset / maxY
         
-        sorted_nodes = copy.deepcopy(nodes)
-        sorted_nodes.sort(key=lambda x: x['y'])
+        for i, node in enumerate(self.nodes):
+            node['x'] = float(x[i])
+            node['y'] = float(y[i])
         
-        for j, node in enumerate(sorted_nodes):
-            i = nodes.index(node)
-            nodes[i]['y'] -= nodes[i]['y'] + j * vOffset # type: ignore
+        return self.nodes
+    
+    def edges(self) -> npt.NDArray[np.void]:
+        """
+        Function to get the edges of the graph
+            
+            Returns:
+                structured array with the initial and final node, energy, rate and width of each edge
+        """
+        edges = np.empty(len(self.edgeLines), dtype=self.edgeType)
+        edges['initial'] = self.edgeInitials
+        edges['final'] = self.edgeFinals
+        edges['energy'] = [line.energy for line in self.edgeLines]
+        edges['rate'] = [line.intensity for line in self.edgeLines]
+        edges['width'] = [line.totalWidth for line in self.edgeLines]
         
-        for node in nodes:
-            node['x'] /= maxX # type: ignore
-            node['y'] /= maxY # type: ignore
+        return edges
+
+
+def computeCascadeGraph(cascadeType: str):
+    graph = CascadeGraphBuilder()
+    
+    if cascadeType == "diagram":
+        graph.addTransitions(generalVars.lineradrates, 'rad', 'rad')
+    elif cascadeType == "satellite":
+        graph.addTransitions(generalVars.linesatellites, 'sat', 'sat', satellite=True)
+        graph.addTransitions(generalVars.lineauger, 'rad', flag='aug')
+        graph.addTransitions(generalVars.lineradrates, 'rad', flag='dia')
+    elif cascadeType == 'auger':
+        graph.addTransitions(generalVars.lineauger, 'rad', 'sat')
+        graph.addTransitions(generalVars.lineradrates, 'rad', flag='dia')
     else:
         raise RuntimeError("Error: Unrecognized cascade type: " + cascadeType + ". Allowed types are diagram, satellite or auger.")
     
-    return nodes, edges
+    return graph.layout(), graph.edges()
 
 
-def analyseConvergence():
-    radInitials: List[str] = []
-    radFinals: List[str] = []
-    radMatrixDict: Dict[str, Dict] = {}
-    
-    radConvPars: Dict[str, Dict] = {}
-    for line in generalVars.ionizationsrad:
-        radConvPars[line.labelI()] = {
-                    "overlap": line.convOverlap,
-                    "percent": line.percent,
-                    "accuracy": line.acc,
-                    "diff": line.diff,
-                    "ucv": abs(line.convOverlap[1] * (line.acc if line.acc != 0 else 1.0) * (line.diff if  line.diff != 0 else 1.0))
-                }
-    
-    for line in generalVars.diagramwidths:
-        initial = line.labelI()
-        final = line.labelF()
-        radInitials.append(initial)
-        radFinals.append(final)
+# Build the convergence matrix of a set of transitions
+def convergenceMatrix(levels: List[Line], lines: List[Line]):
+    """
+    Function to build the sparse unconverged value (UCV) matrix of a set of transitions
         
-        radMatrixDict[line.key()] = {
-            "initial": radConvPars[initial],
-            "final": radConvPars[final],
-            "ucv": line.intensity * (radConvPars[initial]["ucv"] + radConvPars[final]["ucv"]),
-            "rate": line.intensity
-        }
-    
-    radInitials = list(set(radInitials))
-    radFinals = list(set(radFinals))
-    
-    radInitials.sort()
-    radFinals.sort()
-    
-    
-    satInitials: List[str] = []
-    satFinals: List[str] = []
-    satMatrixDict: Dict[str, Dict] = {}
-    
-    satConvPars: Dict[str, Dict] = {}
-    for line in generalVars.ionizationssat:
-        satConvPars[line.labelI()] = {
+        Args:
+            levels: levels with the convergence parameters
+            lines: the transitions
+        
+        Returns:
+            Initials: sorted initial level labels
+            Finals: sorted final level labels
+            UCV: sparse matrix with the UCV of each transition
+            MatrixDict: dictionary with the rate and convergence parameters of the initial and final levels,
+                        keyed by the (row, column) of each transition in the matrix
+    """
+    ConvPars: Dict[str, Dict] = {}
+    for line in levels:
+        ConvPars[line.labelI()] = {
                     "overlap": line.convOverlap,
                     "percent": line.percent,
                     "accuracy": line.acc,
@@ -715,26 +473,32 @@ def analyseConvergence():
                     "ucv": abs(line.convOverlap[1] * (line.acc if line.acc != 0 else 1.0) * (line.diff if  line.diff != 0 else 1.0))
                 }
     
-    for line in generalVars.satellitewidths:
-        initial = line.labelI()
-        final = line.labelF()
-        satInitials.append(initial)
-        satFinals.append(final)
+    initials = [line.labelI() for line in lines]
+    finals = [line.labelF() for line in lines]
+    Initials, Finals, rows, cols = labelIndexes(initials, finals)
+    
+    ucvs: List[float] = []
+    MatrixDict: Dict[Tuple[int, int], Dict] = {}
+    for line, initial, final, i, j in zip(lines, initials, finals, rows.tolist(), cols.tolist()):
+        ucvs.append(line.intensity * (ConvPars[initial]["ucv"] + ConvPars[final]["ucv"]))
         
-        satMatrixDict[line.key()] = {
-            "initial": satConvPars[initial],
-            "final": satConvPars[final],
-            "rate": line.intensity,
-            "ucv": line.intensity * (satConvPars[initial]["ucv"] + satConvPars[final]["ucv"]),
+        MatrixDict[(i, j)] = {
+            "initial": ConvPars[initial],
+            "final": ConvPars[final],
+            "ucv": ucvs[-1],
             "rate": line.intensity
         }
     
-    satInitials = list(set(satInitials))
-    satFinals = list(set(satFinals))
+    UCV = sparseMatrix(rows, cols, ucvs, (len(Initials), len(Finals)))
+    
+    return Initials, Finals, UCV, MatrixDict
+
+
+def analyseConvergence():
+    radInitials, radFinals, radUCV, radMatrixDict = convergenceMatrix(generalVars.ionizationsrad, generalVars.diagramwidths)
     
-    satInitials.sort()
-    satFinals.sort()
+    satInitials, satFinals, satUCV, satMatrixDict = convergenceMatrix(generalVars.ionizationssat, generalVars.satellitewidths)
     
     
-    return radInitials, radFinals, radMatrixDict, \
-            satInitials, satFinals, satMatrixDict
\ No newline at end of file
+    return radInitials, radFinals, radUCV, radMatrixDict, \
+            satInitials, satFinals, satUCV, satMatrixDict
@@ -18,6 +18,8 @@ import interface.variables as guiVars
 #CSV reader import for reading and exporting data
 import csv
 
+import numpy as np
+
 #OS Imports for file paths
 import os
 from pathlib import Path
@@ -25,7 +27,7 @@ from pathlib import Path
 #OS import for timestamps
 from datetime import datetime
 
-from data.definitions import Line, processLine
+from data.definitions import Line, LineTable, processLine
 
 from matplotlib.pyplot import Axes
 
@@ -154,7 +156,7 @@ def write_to_xls(type_t: str, enoffset: float, sat_enoffset: float, shkoff_enoff
                         if max(generalVars.yfinal[cs_index * len(generalVars.the_dictionary) + index]) != 0:
                             first_line += [cs + ' ' + generalVars.the_dictionary[transition]["readable_name"]]
                         # Add the satellite transitions
-                        for l, m in enumerate(generalVars.yfinals[cs_index * len(generalVars.the_dictionary) + index]):
+                        for l, m in generalVars.yfinals.components(cs_index * len(generalVars.the_dictionary) + index):
                             if max(m) != 0:
                                 if l < len(generalVars.label1):
                                     first_line += [cs + ' ' + generalVars.the_dictionary[transition]["readable_name"] + '-' + labeldict[generalVars.label1[l]]]
@@ -167,7 +169,7 @@ def write_to_xls(type_t: str, enoffset: float, sat_enoffset: float, shkoff_enoff
                     if max(generalVars.yfinal[index]) != 0:
                         first_line += [generalVars.the_dictionary[transition]["readable_name"]]
                     # Add the satellite transitions
-                    for l, m in enumerate(generalVars.yfinals[index]):
+                    for l, m in generalVars.yfinals.components(index):
                         if max(m) != 0:
                             if l < len(generalVars.label1):
                                 first_line += [generalVars.the_dictionary[transition]["readable_name"] + '-' + labeldict[generalVars.label1[l]]] # type: ignore
@@ -204,7 +206,7 @@ def write_to_xls(type_t: str, enoffset: float, sat_enoffset: float, shkoff_enoff
                         if max(generalVars.yfinal[index]) != 0:
                             first_line += [cs + ' ' + generalVars.the_aug_dictionary[transition]["readable_name"]]
                         # Add the satellite transitions
-                        for l, m in enumerate(generalVars.yfinals[index]):
+                        for l, m in generalVars.yfinals.components(index):
                             if max(m) != 0:
                                 if l < len(generalVars.label1):
                                     first_line += [cs + ' ' + generalVars.the_aug_dictionary[transition]["readable_name"] + '-' + labeldict[generalVars.label1[l]]]
@@ -217,7 +219,7 @@ def write_to_xls(type_t: str, enoffset: float, sat_enoffset: float, shkoff_enoff
                     if max(generalVars.yfinal[index]) != 0:
                         first_line += [generalVars.the_aug_dictionary[transition]["readable_name"]]
                     # Add the satellite transitions
-                    for l, m in enumerate(generalVars.yfinals[index]):
+                    for l, m in generalVars.yfinals.components(index):
                         if max(m) != 0:
                             if l < len(generalVars.label1):
                                 first_line += [generalVars.the_aug_dictionary[transition]["readable_name"] + '-' + labeldict[generalVars.label1[l]]] # type: ignore
@@ -298,8 +300,8 @@ def write_to_xls(type_t: str, enoffset: float, sat_enoffset: float, shkoff_enoff
             transition_columns += 1
         
         # Same for the satellite transitions but we require and extra loop
-        if any([max(ys) for ys in generalVars.yfinals[i]]):
-            for j, ys in enumerate(generalVars.yfinals[i]):
+        if any([max(ys) for _, ys in generalVars.yfinals.components(i)]):
+            for j, ys in generalVars.yfinals.components(i):
                 if max(ys) != 0:
                     for row in range(len(y)):
                         matrix[row][transition_columns] = ys[row] # type: ignore
@@ -433,6 +435,10 @@ def write_to_xls(type_t: str, enoffset: float, sat_enoffset: float, shkoff_enoff
     # for row in matrix:
     #     print(' '.join(map(str, row)))
     
+    # ---------------------------------------------------------------------------------------------------------------
+    # Promote the values to double precision (the simulation can run in single precision)
+    matrix = [[float(value) if isinstance(value, np.floating) else value for value in row] for row in matrix]
+    
     # ---------------------------------------------------------------------------------------------------------------
     # Write the matrix in the file. First open as write to create the file, then we append the remaining lines
     for i, item in enumerate(matrix):
@@ -463,9 +469,9 @@ def exportFit(time_of_click: datetime, report: str):
     """
     with open(file_namer("Fit", time_of_click, ".txt"), 'w') as file:
         file.write(report)
-        file.write("\nTotal theoretical intensity multiplier for the amplitude parameters: " + str(max(generalVars.ytot)))
+        file.write("\nTotal theoretical intensity multiplier for the amplitude parameters: " + str(float(max(generalVars.ytot))))
         print(report)
-        print("\nTotal theoretical intensity multiplier for the amplitude parameters: " + str(max(generalVars.ytot)))
+        print("\nTotal theoretical intensity multiplier for the amplitude parameters: " + str(float(max(generalVars.ytot))))
 
 def saveMatrixHtml(fig: Figure, title: str):
     if not os.path.isdir(dir_path / str(generalVars.Z) / "Analysis"):
@@ -597,12 +603,12 @@ def readRates(rates_file: Path, gui: bool = True):
             rates_file: file path of the rates file
             
         Returns:
-            linerates: list with the data in Line objects
+            linerates: table with the data in columns (or a list of Line objects for files without the rates fields)
     """
     try:
         with open(rates_file, 'r') as rates:
-            # Write the lines into a list
-            return [processLine(line=x) for x in rates.readlines()[3:]]
+            # Write the lines into a columnar table
+            return LineTable.from_text(rates.readlines()[3:])
 
     except FileNotFoundError:
         if gui:
@@ -770,13 +776,13 @@ def readChargeStates(files: List[str], dir_path: Path, z: int, gui: bool = True)
             with open(tmp_file, 'r') as rates:
                 if '+' in file:
                     # Write the lines into a list and append it to the total rates for all charge states
-                    linerates_PCS.append([processLine(line=x) for x in rates.readlines()[3:]])
+                    linerates_PCS.append(LineTable.from_text(rates.readlines()[3:]))
                     
                     # Append the charge state value to identify the rates we just appended
                     PCS.append('+' + file.split('+')[1].split('.')[0])
                 else:
                     # Write the lines into a list and append it to the total rates for all charge states
-                    linerates_NCS.append([processLine(line=x) for x in rates.readlines()[3:]])
+                    linerates_NCS.append(LineTable.from_text(rates.readlines()[3:]))
                     
                     # Append the charge state value to identify the rates we just appended
                     NCS.append('-' + file.split('-')[1].split('.')[0])
@@ -868,7 +874,7 @@ def readExcitations(files: List[str], dir_path: Path, z: int, gui: bool = True):
         try:
             with open(tmp_file, 'r') as rates:
                 # Write the lines into a list and append it to the total rates for all charge states
-                linerates.append([processLine(line=x) for x in rates.readlines()[3:]])
+                linerates.append(LineTable.from_text(rates.readlines()[3:]))
                 
                 # Append the charge state value to identify the rates we just appended
                 EXC.append(file.split('_', 1)[-1].split('.')[0])
@@ -0,0 +1,194 @@
+"""
+Module with the progress reporters used by the simulation core.
+The simulation only calls update on a reporter, which decides how often and where the progress is shown.
+"""
+
+from __future__ import annotations
+
+import data.variables as generalVars
+
+import interface.variables as guiVars
+
+from tkinter import Toplevel
+
+from threading import Thread
+
+from typing import Any, Dict
+
+import os
+import time
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#                   PROGRESS REPORTERS                      #
+#                                                           #
+# --------------------------------------------------------- #
+
+class ProgressReporter():
+    """
+    Base class for the progress reporters. The updates are throttled to at most max_rate per second,
+    except when they are forced (e.g. when a stage reaches 100%)
+    """
+    def __init__(self, max_rate: float = 10.0):
+        """
+        Args:
+            max_rate: maximum number of updates shown per second
+        """
+        self.min_interval: float = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.last_time: float = 0.0
+
+    def update(self, value: float, force: bool = False):
+        """
+        Function to report a new progress value
+
+            Args:
+                value: progress percentage (0 to 100)
+                force: show the value even if the last update was too recent
+        """
+        now = time.monotonic()
+        if force or now - self.last_time >= self.min_interval:
+            self.last_time = now
+            self.emit(value)
+
+    def emit(self, value: float):
+        """
+        Function to show the progress value, implemented by each reporter
+
+            Args:
+                value: progress percentage (0 to 100)
+        """
+        pass
+
+
+class NullProgress(ProgressReporter):
+    """
+    Progress reporter that does not show anything
+    """
+    def update(self, value: float, force: bool = False):
+        pass
+
+
+class ConsoleProgress(ProgressReporter):
+    """
+    Progress reporter that prints the progress in the current console line
+    """
+    def emit(self, value: float):
+        print(generalVars.clearLine + "Progress: " + "{:.1f}".format(value) + "%", end='' if value < 100 else '\n', flush=True)
+
+
+class TkProgress(ProgressReporter):
+    """
+    Progress reporter that updates the progress bar of the interface
+    """
+    def __init__(self, sim: Toplevel, max_rate: float = 10.0):
+        """
+        Args:
+            sim: tkinter simulation window to update the progress bar
+            max_rate: maximum number of updates shown per second
+        """
+        super().__init__(max_rate)
+        self.sim = sim
+
+    def emit(self, value: float):
+        # Set the progress on the interface
+        guiVars.progress_var.set(value) # type: ignore
+        # Update the interface to show the progress
+        self.sim.update_idletasks()
+
+
+class QueueProgress(ProgressReporter):
+    """
+    Progress reporter for worker processes, which sends (worker id, value) to a queue read by the parent process
+    """
+    def __init__(self, queue: Any, worker: Any = None, max_rate: float = 2.0):
+        """
+        Args:
+            queue: multiprocessing queue shared with the parent process
+            worker: identifier of this worker (defaults to the process id)
+            max_rate: maximum number of updates sent per second
+        """
+        super().__init__(max_rate)
+        self.queue = queue
+        self.worker = worker if worker is not None else os.getpid()
+
+    def emit(self, value: float):
+        self.queue.put((self.worker, value))
+
+
+# --------------------------------------------------------- #
+#                                                           #
+#                PROGRESS REPORTER HELPERS                  #
+#                                                           #
+# --------------------------------------------------------- #
+
+#Progress reporter of the current interface simulation window
+tkReporter: TkProgress | None = None
+"""
+Progress reporter of the current interface simulation window, reused by every get_reporter call for that window
+"""
+
+# Get the progress reporter for the current simulation
+def get_reporter(sim: Toplevel | None) -> ProgressReporter:
+    """
+    Function to get the progress reporter to use in the simulation core
+
+        Args:
+            sim: tkinter simulation window, or None when running headless
+
+        Returns:
+            the cached reporter for the interface progress bar if there is a window, otherwise the configured headless reporter
+    """
+    global tkReporter
+    
+    if sim:
+        # Reuse the reporter of this window so the rate limit holds across the simulation stages
+        if tkReporter is None or tkReporter.sim is not sim:
+            tkReporter = TkProgress(sim)
+        
+        return tkReporter
+
+    if generalVars.progressReporter is None:
+        return NullProgress()
+
+    return generalVars.progressReporter
+
+# Install a queue progress reporter in a worker process
+def install_worker_progress(queue: Any):
+    """
+    Function to use as a multiprocessing pool initializer, so the workers report their progress to the parent process
+
+        Args:
+            queue: multiprocessing queue shared with the parent process
+    """
+    generalVars.progressReporter = QueueProgress(queue)
+
+# Print the progress reported by the worker processes
+def listen_worker_progress(queue: Any, num_workers: int) -> Thread:
+    """
+    Function to start a thread in the parent process that prints the average progress reported by the workers.
+    The thread stops when None is put in the queue.
+
+        Args:
+            queue: multiprocessing queue shared with the workers
+            num_workers: number of workers reporting progress
+
+        Returns:
+            the started listener thread
+    """
+    def listen():
+        progress: Dict[Any, float] = {}
+        reporter = ConsoleProgress(max_rate=2.0)
+        while True:
+            message = queue.get()
+            if message is None:
+                break
+
+            worker, value = message
+            progress[worker] = value
+            reporter.update(sum(progress.values()) / num_workers)
+
+    listener = Thread(target=listen, daemon=True)
+    listener.start()
+
+    return listener